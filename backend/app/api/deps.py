@@ -1,17 +1,28 @@
+from contextlib import AsyncExitStack
+from functools import lru_cache
+from typing import Any
+
 from fastapi import Depends
 from google.auth.exceptions import DefaultCredentialsError
 from google.cloud import bigquery
+from redis import asyncio as aioredis
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from backend.app.core.config import settings
 from backend.app.core.db import get_session
 from backend.app.core.logger import get_logger
 from backend.app.services.bigquery import BigQueryService
-from backend.app.services.file import FileService
+from backend.app.services.file import FileService, open_s3_client
+from backend.app.services.resumable import ResumableUploadService
 from backend.app.services.task import TaskService
+from backend.app.services.url_cache import PresignedUrlCache
 
 logger = get_logger("deps")
 
+# Shared S3 client and the FileService using it, set up by ``open_storage``.
+_storage: AsyncExitStack | None = None
+_file_service: FileService | None = None
+
 
 async def get_task_service(
     session: AsyncSession = Depends(get_session),
@@ -20,8 +31,9 @@ async def get_task_service(
     return TaskService(session)
 
 
-def get_file_service() -> FileService:
-    """Dependency that provides a FileService instance."""
+def _build_file_service(
+    client: Any = None, url_cache: PresignedUrlCache | None = None
+) -> FileService:
     return FileService(
         s3_endpoint=settings.S3_ENDPOINT,
         access_key=settings.S3_ACCESS_KEY,
@@ -29,6 +41,77 @@ def get_file_service() -> FileService:
         bucket_name=settings.S3_BUCKET_NAME,
         upload_dir=settings.UPLOAD_DIR,
         results_dir=settings.RESULTS_DIR,
+        multipart_threshold=settings.S3_MULTIPART_THRESHOLD,
+        part_size=settings.S3_PART_SIZE,
+        upload_concurrency=settings.S3_UPLOAD_CONCURRENCY,
+        part_retries=settings.S3_PART_RETRIES,
+        client=client,
+        url_cache=url_cache,
+    )
+
+
+async def open_storage() -> None:
+    """Open the pooled S3 client shared by every ``get_file_service`` call.
+
+    The shared service also caches presigned URLs, in Redis too when
+    ``PRESIGNED_URL_CACHE_REDIS_URL`` is set.
+
+    Must run on the event loop that later uses the client: in the FastAPI
+    lifespan and once per Celery worker process. Does nothing if the client
+    is already open.
+    """
+    global _storage, _file_service
+    if _storage is not None:
+        return
+    stack = AsyncExitStack()
+    client = await stack.enter_async_context(
+        open_s3_client(
+            settings.S3_ENDPOINT,
+            settings.S3_ACCESS_KEY,
+            settings.S3_SECRET_KEY,
+            max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+        )
+    )
+    redis = None
+    if settings.PRESIGNED_URL_CACHE_REDIS_URL:
+        redis = aioredis.from_url(settings.PRESIGNED_URL_CACHE_REDIS_URL)
+        stack.push_async_callback(redis.aclose)
+    url_cache = PresignedUrlCache(
+        max_entries=settings.PRESIGNED_URL_CACHE_SIZE,
+        reuse_fraction=settings.PRESIGNED_URL_REUSE_FRACTION,
+        redis=redis,
+    )
+    _storage, _file_service = stack, _build_file_service(client, url_cache)
+
+
+async def close_storage() -> None:
+    """Close the shared S3 client and its connections."""
+    global _storage, _file_service
+    stack, _storage, _file_service = _storage, None, None
+    if stack is not None:
+        await stack.aclose()
+
+
+def get_file_service() -> FileService:
+    """Dependency that provides a FileService instance.
+
+    Returns the shared service once ``open_storage`` has run, and otherwise
+    a service that opens a client for each call.
+    """
+    return _file_service or _build_file_service()
+
+
+@lru_cache
+def get_resumable_upload_service() -> ResumableUploadService:
+    """Dependency that provides the process-wide ResumableUploadService.
+
+    The service keeps the running digests of the uploads this process
+    appends to, so it must outlive a single request.
+    """
+    return ResumableUploadService(
+        upload_dir=settings.UPLOAD_DIR,
+        chunk_max_bytes=settings.RESUMABLE_CHUNK_MAX_BYTES,
+        ttl_seconds=settings.RESUMABLE_UPLOAD_TTL_SECONDS,
     )
 
 
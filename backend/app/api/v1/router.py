@@ -1,15 +1,54 @@
 import uuid
 from pathlib import Path
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+)
 
-from backend.app.api.deps import get_file_service, get_task_service
+from backend.app.api.deps import (
+    get_file_service,
+    get_resumable_upload_service,
+    get_task_service,
+)
+from backend.app.core.config import settings
 from backend.app.core.security import verify_api_key
-from backend.app.models.task import Task, TaskStatus
-from backend.app.schemas.detection import DetectionResponse
-from backend.app.services.file import FileService
+from backend.app.models.task import ProcessingMode, Task, TaskStatus
+from backend.app.schemas.analytics import AnalyticsFormat, AnalyticsLinkResponse
+from backend.app.schemas.detection import (
+    ConfirmUploadRequest,
+    DetectionResponse,
+    ResumableUploadRequest,
+    ResumableUploadStatus,
+    RethresholdRequest,
+    UploadRequest,
+    UploadTicket,
+)
+from backend.app.services.dedupe import reuse_completed_result
+from backend.app.services.detection_cache import detections_key
+from backend.app.services.file import FileService, FileTooLargeError, SavedUpload
+from backend.app.services.report_files import analytics_key
+from backend.app.services.resumable import (
+    ChecksumMismatchError,
+    ChunkTooLargeError,
+    OffsetMismatchError,
+    ResumableUpload,
+    ResumableUploadError,
+    ResumableUploadService,
+    UploadBusyError,
+    UploadIncompleteError,
+    UploadNotFoundError,
+)
+from backend.app.services.staging import input_key
 from backend.app.services.task import TaskService
-from backend.app.worker import celery_process_video
+from backend.app.worker import celery_process_video, celery_rethreshold_video
 
 router = APIRouter(dependencies=[Depends(verify_api_key)])
 
@@ -31,7 +70,21 @@ def _validate_video_file(file: UploadFile) -> str:
     Raises:
         HTTPException: If the file format is not supported.
     """
-    filename = file.filename or "unknown.mp4"
+    return _validate_video_filename(file.filename or "unknown.mp4")
+
+
+def _validate_video_filename(filename: str) -> str:
+    """Validate a filename has a supported video extension.
+
+    Args:
+        filename: The client's filename.
+
+    Returns:
+        The validated file extension.
+
+    Raises:
+        HTTPException: If the file format is not supported.
+    """
     file_ext = Path(filename).suffix.lower()
 
     if not file_ext:
@@ -47,34 +100,402 @@ def _validate_video_file(file: UploadFile) -> str:
     return file_ext
 
 
+def _parse_task_id(task_id: str) -> uuid.UUID:
+    """Parse a task id path parameter.
+
+    Args:
+        task_id: The task id as given in the URL.
+
+    Returns:
+        The parsed UUID.
+
+    Raises:
+        HTTPException: If the id is not a valid UUID.
+    """
+    try:
+        return uuid.UUID(task_id)
+    except ValueError as err:
+        raise HTTPException(status_code=400, detail="Invalid UUID format") from err
+
+
 @router.post("/detect", response_model=DetectionResponse, status_code=202)
 async def detect(
     file: UploadFile = File(...),
+    mode: ProcessingMode = ProcessingMode.FULL,
+    raw_time_series: bool = False,
     task_service: TaskService = Depends(get_task_service),
     file_service: FileService = Depends(get_file_service),
 ) -> DetectionResponse:
     """Submit a video for traffic detection processing.
 
+    The video is passed on to the workers through object storage. For large
+    videos, prefer ``POST /uploads``, which bypasses the API server. A video
+    that was processed before with the same settings is not processed again;
+    its task completes at once with the earlier results.
+
     Args:
         file: The video file to process.
+        mode: ``full`` renders an annotated video; ``analytics_only`` produces
+            only the analytics report.
+        raw_time_series: Also keep the per-frame time series, downloadable
+            as Parquet. By default the report only carries counts
+            aggregated into time buckets.
         task_service: Service for task management.
         file_service: Service for file operations.
 
     Returns:
         Response containing task ID and initial status.
+
+    Raises:
+        HTTPException: If the file format is not supported or the file is
+            larger than ``UPLOAD_MAX_BYTES``.
     """
     original_filename = file.filename or "unknown.mp4"
     file_ext = _validate_video_file(file)
 
-    task = await task_service.create_task(original_filename)
+    task = await task_service.create_task(original_filename, mode, raw_time_series)
+
+    try:
+        saved = await file_service.save_upload_locally(
+            file, f"{task.id}{file_ext}", settings.UPLOAD_MAX_BYTES
+        )
+    except FileTooLargeError as e:
+        await task_service.mark_failed(task, str(e))
+        raise HTTPException(status_code=413, detail=str(e)) from e
+    await _submit_local_video(
+        task, saved, file_ext, mode, raw_time_series, task_service, file_service
+    )
+
+    return DetectionResponse(task_id=str(task.id), status=task.status)
+
+
+async def _submit_local_video(
+    task: Task,
+    saved: SavedUpload,
+    file_ext: str,
+    mode: ProcessingMode,
+    raw_time_series: bool,
+    task_service: TaskService,
+    file_service: FileService,
+) -> None:
+    """Complete or queue the task of a video received by the API.
+
+    A video whose results already exist completes the task with them (see
+    ``services.dedupe``); any other is moved to storage and queued.
+
+    Args:
+        task: The task created for the video.
+        saved: The video in the upload directory; removed afterwards.
+        file_ext: Extension of the video.
+        mode: Processing mode of the task.
+        raw_time_series: Whether to include raw time-series data.
+        task_service: Service for task management.
+        file_service: Service for file operations.
+    """
+    key = input_key(str(task.id), file_ext)
+    try:
+        if saved.sha256 and await reuse_completed_result(
+            task_service, task, saved.sha256
+        ):
+            return
+        await file_service.upload_file_to_s3(saved.path, key)
+    finally:
+        await file_service.cleanup_local_file(saved.path)
+
+    celery_process_video.delay(str(task.id), key, mode, raw_time_series)
+
+
+# Status codes of resumable upload errors.
+_RESUMABLE_ERROR_STATUS: dict[type[ResumableUploadError], int] = {
+    UploadNotFoundError: 404,
+    UploadBusyError: 409,
+    OffsetMismatchError: 409,
+    UploadIncompleteError: 409,
+    ChunkTooLargeError: 413,
+    ChecksumMismatchError: 422,
+}
+
+
+def _resumable_http_error(error: ResumableUploadError) -> HTTPException:
+    """Map a resumable upload error to an HTTP error."""
+    status_code = _RESUMABLE_ERROR_STATUS.get(type(error), 400)
+    headers = None
+    if isinstance(error, OffsetMismatchError):
+        headers = {"Upload-Offset": str(error.offset)}
+    return HTTPException(status_code=status_code, detail=str(error), headers=headers)
+
+
+def _resumable_status(
+    upload: ResumableUpload, offset: int, uploads: ResumableUploadService
+) -> ResumableUploadStatus:
+    return ResumableUploadStatus(
+        upload_id=str(upload.upload_id),
+        offset=offset,
+        size=upload.size,
+        chunk_max_bytes=uploads.chunk_max_bytes,
+    )
+
+
+@router.post(
+    "/resumable-uploads", response_model=ResumableUploadStatus, status_code=201
+)
+async def create_resumable_upload(
+    request: ResumableUploadRequest,
+    uploads: ResumableUploadService = Depends(get_resumable_upload_service),
+) -> ResumableUploadStatus:
+    """Start a resumable upload of a video.
+
+    The video is then sent in chunks with ``PATCH /resumable-uploads/{id}``
+    and submitted with ``POST /resumable-uploads/{id}/complete``. An
+    interrupted upload continues from the offset reported by
+    ``GET /resumable-uploads/{id}``. Uploads without activity for
+    ``RESUMABLE_UPLOAD_TTL_SECONDS`` are deleted.
+
+    Args:
+        request: Name and size of the video and the processing options, as
+            for ``POST /detect``.
+        uploads: Service for resumable uploads.
+
+    Returns:
+        The new upload at offset 0.
+
+    Raises:
+        HTTPException: If the file format is not supported or the file is
+            larger than ``UPLOAD_MAX_BYTES``.
+    """
+    _validate_video_filename(request.filename)
+    if request.size > settings.UPLOAD_MAX_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File exceeds {settings.UPLOAD_MAX_BYTES} bytes",
+        )
+
+    upload = await uploads.create(ResumableUpload(**request.model_dump()))
+    return _resumable_status(upload, 0, uploads)
+
+
+@router.get("/resumable-uploads/{upload_id}", response_model=ResumableUploadStatus)
+async def get_resumable_upload(
+    upload_id: str,
+    uploads: ResumableUploadService = Depends(get_resumable_upload_service),
+) -> ResumableUploadStatus:
+    """Get the offset at which a resumable upload continues.
+
+    Args:
+        upload_id: The upload id.
+        uploads: Service for resumable uploads.
+
+    Returns:
+        The upload's progress.
+
+    Raises:
+        HTTPException: If upload_id is invalid or the upload is not found.
+    """
+    try:
+        upload, offset = await uploads.get(_parse_task_id(upload_id))
+    except ResumableUploadError as e:
+        raise _resumable_http_error(e) from e
+    return _resumable_status(upload, offset, uploads)
+
+
+@router.patch("/resumable-uploads/{upload_id}", response_model=ResumableUploadStatus)
+async def append_resumable_upload(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset"),
+    chunk_sha256: str = Header(..., alias="X-Chunk-SHA256"),
+    uploads: ResumableUploadService = Depends(get_resumable_upload_service),
+) -> ResumableUploadStatus:
+    """Append a chunk, sent as the raw request body, to a resumable upload.
+
+    Args:
+        upload_id: The upload id.
+        request: The request whose body is the chunk.
+        upload_offset: Offset of the chunk's first byte; must be the
+            upload's current offset.
+        chunk_sha256: Hex SHA-256 digest of the chunk.
+        uploads: Service for resumable uploads.
+
+    Returns:
+        The upload's progress after the chunk.
+
+    Raises:
+        HTTPException: If upload_id is invalid, the upload is not found or
+            busy, the offset is not the current one (the response's
+            ``Upload-Offset`` header carries the right one), the chunk is
+            too large or does not match its digest.
+    """
+    uuid_obj = _parse_task_id(upload_id)
+    try:
+        offset = await uploads.append(
+            uuid_obj, upload_offset, request.stream(), chunk_sha256
+        )
+        upload, _ = await uploads.get(uuid_obj)
+    except ResumableUploadError as e:
+        raise _resumable_http_error(e) from e
+    return _resumable_status(upload, offset, uploads)
+
+
+@router.delete("/resumable-uploads/{upload_id}", status_code=204)
+async def abort_resumable_upload(
+    upload_id: str,
+    uploads: ResumableUploadService = Depends(get_resumable_upload_service),
+) -> Response:
+    """Abort a resumable upload and delete its data.
+
+    Args:
+        upload_id: The upload id.
+        uploads: Service for resumable uploads.
+
+    Raises:
+        HTTPException: If upload_id is invalid or the upload is not found.
+    """
+    try:
+        await uploads.abort(_parse_task_id(upload_id))
+    except ResumableUploadError as e:
+        raise _resumable_http_error(e) from e
+    return Response(status_code=204)
+
+
+@router.post(
+    "/resumable-uploads/{upload_id}/complete",
+    response_model=DetectionResponse,
+    status_code=202,
+)
+async def complete_resumable_upload(
+    upload_id: str,
+    uploads: ResumableUploadService = Depends(get_resumable_upload_service),
+    task_service: TaskService = Depends(get_task_service),
+    file_service: FileService = Depends(get_file_service),
+) -> DetectionResponse:
+    """Submit a fully received resumable upload for processing.
+
+    Args:
+        upload_id: The upload id.
+        uploads: Service for resumable uploads.
+        task_service: Service for task management.
+        file_service: Service for file operations.
+
+    Returns:
+        Response containing task ID and initial status.
+
+    Raises:
+        HTTPException: If upload_id is invalid, the upload is not found,
+            busy or missing bytes.
+    """
+    uuid_obj = _parse_task_id(upload_id)
+    try:
+        upload, _ = await uploads.get(uuid_obj)
+        file_ext = _validate_video_filename(upload.filename)
+        local_path = str(Path(settings.UPLOAD_DIR) / f"{uuid_obj}{file_ext}")
+        upload = await uploads.complete(uuid_obj, local_path)
+    except ResumableUploadError as e:
+        raise _resumable_http_error(e) from e
+    saved = SavedUpload(path=local_path, size=upload.size, sha256=upload.sha256)
+
+    task = await task_service.create_task(
+        upload.filename, upload.mode, upload.raw_time_series
+    )
+    await _submit_local_video(
+        task,
+        saved,
+        file_ext,
+        upload.mode,
+        upload.raw_time_series,
+        task_service,
+        file_service,
+    )
+
+    return DetectionResponse(task_id=str(task.id), status=task.status)
+
+
+@router.post("/uploads", response_model=UploadTicket, status_code=201)
+async def create_upload(
+    request: UploadRequest,
+    file_service: FileService = Depends(get_file_service),
+) -> UploadTicket:
+    """Create a presigned POST for uploading a video straight to storage.
+
+    The video does not pass through the API server. After uploading it,
+    the client starts processing with ``POST /uploads/{upload_id}/confirm``.
+
+    Args:
+        request: Name of the file to upload.
+        file_service: Service for file operations.
+
+    Returns:
+        The upload id and the presigned POST.
+
+    Raises:
+        HTTPException: If the file format is not supported or the POST
+            cannot be generated.
+    """
+    file_ext = _validate_video_filename(request.filename)
+    upload_id = uuid.uuid4()
 
-    input_filename = f"{task.id}{file_ext}"
-    output_filename = f"{task.id}.mp4"
+    post = await file_service.generate_presigned_post(
+        input_key(str(upload_id), file_ext),
+        settings.UPLOAD_MAX_BYTES,
+        settings.DIRECT_UPLOAD_EXPIRATION,
+    )
+    if not post:
+        raise HTTPException(status_code=503, detail="Could not create upload")
 
-    input_path = await file_service.save_upload_locally(file, input_filename)
-    output_path = file_service.get_result_path_local(output_filename)
+    return UploadTicket(
+        upload_id=str(upload_id),
+        url=post["url"],
+        fields=post["fields"],
+        expires_in=settings.DIRECT_UPLOAD_EXPIRATION,
+        max_bytes=settings.UPLOAD_MAX_BYTES,
+    )
 
-    celery_process_video.delay(str(task.id), input_path, output_path)
+
+@router.post(
+    "/uploads/{upload_id}/confirm", response_model=DetectionResponse, status_code=202
+)
+async def confirm_upload(
+    upload_id: str,
+    request: ConfirmUploadRequest,
+    task_service: TaskService = Depends(get_task_service),
+    file_service: FileService = Depends(get_file_service),
+) -> DetectionResponse:
+    """Submit a video uploaded through ``POST /uploads`` for processing.
+
+    The worker reads the video from storage. Confirming an upload again
+    returns its existing task instead of processing the video twice.
+
+    Args:
+        upload_id: The id returned by ``POST /uploads``.
+        request: The uploaded file's name and the processing options, as
+            for ``POST /detect``.
+        task_service: Service for task management.
+        file_service: Service for file operations.
+
+    Returns:
+        Response containing task ID and initial status.
+
+    Raises:
+        HTTPException: If upload_id is invalid, the file format is not
+            supported or the upload is not in storage.
+    """
+    file_ext = _validate_video_filename(request.filename)
+    upload_uuid = _parse_task_id(upload_id)
+    # The first task may already have processed and deleted the object.
+    task = await task_service.get_task_by_upload(upload_uuid)
+    if task is not None:
+        return DetectionResponse(task_id=str(task.id), status=task.status)
+
+    key = input_key(str(upload_uuid), file_ext)
+    if await file_service.object_size(key) is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+
+    task, created = await task_service.create_upload_task(
+        upload_uuid, request.filename, request.mode, request.raw_time_series
+    )
+    if created:
+        celery_process_video.delay(
+            str(task.id), key, request.mode, request.raw_time_series
+        )
 
     return DetectionResponse(task_id=str(task.id), status=task.status)
 
@@ -98,12 +519,7 @@ async def status(
     Raises:
         HTTPException: If task_id is invalid or task not found.
     """
-    try:
-        uuid_obj = uuid.UUID(task_id)
-    except ValueError as err:
-        raise HTTPException(status_code=400, detail="Invalid UUID format") from err
-
-    task = await task_service.get_task(uuid_obj)
+    task = await task_service.get_task(_parse_task_id(task_id))
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
 
@@ -112,3 +528,125 @@ async def status(
         task.result_url = presigned_url
 
     return task
+
+
+@router.get("/analytics/{task_id}", response_model=AnalyticsLinkResponse)
+async def analytics(
+    task_id: str,
+    fmt: AnalyticsFormat = Query(AnalyticsFormat.JSON, alias="format"),
+    task_service: TaskService = Depends(get_task_service),
+    file_service: FileService = Depends(get_file_service),
+) -> AnalyticsLinkResponse:
+    """Get a download link for a completed task's analytics.
+
+    Args:
+        task_id: The UUID of the task.
+        fmt: ``json`` for the summary report with time buckets, ``parquet``
+            for the per-frame time series (columns ``frame_id``,
+            ``timestamp`` and one count column per class), which only tasks
+            submitted with ``raw_time_series`` have.
+        task_service: Service for task management.
+        file_service: Service for file operations.
+
+    Returns:
+        A presigned URL for the requested file.
+
+    Raises:
+        HTTPException: If task_id is invalid, the task or the requested file
+            is not found, the task is not completed, or the link cannot be
+            generated.
+    """
+    uuid_obj = _parse_task_id(task_id)
+    task = await task_service.get_task(uuid_obj)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    if task.status != TaskStatus.COMPLETED:
+        raise HTTPException(status_code=409, detail="Task is not completed")
+    if fmt == AnalyticsFormat.PARQUET and not task.raw_time_series:
+        raise HTTPException(
+            status_code=404, detail="Per-frame time series was not requested"
+        )
+
+    # Deduplicated tasks link to the analytics of the task they reuse.
+    report_task_id = task.source_task_id or uuid_obj
+    url = await file_service.generate_presigned_url(
+        analytics_key(report_task_id, f".{fmt}")
+    )
+    if not url:
+        raise HTTPException(status_code=503, detail="Could not create download link")
+
+    return AnalyticsLinkResponse(task_id=task_id, format=fmt, url=url)
+
+
+@router.post(
+    "/rethreshold/{task_id}", response_model=DetectionResponse, status_code=202
+)
+async def rethreshold(
+    task_id: str,
+    request: RethresholdRequest,
+    task_service: TaskService = Depends(get_task_service),
+    file_service: FileService = Depends(get_file_service),
+) -> DetectionResponse:
+    """Rebuild a completed task's results at another confidence threshold.
+
+    The raw detections kept when the video was processed are filtered at
+    the new threshold, so the model does not run again. The results belong
+    to a new task, which is polled like any other.
+
+    Args:
+        task_id: The UUID of the completed task.
+        request: The new threshold, whether to render the annotated video
+            again and whether to keep the per-frame time series.
+        task_service: Service for task management.
+        file_service: Service for file operations.
+
+    Returns:
+        Response containing the new task's ID and initial status.
+
+    Raises:
+        HTTPException: If task_id is invalid, the task is not found or not
+            completed, no detections were kept for its video and the
+            current model, the threshold is below the one they were kept
+            from, or the video to render is not stored.
+    """
+    task = await task_service.get_task(_parse_task_id(task_id))
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    if task.status != TaskStatus.COMPLETED:
+        raise HTTPException(status_code=409, detail="Task is not completed")
+    if request.conf < settings.DETECTION_CACHE_MIN_CONF:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Detections are kept from {settings.DETECTION_CACHE_MIN_CONF}",
+        )
+
+    # Deduplicated tasks have the video and detections of the task they reuse.
+    origin = task
+    if task.source_task_id is not None:
+        origin = await task_service.get_task(task.source_task_id) or task
+    key = detections_key(origin.content_hash) if origin.content_hash else None
+    if key is None or await file_service.object_size(key) is None:
+        raise HTTPException(
+            status_code=404, detail="No detections were kept for this video"
+        )
+    if request.render_video and not origin.input_key:
+        raise HTTPException(status_code=409, detail="The input video is not stored")
+
+    mode = (
+        ProcessingMode.FULL if request.render_video else ProcessingMode.ANALYTICS_ONLY
+    )
+    new_task = await task_service.create_task(
+        task.input_filename, mode, request.raw_time_series
+    )
+    # The new task points at the same video, so it can be re-thresholded too.
+    await task_service.record_input(new_task, origin.input_key, origin.content_hash)
+    celery_rethreshold_video.delay(
+        str(new_task.id),
+        key,
+        request.conf,
+        mode,
+        request.raw_time_series,
+        origin.input_key if request.render_video else None,
+    )
+
+    return DetectionResponse(task_id=str(new_task.id), status=new_task.status)
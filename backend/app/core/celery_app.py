@@ -18,6 +18,10 @@ celery_app.conf.update(
     timezone="UTC",
     enable_utc=True,
     task_acks_late=True,
-    worker_prefetch_multiplier=1,
+    # Reserve one task beyond those running, so that its input can be
+    # prefetched while the current task is processed.
+    worker_prefetch_multiplier=settings.WORKER_PREFETCH_MULTIPLIER,
     broker_connection_retry_on_startup=True,
+    # Pool processes load and warm up the YOLO model before reporting ready.
+    worker_proc_alive_timeout=settings.WORKER_PROC_ALIVE_TIMEOUT,
 )
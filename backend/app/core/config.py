@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -13,11 +14,39 @@ class Settings(BaseSettings):
     DATABASE_SSL_REQUIRED: bool = False
 
     MODEL_PATH: str = "yolov8n.pt"
+    INFERENCE_BACKEND: Literal["torch", "onnx", "onnx_int8", "openvino"] = "torch"
+    INFERENCE_IMGSZ: int = 640
+    MODEL_CACHE_DIR: str = "data/model_cache"
+    CALIBRATION_DIR: str = "data/calibration"
+    CALIBRATION_FRAMES: int = 64
+    INFERENCE_BATCH_SIZE: int = 1
+    INFERENCE_STRIDE: int = 1
+    MOTION_GATE_ENABLED: bool = False
+    MOTION_THRESHOLD: float = 0.002
+    PIPELINE_ENABLED: bool = False
+    PIPELINE_QUEUE_DEPTH: int = 8
+    VIDEO_ENCODER: Literal["ffmpeg_pipe", "opencv"] = "ffmpeg_pipe"
+    SEGMENT_WORKERS: int = 1
+    SEGMENT_MIN_SECONDS: float = 60.0
+    TIME_BUCKET_SECONDS: float = 60.0
+    DETECTION_CONF: float = 0.25
+    DETECTION_CACHE_ENABLED: bool = False
+    DETECTION_CACHE_MIN_CONF: float = 0.05
+    DEDUPE_ENABLED: bool = True
 
     S3_BUCKET_NAME: str
     S3_ENDPOINT: str
     S3_ACCESS_KEY: str
     S3_SECRET_KEY: str
+    S3_MULTIPART_THRESHOLD: int = 64 * 1024 * 1024
+    S3_PART_SIZE: int = 16 * 1024 * 1024
+    S3_UPLOAD_CONCURRENCY: int = 4
+    S3_PART_RETRIES: int = 3
+    S3_MAX_POOL_CONNECTIONS: int = 32
+    PRESIGNED_URL_CACHE_SIZE: int = 4096
+    PRESIGNED_URL_REUSE_FRACTION: float = 0.5
+    PRESIGNED_URL_CACHE_REDIS_URL: str | None = None
+    DIRECT_UPLOAD_EXPIRATION: int = 3600
 
     GCS_BUCKET_NAME: str
 
@@ -25,6 +54,11 @@ class Settings(BaseSettings):
 
     CELERY_BROKER_URL: str
     CELERY_RESULT_BACKEND: str | None = None
+    WORKER_PROC_ALIVE_TIMEOUT: float = 120.0
+    WORKER_PREFETCH_MULTIPLIER: int = 2
+    WORKER_SCRATCH_DIR: str = "data/scratch"
+    INPUT_PREFETCH_ENABLED: bool = True
+    INPUT_PREFETCH_WAIT_SECONDS: float = 600.0
     LOKI_URL: str | None = None
     LOKI_USERNAME: str | None = None
     LOKI_PASSWORD: str | None = None
@@ -35,6 +69,10 @@ class Settings(BaseSettings):
     UI_PASSWORD: str
 
     UPLOAD_DIR: str = "data/uploads"
+    UPLOAD_MAX_BYTES: int = 10 * 1024 * 1024 * 1024
+    RESUMABLE_CHUNK_MAX_BYTES: int = 16 * 1024 * 1024
+    RESUMABLE_UPLOAD_TTL_SECONDS: float = 24 * 3600
+    RESUMABLE_UPLOAD_GC_INTERVAL_SECONDS: float = 3600
     RESULTS_DIR: str = "data/results"
 
     model_config = SettingsConfigDict(
@@ -1,9 +1,15 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 
 from asgi_correlation_id import CorrelationIdMiddleware
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 
+from backend.app.api.deps import (
+    close_storage,
+    get_resumable_upload_service,
+    open_storage,
+)
 from backend.app.api.v1.router import router
 from backend.app.core.config import init_directories, settings
 from backend.app.core.db import init_db
@@ -27,9 +33,21 @@ async def lifespan(_: FastAPI):
     except Exception as e:
         logger.error("db_failed", error=str(e))
 
-    yield
-
-    logger.info("shutdown", message="Shutting down...")
+    await open_storage()
+    upload_gc = asyncio.create_task(
+        get_resumable_upload_service().run_garbage_collector(
+            settings.RESUMABLE_UPLOAD_GC_INTERVAL_SECONDS
+        )
+    )
+    try:
+        yield
+    finally:
+        logger.info("shutdown", message="Shutting down...")
+        upload_gc.cancel()
+        # Let a collection pass in progress finish before shutting down.
+        with suppress(asyncio.CancelledError):
+            await upload_gc
+        await close_storage()
 
 
 app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
@@ -14,6 +14,13 @@ class TaskStatus(StrEnum):
     FAILED = "failed"
 
 
+class ProcessingMode(StrEnum):
+    """Enumeration of video processing modes."""
+
+    FULL = "full"
+    ANALYTICS_ONLY = "analytics_only"
+
+
 class Task(SQLModel, table=True):
     """Database model representing a video processing task."""
 
@@ -22,8 +29,22 @@ class Task(SQLModel, table=True):
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
 
     status: TaskStatus = Field(default=TaskStatus.QUEUED)
+    mode: ProcessingMode = Field(default=ProcessingMode.FULL)
+    raw_time_series: bool = Field(default=False)
     input_filename: str
 
+    # SHA-256 of the input video and of that plus the processing settings
+    # (see ``services.dedupe``); set for uploads that pass through the API.
+    content_hash: str | None = Field(default=None, index=True)
+    dedupe_key: str | None = None
+    # Earlier task whose results this task reuses instead of its own.
+    source_task_id: uuid.UUID | None = None
+    # Object storage key of the input video, once a worker has picked it up.
+    input_key: str | None = None
+    # Direct upload (``POST /uploads``) the task was confirmed from; one task
+    # per upload.
+    upload_id: uuid.UUID | None = Field(default=None, unique=True, index=True)
+
     result_url: str | None = None
     error_message: str | None = None
 
@@ -1,5 +1,7 @@
 """Analytics schemas for video processing reports."""
 
+from enum import StrEnum
+
 from pydantic import BaseModel, ConfigDict
 
 
@@ -11,6 +13,21 @@ class FrameDetection(BaseModel):
     objects: dict[str, int]
 
 
+class TimeBucket(BaseModel):
+    """Per-class detection statistics over one time bucket of the video.
+
+    ``max``, ``mean`` and ``sum`` are taken over the per-frame counts of
+    the bucket's frames; classes without detections in the bucket are
+    omitted.
+    """
+
+    start: float
+    frames: int
+    max: dict[str, int]
+    mean: dict[str, float]
+    sum: dict[str, int]
+
+
 class VideoMeta(BaseModel):
     """Metadata about the processed video."""
 
@@ -28,6 +45,7 @@ class AnalysisSummary(BaseModel):
     unique_classes: list[str]
     dominant_class: str | None
     class_distribution: dict[str, int]
+    skipped_frames_ratio: float = 0.0
 
 
 class AnalyticsReport(BaseModel):
@@ -36,5 +54,22 @@ class AnalyticsReport(BaseModel):
     meta: VideoMeta
     summary: AnalysisSummary
     time_series: list[FrameDetection]
+    bucket_seconds: float | None = None
+    time_buckets: list[TimeBucket] = []
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class AnalyticsFormat(StrEnum):
+    """Downloadable forms of a task's analytics."""
+
+    JSON = "json"
+    PARQUET = "parquet"
+
+
+class AnalyticsLinkResponse(BaseModel):
+    """Download link for a task's analytics in the requested form."""
+
+    task_id: str
+    format: AnalyticsFormat
+    url: str
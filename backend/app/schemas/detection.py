@@ -1,6 +1,8 @@
 """Detection endpoint response schemas."""
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from backend.app.models.task import ProcessingMode
 
 
 class DetectionResponse(BaseModel):
@@ -8,3 +10,60 @@ class DetectionResponse(BaseModel):
 
     task_id: str
     status: str
+
+
+class UploadRequest(BaseModel):
+    """Request for a direct upload of a video to object storage."""
+
+    filename: str
+
+
+class UploadTicket(BaseModel):
+    """Presigned POST the client uses to upload a video to object storage.
+
+    The video is sent as the ``file`` field of a multipart form posted to
+    ``url``, after all of ``fields``.
+    """
+
+    upload_id: str
+    url: str
+    fields: dict[str, str]
+    expires_in: int
+    max_bytes: int
+
+
+class ResumableUploadRequest(BaseModel):
+    """Request to start a resumable upload."""
+
+    filename: str
+    size: int = Field(gt=0)
+    mode: ProcessingMode = ProcessingMode.FULL
+    raw_time_series: bool = False
+
+
+class ResumableUploadStatus(BaseModel):
+    """Progress of a resumable upload.
+
+    Chunks are sent with ``PATCH`` and must start at ``offset``.
+    """
+
+    upload_id: str
+    offset: int
+    size: int
+    chunk_max_bytes: int
+
+
+class ConfirmUploadRequest(BaseModel):
+    """Request to process a video uploaded directly to object storage."""
+
+    filename: str
+    mode: ProcessingMode = ProcessingMode.FULL
+    raw_time_series: bool = False
+
+
+class RethresholdRequest(BaseModel):
+    """Request to rebuild a task's results at another confidence threshold."""
+
+    conf: float = Field(gt=0, le=1)
+    render_video: bool = False
+    raw_time_series: bool = False
@@ -0,0 +1,124 @@
+"""Reuse of completed results for videos that were processed before.
+
+Uploads passing through the API are hashed with SHA-256 while they are
+written to disk. The digest, combined with the settings that shape the
+results, is a task's dedupe key: a new task whose key matches a completed
+task is completed straight away with that task's result and analytics
+objects instead of being processed again.
+
+Every lookup is logged as a ``dedupe_lookup`` event carrying ``hit`` and
+the process's running hit rate, from which dashboards derive the dedupe
+hit rate.
+"""
+
+import hashlib
+import json
+
+from fastapi.concurrency import run_in_threadpool
+
+from backend.app.core.config import settings
+from backend.app.core.logger import get_logger
+from backend.app.models.task import ProcessingMode, Task
+from backend.app.services.detection_cache import detection_settings
+from backend.app.services.task import TaskService
+
+logger = get_logger(__name__)
+
+
+def dedupe_key(content_hash: str, mode: ProcessingMode) -> str:
+    """Return the key under which a video's results can be reused.
+
+    Besides the video and processing mode, the key covers the model, its
+    backend and input size, the confidence threshold, stride, motion gate
+    and time bucket size, so results are only shared between tasks that
+    would have produced the same ones.
+
+    Args:
+        content_hash: Hex SHA-256 digest of the video.
+        mode: Processing mode of the task.
+
+    Returns:
+        Hex SHA-256 digest of the video and the processing settings.
+    """
+    params = {
+        **detection_settings(),
+        "content_hash": content_hash,
+        "mode": str(mode),
+        "conf": settings.DETECTION_CONF,
+        "time_bucket_seconds": settings.TIME_BUCKET_SECONDS,
+    }
+    encoded = json.dumps(params, sort_keys=True).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+async def file_sha256(path: str) -> str:
+    """Return the hex SHA-256 digest of a file, hashed in a worker thread."""
+
+    def digest() -> str:
+        with open(path, "rb") as f:
+            return hashlib.file_digest(f, "sha256").hexdigest()
+
+    return await run_in_threadpool(digest)
+
+
+class DedupeStats:
+    """Running count of dedupe lookups and hits in this process."""
+
+    def __init__(self) -> None:
+        """Initialize the counters at zero."""
+        self.lookups = 0
+        self.hits = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of lookups that found a reusable result."""
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def record(self, hit: bool) -> None:
+        """Count a lookup and log it.
+
+        Args:
+            hit: Whether the lookup found a reusable result.
+        """
+        self.lookups += 1
+        self.hits += hit
+        logger.info(
+            "dedupe_lookup",
+            hit=hit,
+            lookups=self.lookups,
+            hits=self.hits,
+            hit_rate=round(self.hit_rate, 4),
+        )
+
+
+dedupe_stats = DedupeStats()
+
+
+async def reuse_completed_result(
+    task_service: TaskService, task: Task, content_hash: str
+) -> bool:
+    """Record a new task's content and reuse an earlier result if possible.
+
+    Args:
+        task_service: Service for task management.
+        task: The new, queued task.
+        content_hash: Hex SHA-256 digest of the task's video.
+
+    Returns:
+        True if the task was completed with an earlier task's result and
+        needs no processing.
+    """
+    key = dedupe_key(content_hash, task.mode)
+    source = await task_service.deduplicate(
+        task, content_hash, key, reuse=settings.DEDUPE_ENABLED
+    )
+    if not settings.DEDUPE_ENABLED:
+        return False
+
+    dedupe_stats.record(source is not None)
+    if source is None:
+        return False
+    logger.info(
+        "task_deduplicated", task_id=str(task.id), source_task_id=str(source.id)
+    )
+    return True
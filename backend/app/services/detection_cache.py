@@ -0,0 +1,327 @@
+"""Raw per-frame detections kept to rebuild results without inference.
+
+While a video is processed, every frame's detections (boxes, confidences
+and class ids) are streamed to a zstd-compressed Parquet file with one row
+per detection, about 26 bytes per box before compression. Frames without
+detections have no rows. The model runs at ``DETECTION_CACHE_MIN_CONF``
+or the task's threshold, whichever is lower, and the task itself only
+sees detections at its own threshold. Filtering the cached detections at
+any threshold from that floor up therefore gives the result a run at that
+threshold would have produced, without running the model again.
+
+Caches are stored under ``detections_key``, which depends on the video's
+content hash and on the settings that shape detections, so every video
+and model has one cache that all of the video's tasks share.
+
+Caching is off unless ``DETECTION_CACHE_ENABLED`` is set. It makes every
+run dearer: the model keeps the boxes down to the floor threshold, which
+adds NMS and box propagation work, and videos uploaded straight to storage are
+hashed by the worker, which reads them once more.
+"""
+
+import hashlib
+import json
+from collections.abc import Iterator
+from pathlib import Path
+from types import TracebackType
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import supervision as sv
+
+from backend.app.core.config import settings
+
+FRAME_ID_COLUMN = "frame_id"
+BOX_COLUMNS = ("x1", "y1", "x2", "y2")
+CONFIDENCE_COLUMN = "confidence"
+CLASS_ID_COLUMN = "class_id"
+
+# Schema metadata keys: video and model details, written when the file is
+# opened, and the frame count and skipped ratio, written when it is closed.
+META_KEY = b"detection_cache"
+FRAMES_KEY = b"frames"
+SKIPPED_RATIO_KEY = b"skipped_frames_ratio"
+
+SCHEMA = pa.schema(
+    [pa.field(FRAME_ID_COLUMN, pa.int32())]
+    + [pa.field(name, pa.float32()) for name in BOX_COLUMNS]
+    + [
+        pa.field(CONFIDENCE_COLUMN, pa.float32()),
+        pa.field(CLASS_ID_COLUMN, pa.int16()),
+    ]
+)
+
+
+def detection_settings() -> dict[str, object]:
+    """Return the settings that determine a video's raw detections."""
+    return {
+        "model_path": settings.MODEL_PATH,
+        "backend": settings.INFERENCE_BACKEND,
+        "imgsz": settings.INFERENCE_IMGSZ,
+        "stride": settings.INFERENCE_STRIDE,
+        "motion_gate": settings.MOTION_GATE_ENABLED,
+        "motion_threshold": settings.MOTION_THRESHOLD,
+    }
+
+
+def detections_key(content_hash: str) -> str:
+    """Return the object storage key of a video's detection cache.
+
+    Args:
+        content_hash: Hex SHA-256 digest of the video.
+
+    Returns:
+        The storage key, specific to the video, the model and the other
+        settings of ``detection_settings`` and the cache's threshold.
+    """
+    params = {**detection_settings(), "min_conf": settings.DETECTION_CACHE_MIN_CONF}
+    encoded = json.dumps(params, sort_keys=True).encode()
+    model = hashlib.sha256(encoded).hexdigest()[:16]
+    return f"detections/{content_hash}/{model}.parquet"
+
+
+def detection_cache_path(output_path: str) -> str:
+    """Return the local detection cache path belonging to an output path."""
+    return str(Path(output_path).with_suffix(".detections.parquet"))
+
+
+def inference_conf(conf: float) -> float:
+    """Return the threshold to run the model at when detections are cached."""
+    return min(conf, settings.DETECTION_CACHE_MIN_CONF)
+
+
+class DetectionCacheWriter:
+    """Stream raw detections to a Parquet file in row groups.
+
+    Detections are buffered and written out as a row group once at least
+    ``chunk_rows`` have accumulated. A frame's detections always end up in
+    the same row group, so readers can go group by group.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        names: dict[int, str],
+        video_info: sv.VideoInfo,
+        source_filename: str,
+        min_conf: float,
+        chunk_rows: int = 65536,
+    ) -> None:
+        """Open the Parquet file.
+
+        Args:
+            path: Output path.
+            names: Class names by class id.
+            video_info: Information about the processed video.
+            source_filename: Name of the processed video.
+            min_conf: Threshold the detections were produced at.
+            chunk_rows: Detections buffered per row group.
+        """
+        self.path = path
+        self.frames = 0
+        self.skipped_frames_ratio = 0.0
+        self.chunk_rows = chunk_rows
+        self._parts: list[tuple[int, sv.Detections]] = []
+        self._rows = 0
+
+        meta = {
+            "names": [names[i] for i in range(len(names))],
+            "fps": video_info.fps,
+            "width": video_info.width,
+            "height": video_info.height,
+            "total_frames": video_info.total_frames,
+            "source_filename": source_filename,
+            "min_conf": min_conf,
+        }
+        schema = SCHEMA.with_metadata({META_KEY: json.dumps(meta)})
+        self._writer = pq.ParquetWriter(path, schema, compression="zstd")
+
+    def add(self, frame_id: int, detections: sv.Detections) -> None:
+        """Record the detections of a frame.
+
+        Args:
+            frame_id: Frame index; must increase from call to call.
+            detections: All detections of the frame.
+        """
+        self.frames = frame_id + 1
+        if not len(detections):
+            return
+        self._parts.append((frame_id, detections))
+        self._rows += len(detections)
+        if self._rows >= self.chunk_rows:
+            self._flush()
+
+    def close(self) -> None:
+        """Write the remaining rows and the frame count and close the file."""
+        self._flush()
+        self._writer.add_key_value_metadata(
+            {
+                FRAMES_KEY: str(self.frames),
+                SKIPPED_RATIO_KEY: str(self.skipped_frames_ratio),
+            }
+        )
+        self._writer.close()
+
+    def __enter__(self) -> "DetectionCacheWriter":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def _flush(self) -> None:
+        if not self._parts:
+            return
+        frame_ids = np.concatenate(
+            [np.full(len(d), i, dtype=np.int32) for i, d in self._parts]
+        )
+        xyxy = np.concatenate([d.xyxy for _, d in self._parts]).astype(np.float32)
+        arrays = [pa.array(frame_ids)]
+        arrays += [pa.array(xyxy[:, i]) for i in range(4)]
+        arrays += [
+            pa.array(
+                np.concatenate([_confidence(d) for _, d in self._parts]),
+                type=pa.float32(),
+            ),
+            pa.array(
+                np.concatenate([_class_id(d) for _, d in self._parts]),
+                type=pa.int16(),
+            ),
+        ]
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=SCHEMA))
+        self._parts = []
+        self._rows = 0
+
+
+def _confidence(detections: sv.Detections) -> np.ndarray:
+    if detections.confidence is None:
+        return np.ones(len(detections), dtype=np.float32)
+    return detections.confidence
+
+
+def _class_id(detections: sv.Detections) -> np.ndarray:
+    if detections.class_id is None:
+        return np.zeros(len(detections), dtype=np.int16)
+    return detections.class_id
+
+
+class DetectionCache:
+    """Read access to a detection cache written by ``DetectionCacheWriter``."""
+
+    def __init__(self, path: str) -> None:
+        """Open the file and read its metadata.
+
+        Args:
+            path: Path of the cache.
+        """
+        self._file = pq.ParquetFile(path)
+        metadata = self._file.metadata.metadata or {}
+        meta = json.loads(metadata[META_KEY])
+
+        self.names: dict[int, str] = dict(enumerate(meta["names"]))
+        self.video_info = sv.VideoInfo(
+            width=meta["width"],
+            height=meta["height"],
+            fps=meta["fps"],
+            total_frames=meta["total_frames"],
+        )
+        self.source_filename: str = meta["source_filename"]
+        self.min_conf: float = meta["min_conf"]
+        self.frames = int(metadata[FRAMES_KEY])
+        self.skipped_frames_ratio = float(metadata[SKIPPED_RATIO_KEY])
+
+    def iter_frames(self, conf: float) -> Iterator[sv.Detections]:
+        """Yield every frame's detections at a confidence threshold.
+
+        Row groups are read one at a time, so memory use does not depend on
+        the video length.
+
+        Args:
+            conf: Confidence threshold, at least the cache's ``min_conf``.
+
+        Yields:
+            The detections of each frame, in frame order, including empty
+            detections for frames without any.
+
+        Raises:
+            ValueError: If ``conf`` is below the cache's ``min_conf``.
+        """
+        if conf < self.min_conf:
+            raise ValueError(
+                f"Detections were kept from confidence {self.min_conf}, not {conf}"
+            )
+        frame_id = 0
+        for i in range(self._file.num_row_groups):
+            group = self._file.read_row_group(i)
+            frame_ids = group.column(FRAME_ID_COLUMN).to_numpy()
+            xyxy = np.stack(
+                [group.column(name).to_numpy() for name in BOX_COLUMNS], axis=1
+            )
+            confidence = group.column(CONFIDENCE_COLUMN).to_numpy()
+            class_id = group.column(CLASS_ID_COLUMN).to_numpy().astype(np.int64)
+
+            keep = confidence >= conf
+            frame_ids, xyxy = frame_ids[keep], xyxy[keep]
+            confidence, class_id = confidence[keep], class_id[keep]
+
+            # Start and end row of every frame in the group.
+            last = int(frame_ids[-1]) + 1 if len(frame_ids) else frame_id
+            bounds = np.searchsorted(frame_ids, np.arange(frame_id, last + 1))
+            for start, end in zip(bounds[:-1], bounds[1:], strict=True):
+                if start == end:
+                    yield sv.Detections.empty()
+                    continue
+                yield sv.Detections(
+                    xyxy=xyxy[start:end],
+                    confidence=confidence[start:end],
+                    class_id=class_id[start:end],
+                )
+            frame_id = last
+
+        for _ in range(frame_id, self.frames):
+            yield sv.Detections.empty()
+
+
+def concat_detection_caches(paths: list[str], target: str) -> None:
+    """Join detection caches of consecutive video segments.
+
+    Frame ids of each input are shifted by the frame count of the inputs
+    before it. Inputs are copied one row group at a time. Metadata is taken
+    from the first input, with the frame count, total frames and skipped
+    ratio of the whole video.
+
+    Args:
+        paths: Caches in playback order.
+        target: Output path.
+    """
+    caches = [DetectionCache(p) for p in paths]
+    first = pq.ParquetFile(paths[0]).schema_arrow.metadata or {}
+    meta = json.loads(first[META_KEY])
+    frames = sum(c.frames for c in caches)
+    meta["total_frames"] = frames
+    skipped = sum(c.skipped_frames_ratio * c.frames for c in caches)
+
+    schema = SCHEMA.with_metadata({META_KEY: json.dumps(meta)})
+    with pq.ParquetWriter(target, schema, compression="zstd") as writer:
+        offset = 0
+        for path, cache in zip(paths, caches, strict=True):
+            source = pq.ParquetFile(path)
+            for i in range(source.num_row_groups):
+                group = source.read_row_group(i).replace_schema_metadata()
+                frame_ids = group.column(FRAME_ID_COLUMN).to_numpy() + offset
+                group = group.set_column(
+                    0, FRAME_ID_COLUMN, pa.array(frame_ids, type=pa.int32())
+                )
+                writer.write_table(group.cast(schema))
+            offset += cache.frames
+        writer.add_key_value_metadata(
+            {
+                FRAMES_KEY: str(frames),
+                SKIPPED_RATIO_KEY: str(skipped / frames if frames else 0.0),
+            }
+        )
@@ -0,0 +1,170 @@
+"""Single-pass H.264 encoding by piping raw frames into ffmpeg."""
+
+import subprocess
+import tempfile
+
+import numpy as np
+
+from backend.app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Only the end of ffmpeg's log goes into the error, which ends up in the task.
+STDERR_TAIL_BYTES = 4096
+
+
+class VideoEncoderError(Exception):
+    """Raised when the ffmpeg encoder fails."""
+
+
+def has_audio_stream(path: str) -> bool:
+    """Check whether a media file contains at least one audio stream.
+
+    Args:
+        path: Path to the media file.
+
+    Returns:
+        True if ffprobe reports an audio stream, False otherwise (including
+        when ffprobe is unavailable or fails).
+    """
+    try:
+        result = subprocess.run(
+            [
+                "ffprobe",
+                "-v",
+                "error",
+                "-select_streams",
+                "a",
+                "-show_entries",
+                "stream=index",
+                "-of",
+                "csv=p=0",
+                path,
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+    except (OSError, subprocess.CalledProcessError) as e:
+        logger.warning("ffprobe_failed", path=path, error=str(e))
+        return False
+
+    return bool(result.stdout.strip())
+
+
+class FfmpegPipeWriter:
+    """Video writer that streams BGR frames to an ffmpeg/libx264 subprocess.
+
+    Mirrors the ``write``/``release`` interface of ``cv2.VideoWriter`` so it can
+    be used as a drop-in replacement, but produces the final H.264 file in one
+    pass with no intermediate file on disk.
+    """
+
+    def __init__(
+        self,
+        output_path: str,
+        fps: float,
+        resolution: tuple[int, int],
+        audio_source: str | None = None,
+    ) -> None:
+        """Start the ffmpeg subprocess.
+
+        Args:
+            output_path: Path of the encoded output video.
+            fps: Frame rate of the written frames.
+            resolution: Frame width and height in pixels.
+            audio_source: Optional media file whose first audio stream is
+                muxed into the output as AAC. When None, the output has no
+                audio track and no audio encoder runs.
+        """
+        width, height = resolution
+        command = [
+            "ffmpeg",
+            "-y",
+            "-loglevel",
+            "error",
+            "-f",
+            "rawvideo",
+            "-pix_fmt",
+            "bgr24",
+            "-s",
+            f"{width}x{height}",
+            "-r",
+            str(fps),
+            "-i",
+            "-",
+        ]
+        if audio_source:
+            command += ["-i", audio_source, "-map", "0:v:0", "-map", "1:a:0"]
+            command += ["-acodec", "aac", "-shortest"]
+        else:
+            command += ["-an"]
+        command += ["-vcodec", "libx264", "-pix_fmt", "yuv420p", output_path]
+
+        self.output_path = output_path
+        self._frame_bytes = width * height * 3
+        # A pipe read only at the end would fill up and block ffmpeg (and in
+        # turn ``write``) once it logs more than the pipe buffer holds.
+        self._stderr = tempfile.TemporaryFile()
+        try:
+            self._process = subprocess.Popen(
+                command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=self._stderr,
+            )
+        except Exception:
+            self._stderr.close()
+            raise
+        self._released = False
+
+    def write(self, frame: np.ndarray) -> None:
+        """Send one BGR frame to the encoder.
+
+        Args:
+            frame: Frame of shape (height, width, 3) and dtype uint8.
+
+        Raises:
+            VideoEncoderError: If the frame has the wrong size or ffmpeg has
+                exited.
+        """
+        data = np.ascontiguousarray(frame, dtype=np.uint8)
+        if data.nbytes != self._frame_bytes:
+            raise VideoEncoderError(
+                f"Frame has {data.nbytes} bytes, expected {self._frame_bytes}"
+            )
+
+        try:
+            self._process.stdin.write(data.data)  # type: ignore[union-attr]
+        except (BrokenPipeError, ValueError) as e:
+            raise VideoEncoderError(f"ffmpeg encoder stopped: {e}") from e
+
+    def release(self) -> None:
+        """Finish encoding and wait for ffmpeg to exit.
+
+        Safe to call more than once; only the first call has an effect.
+
+        Raises:
+            VideoEncoderError: If ffmpeg exits with a non-zero status.
+        """
+        if self._released:
+            return
+        self._released = True
+
+        try:
+            self._process.communicate()
+        except (BrokenPipeError, ValueError):
+            self._process.wait()
+
+        with self._stderr:
+            self._stderr.seek(0, 2)
+            self._stderr.seek(max(0, self._stderr.tell() - STDERR_TAIL_BYTES))
+            stderr = self._stderr.read()
+
+        if self._process.returncode != 0:
+            message = stderr.decode(errors="replace").strip()
+            raise VideoEncoderError(
+                f"ffmpeg exited with status {self._process.returncode}: {message}"
+            )
+
+        logger.debug("ffmpeg_encoding_finished", output=self.output_path)
@@ -1,15 +1,36 @@
+import asyncio
+import errno
+import hashlib
+import io
+import math
+import mmap
 import os
+import shutil
+from collections.abc import AsyncIterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from pathlib import Path
+from typing import IO, Any
 
 import aioboto3
 import aiofiles
 import aiofiles.os
 import structlog
 from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
 from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+from backend.app.services.url_cache import PresignedUrlCache
 
 logger = structlog.get_logger(__name__)
 
+MiB = 1024 * 1024
+
+# Delay before the first retry of a failed part; doubled on every retry.
+PART_RETRY_DELAY = 0.5
+
 
 class FileServiceError(Exception):
     """Base exception for FileService errors."""
@@ -19,10 +40,140 @@ class FileUploadError(FileServiceError):
     """Raised when file upload fails."""
 
 
+class FileTooLargeError(FileUploadError):
+    """Raised when an uploaded file exceeds the size limit."""
+
+
 class S3UploadError(FileServiceError):
     """Raised when S3 upload fails."""
 
 
+class S3DownloadError(FileServiceError):
+    """Raised when S3 download fails."""
+
+
+@dataclass
+class SavedUpload:
+    """An uploaded file persisted to local storage."""
+
+    path: str
+    size: int
+    sha256: str | None = None
+
+
+def _spooled_buffer(file: IO[bytes]) -> io.BytesIO | None:
+    """Return the buffer of an upload still held in memory, if it is."""
+    # UploadFile spools to a SpooledTemporaryFile, which keeps small files
+    # in a BytesIO and moves them to a temporary file once they grow.
+    inner = getattr(file, "_file", file)
+    return inner if isinstance(inner, io.BytesIO) else None
+
+
+# Errors of copy_file_range and sendfile meaning the pair of files is not
+# supported, so the next method should be tried.
+_UNSUPPORTED_COPY_ERRORS = frozenset(
+    {errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP, errno.EBADF}
+)
+
+
+def _link_or_copy(source: IO[bytes], size: int, target: str) -> str:
+    """Persist an open file at ``target`` without copying it through Python.
+
+    Tries, in order: hard-linking the file (only possible if it has a name
+    on the same file system; the anonymous spool files of uploads have
+    none), ``copy_file_range`` (an in-kernel copy, reflinked on file
+    systems that support it), ``sendfile`` and finally a buffered copy.
+
+    Returns:
+        The method that was used.
+    """
+    name = getattr(source, "name", None)
+    if isinstance(name, str):
+        try:
+            os.link(name, target)
+            return "link"
+        except OSError:
+            pass
+
+    source_fd = source.fileno()
+
+    with open(target, "wb") as out:
+        target_fd = out.fileno()
+        for name, copy in (
+            ("copy_file_range", getattr(os, "copy_file_range", None)),
+            ("sendfile", os.sendfile),
+        ):
+            if copy is None:
+                continue
+            offset = 0
+            try:
+                while offset < size:
+                    if name == "sendfile":
+                        sent = copy(target_fd, source_fd, offset, size - offset)
+                    else:
+                        sent = copy(source_fd, target_fd, size - offset, offset)
+                    if not sent:
+                        break
+                    offset += sent
+            except OSError as e:
+                # Not supported for this pair of files; nothing was written.
+                if offset or e.errno not in _UNSUPPORTED_COPY_ERRORS:
+                    raise
+                continue
+            if offset == size:
+                return name
+            raise OSError(f"Source file shrank while copying to {target}")
+
+        with os.fdopen(os.dup(source_fd), "rb") as source:
+            source.seek(0)
+            shutil.copyfileobj(source, out, MiB)
+        return "copy"
+
+
+def _persist_upload(
+    file: IO[bytes], target: str, max_bytes: int | None, hash_content: bool = True
+) -> SavedUpload:
+    """Write an upload to ``target``, hashing it on the way if requested.
+
+    Raises:
+        FileTooLargeError: If the upload exceeds ``max_bytes``.
+    """
+    spooled = _spooled_buffer(file)
+    if spooled is not None:
+        with spooled.getbuffer() as buffer:
+            size = len(buffer)
+            if max_bytes is not None and size > max_bytes:
+                raise FileTooLargeError(f"File exceeds {max_bytes} bytes")
+            sha256 = hashlib.sha256(buffer).hexdigest() if hash_content else None
+            with open(target, "wb") as out:
+                out.write(buffer)
+        method = "write"
+    else:
+        file.flush()
+        fd = file.fileno()
+        size = os.fstat(fd).st_size
+        if max_bytes is not None and size > max_bytes:
+            raise FileTooLargeError(f"File exceeds {max_bytes} bytes")
+        sha256 = None
+        if not hash_content:
+            method = _link_or_copy(file, size, target)
+        else:
+            digest = hashlib.sha256()
+            # Both release the GIL, so on a multi-core host the copy runs
+            # while the file is hashed.
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                copy = pool.submit(_link_or_copy, file, size, target)
+                if size:
+                    # Hashing a mapping reads the page cache without copying.
+                    with mmap.mmap(fd, size, access=mmap.ACCESS_READ) as mapped:
+                        digest.update(mapped)
+                method = copy.result()
+            sha256 = digest.hexdigest()
+
+    logger.debug("upload_persisted", path=target, size=size, method=method)
+    return SavedUpload(path=target, size=size, sha256=sha256)
+
+
 class FileService:
     """Service for handling file operations including local storage and S3."""
 
@@ -34,10 +185,43 @@ class FileService:
         bucket_name: str,
         upload_dir: str,
         results_dir: str,
+        multipart_threshold: int = 64 * MiB,
+        part_size: int = 16 * MiB,
+        upload_concurrency: int = 4,
+        part_retries: int = 3,
+        client: Any = None,
+        url_cache: PresignedUrlCache | None = None,
     ) -> None:
+        """Initialize the file service.
+
+        Args:
+            s3_endpoint: S3 endpoint URL.
+            access_key: S3 access key.
+            secret_key: S3 secret key.
+            bucket_name: Bucket holding uploads and results.
+            upload_dir: Local directory for uploaded videos.
+            results_dir: Local directory for processing results.
+            multipart_threshold: Files of at least this many bytes are
+                uploaded in parts; smaller ones with a single PUT.
+            part_size: Bytes per part of a multipart upload. S3 requires at
+                least 5 MiB for all parts but the last.
+            upload_concurrency: Parts of one file uploaded at the same time.
+            part_retries: Attempts per part before the upload is aborted.
+            client: Open S3 client to use for every call, owned by the
+                caller (see ``open_s3_client``). Without one, each call
+                opens and closes its own client.
+            url_cache: Cache for presigned URLs; without one every call
+                signs a new URL.
+        """
         self.bucket_name = bucket_name
         self.upload_dir = upload_dir
         self.results_dir = results_dir
+        self.multipart_threshold = multipart_threshold
+        self.part_size = part_size
+        self.upload_concurrency = upload_concurrency
+        self.part_retries = part_retries
+        self.client = client
+        self.url_cache = url_cache
 
         self.session = aioboto3.Session()
 
@@ -48,27 +232,57 @@ class FileService:
             "config": Config(signature_version="s3v4", region_name="us-east-1"),
         }
 
-    async def save_upload_locally(self, file: UploadFile, filename: str) -> str:
+    @asynccontextmanager
+    async def _s3(self) -> AsyncIterator[Any]:
+        """Yield the shared S3 client, or a short-lived one if there is none."""
+        if self.client is not None:
+            yield self.client
+            return
+        async with self.session.client("s3", **self.s3_config) as s3:  # type: ignore[arg-type]
+            yield s3
+
+    async def save_upload_locally(
+        self,
+        file: UploadFile,
+        filename: str,
+        max_bytes: int | None = None,
+        hash_content: bool = True,
+    ) -> SavedUpload:
         """Save an uploaded file to local storage.
 
+        The request body is already spooled by the server, so it is not
+        copied through Python again: a spool held in memory is written in
+        one call, and one on disk is hard-linked or copied in the kernel.
+        The size check needs no read, and the SHA-256 digest is computed
+        from the spool without copying it. It runs in one worker thread.
+
         Args:
             file: The uploaded file from FastAPI.
             filename: The target filename.
+            max_bytes: Largest accepted file size, if limited.
+            hash_content: Compute the SHA-256 digest of the file, which
+                takes longer than the copy itself.
 
         Returns:
-            The path to the saved file.
+            The path, size and, if requested, SHA-256 digest of the saved
+            file.
 
         Raises:
+            FileTooLargeError: If the file exceeds ``max_bytes``.
             FileUploadError: If the file cannot be saved.
         """
         file_path = os.path.join(self.upload_dir, filename)
         try:
-            async with aiofiles.open(file_path, "wb") as buffer:
-                while content := await file.read(1024 * 1024):
-                    await buffer.write(content)
-
-            logger.info("file_saved_locally", filename=filename, path=file_path)
-            return file_path
+            saved = await run_in_threadpool(
+                _persist_upload, file.file, file_path, max_bytes, hash_content
+            )
+            logger.info(
+                "file_saved_locally", filename=filename, path=file_path, size=saved.size
+            )
+            return saved
+        except FileTooLargeError:
+            logger.warning("file_too_large", filename=filename, max_bytes=max_bytes)
+            raise
         except Exception as e:
             logger.error("file_save_failed", filename=filename, error=str(e))
             raise FileUploadError(f"Failed to save file locally: {e}") from e
@@ -76,6 +290,11 @@ class FileService:
     async def upload_file_to_s3(self, local_path: str, s3_key: str) -> str:
         """Upload a file to S3 storage.
 
+        Files smaller than ``multipart_threshold`` are sent with a single
+        PUT. Larger files are streamed from disk in parts of ``part_size``,
+        ``upload_concurrency`` at a time, so at most that many parts are held
+        in memory.
+
         Args:
             local_path: Path to the local file.
             s3_key: The S3 key (path) for the uploaded file.
@@ -87,21 +306,193 @@ class FileService:
             S3UploadError: If the upload fails.
         """
         try:
-            async with self.session.client("s3", **self.s3_config) as s3:  # type: ignore[arg-type]
-                async with aiofiles.open(local_path, "rb") as f:
-                    content = await f.read()
+            size = (await aiofiles.os.stat(local_path)).st_size
+            async with self._s3() as s3:
+                if size < self.multipart_threshold:
+                    async with aiofiles.open(local_path, "rb") as f:
+                        content = await f.read()
                     await s3.put_object(
                         Bucket=self.bucket_name,
                         Key=s3_key,
                         Body=content,
                     )
+                else:
+                    await self._upload_multipart(s3, local_path, s3_key, size)
 
-            logger.info("file_uploaded_to_s3", s3_key=s3_key)
+            logger.info("file_uploaded_to_s3", s3_key=s3_key, size=size)
             return s3_key
         except Exception as e:
             logger.critical("s3_upload_failed", s3_key=s3_key, error=str(e))
             raise S3UploadError(f"S3 upload failed: {e}") from e
 
+    async def _upload_multipart(
+        self, s3: Any, local_path: str, s3_key: str, size: int
+    ) -> None:
+        """Upload a file in parts, aborting the upload if any part fails.
+
+        Raises:
+            BotoCoreError, ClientError: If a part still fails after
+                ``part_retries`` attempts, or S3 rejects the upload.
+        """
+        upload = await s3.create_multipart_upload(Bucket=self.bucket_name, Key=s3_key)
+        upload_id = upload["UploadId"]
+        part_count = math.ceil(size / self.part_size)
+        limit = asyncio.Semaphore(self.upload_concurrency)
+
+        async def send_part(number: int) -> dict[str, object]:
+            async with limit:
+                async with aiofiles.open(local_path, "rb") as f:
+                    await f.seek((number - 1) * self.part_size)
+                    body = await f.read(self.part_size)
+
+                async def put() -> dict[str, object]:
+                    response = await s3.upload_part(
+                        Bucket=self.bucket_name,
+                        Key=s3_key,
+                        UploadId=upload_id,
+                        PartNumber=number,
+                        Body=body,
+                    )
+                    return {"PartNumber": number, "ETag": response["ETag"]}
+
+                for attempt in range(1, self.part_retries):
+                    try:
+                        return await put()
+                    except (BotoCoreError, ClientError) as e:
+                        logger.warning(
+                            "s3_part_upload_retry",
+                            s3_key=s3_key,
+                            part=number,
+                            attempt=attempt,
+                            error=str(e),
+                        )
+                        await asyncio.sleep(PART_RETRY_DELAY * 2 ** (attempt - 1))
+                return await put()
+
+        try:
+            # A failing part cancels the others instead of letting them run on.
+            async with asyncio.TaskGroup() as group:
+                tasks = [
+                    group.create_task(send_part(n)) for n in range(1, part_count + 1)
+                ]
+            await s3.complete_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=s3_key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": [t.result() for t in tasks]},
+            )
+        except BaseException as e:
+            try:
+                await s3.abort_multipart_upload(
+                    Bucket=self.bucket_name, Key=s3_key, UploadId=upload_id
+                )
+            except (BotoCoreError, ClientError) as abort_error:
+                logger.warning(
+                    "s3_multipart_abort_failed", s3_key=s3_key, error=str(abort_error)
+                )
+            if isinstance(e, ExceptionGroup):
+                raise e.exceptions[0] from None
+            raise
+
+        logger.debug("s3_multipart_uploaded", s3_key=s3_key, parts=part_count)
+
+    async def download_file_from_s3(self, s3_key: str, local_path: str) -> str:
+        """Download an S3 object to a local file.
+
+        The body is streamed to disk in chunks, so memory use does not
+        depend on the object size.
+
+        Args:
+            s3_key: The S3 key of the object.
+            local_path: Path of the local file to write.
+
+        Returns:
+            The local path.
+
+        Raises:
+            S3DownloadError: If the download fails.
+        """
+        try:
+            async with self._s3() as s3:
+                response = await s3.get_object(Bucket=self.bucket_name, Key=s3_key)
+                body = response["Body"]
+                try:
+                    async with aiofiles.open(local_path, "wb") as f:
+                        while chunk := await body.read(MiB):
+                            await f.write(chunk)
+                finally:
+                    body.close()
+
+            logger.info("file_downloaded_from_s3", s3_key=s3_key, path=local_path)
+            return local_path
+        except Exception as e:
+            logger.error("s3_download_failed", s3_key=s3_key, error=str(e))
+            raise S3DownloadError(f"S3 download failed: {e}") from e
+
+    async def delete_file_from_s3(self, s3_key: str) -> None:
+        """Delete an S3 object; a missing object is not an error.
+
+        Failures are logged, not raised, as deletion only cleans up after
+        other failures.
+
+        Args:
+            s3_key: The S3 key of the object.
+        """
+        try:
+            async with self._s3() as s3:
+                await s3.delete_object(Bucket=self.bucket_name, Key=s3_key)
+            logger.info("file_deleted_from_s3", s3_key=s3_key)
+        except Exception as e:
+            logger.warning("s3_delete_failed", s3_key=s3_key, error=str(e))
+
+    async def object_size(self, s3_key: str) -> int | None:
+        """Return the size of an S3 object.
+
+        Args:
+            s3_key: The S3 key of the object.
+
+        Returns:
+            The size in bytes, or None if the object does not exist or cannot
+            be looked up.
+        """
+        try:
+            async with self._s3() as s3:
+                head = await s3.head_object(Bucket=self.bucket_name, Key=s3_key)
+                return int(head["ContentLength"])
+        except Exception as e:
+            logger.warning("s3_head_failed", s3_key=s3_key, error=str(e))
+            return None
+
+    async def generate_presigned_post(
+        self, s3_key: str, max_bytes: int, expiration: int = 3600
+    ) -> dict[str, Any] | None:
+        """Generate a presigned POST for uploading an object directly to S3.
+
+        The client sends the file as the ``file`` field of a multipart form
+        to ``url``, along with ``fields``. S3 rejects files larger than
+        ``max_bytes`` and any other key.
+
+        Args:
+            s3_key: The S3 key the object must be stored under.
+            max_bytes: Largest accepted file size.
+            expiration: Validity of the POST in seconds.
+
+        Returns:
+            The ``url`` and form ``fields``, or None on failure.
+        """
+        try:
+            async with self._s3() as s3:
+                post: dict[str, Any] = await s3.generate_presigned_post(
+                    Bucket=self.bucket_name,
+                    Key=s3_key,
+                    Conditions=[["content-length-range", 1, max_bytes]],
+                    ExpiresIn=expiration,
+                )
+                return post
+        except Exception as e:
+            logger.error("presigned_post_failed", s3_key=s3_key, error=str(e))
+            return None
+
     async def generate_presigned_url(self, s3_key: str, expiration: int = 3600) -> str:
         """Generate a presigned URL for accessing an S3 object.
 
@@ -109,21 +500,33 @@ class FileService:
             s3_key: The S3 key of the object.
             expiration: URL expiration time in seconds.
 
+        A URL from ``url_cache`` is returned while it is within its reuse
+        window; signing itself is local and makes no request to S3.
+
         Returns:
             The presigned URL, or empty string on failure.
         """
+        cache_key = f"{self.bucket_name}/{s3_key}:{expiration}"
+        if self.url_cache is not None:
+            cached = await self.url_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
         try:
-            async with self.session.client("s3", **self.s3_config) as s3:  # type: ignore[arg-type]
+            async with self._s3() as s3:
                 url: str = await s3.generate_presigned_url(
                     "get_object",
                     Params={"Bucket": self.bucket_name, "Key": s3_key},
                     ExpiresIn=expiration,
                 )
-                return url
         except Exception as e:
             logger.error("presigned_url_failed", s3_key=s3_key, error=str(e))
             return ""
 
+        if self.url_cache is not None:
+            await self.url_cache.set(cache_key, url, expiration)
+        return url
+
     async def cleanup_local_file(self, path: str) -> None:
         """Remove a local file if it exists.
 
@@ -147,3 +550,42 @@ class FileService:
             The full path to the result file.
         """
         return str(Path(self.results_dir) / filename)
+
+
+@asynccontextmanager
+async def open_s3_client(
+    s3_endpoint: str,
+    access_key: str,
+    secret_key: str,
+    max_pool_connections: int = 10,
+) -> AsyncIterator[Any]:
+    """Open a long-lived S3 client with a pool of keep-alive connections.
+
+    The client is bound to the running event loop and is closed, along with
+    its connections, when the context exits.
+
+    Args:
+        s3_endpoint: S3 endpoint URL.
+        access_key: S3 access key.
+        secret_key: S3 secret key.
+        max_pool_connections: Connections kept open to the endpoint.
+
+    Yields:
+        The S3 client.
+    """
+    config = Config(
+        signature_version="s3v4",
+        region_name="us-east-1",
+        max_pool_connections=max_pool_connections,
+        tcp_keepalive=True,
+    )
+    async with aioboto3.Session().client(
+        "s3",
+        endpoint_url=s3_endpoint,
+        aws_access_key_id=access_key,
+        aws_secret_access_key=secret_key,
+        config=config,
+    ) as client:  # type: ignore[arg-type]
+        logger.info("s3_client_opened", max_pool_connections=max_pool_connections)
+        yield client
+    logger.info("s3_client_closed")
@@ -0,0 +1,158 @@
+"""Export YOLO weights to CPU-optimized runtimes and cache the artifacts."""
+
+import hashlib
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Literal
+
+from ultralytics import YOLO
+
+from backend.app.core.logger import get_logger
+from backend.app.services.quantization import (
+    calibration_fingerprint,
+    load_calibration_frames,
+    quantize_onnx_int8,
+)
+
+logger = get_logger(__name__)
+
+InferenceBackend = Literal["torch", "onnx", "onnx_int8", "openvino"]
+
+_EXPORT_SUFFIXES: dict[str, str] = {
+    "onnx": ".onnx",
+    "onnx_int8": "-int8.onnx",
+    "openvino": "_openvino_model",
+}
+
+
+def file_digest(path: Path) -> str:
+    """Compute the SHA-256 hex digest of a file.
+
+    Args:
+        path: Path to the file.
+
+    Returns:
+        The hex digest.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cached_export_path(
+    source: Path,
+    backend: InferenceBackend,
+    imgsz: int,
+    cache_dir: Path,
+    variant: str = "",
+) -> Path:
+    """Build the cache location of an exported model.
+
+    The name is keyed by the weights' content hash and the input size, so
+    changing either produces a new artifact instead of reusing a stale one.
+
+    Args:
+        source: Path to the PyTorch weights.
+        backend: Target runtime.
+        imgsz: Export input size.
+        cache_dir: Directory holding exported models.
+        variant: Extra key component, such as the calibration set of a
+            quantized model.
+
+    Returns:
+        Path of the exported file (ONNX) or directory (OpenVINO).
+    """
+    digest = file_digest(source)[:16]
+    key = f"{source.stem}-{digest}-{imgsz}" + (f"-{variant}" if variant else "")
+    return cache_dir / f"{key}{_EXPORT_SUFFIXES[backend]}"
+
+
+def resolve_model_path(
+    model_path: str,
+    backend: InferenceBackend,
+    imgsz: int,
+    cache_dir: str,
+    calibration_source: str | None = None,
+    calibration_frames: int = 64,
+) -> str:
+    """Return the model path to load for the given inference backend.
+
+    For ``torch`` this is ``model_path`` itself. For ``onnx`` and
+    ``openvino`` the weights are exported on first use and the artifact is
+    cached in ``cache_dir``; later calls return the cached artifact without
+    loading PyTorch weights. Exports run in a private temporary directory and
+    are moved into place atomically, so concurrent workers never see a
+    partial artifact.
+
+    ``onnx_int8`` builds on the ``onnx`` export and statically quantizes it,
+    calibrating on up to ``calibration_frames`` frames read from
+    ``calibration_source``.
+
+    Args:
+        model_path: Path to the PyTorch weights (or a name ultralytics can
+            download, such as ``yolov8n.pt``).
+        backend: Target runtime.
+        imgsz: Export input size.
+        cache_dir: Directory holding exported models.
+        calibration_source: Image/video file or directory of them used to
+            calibrate ``onnx_int8``.
+        calibration_frames: Maximum number of calibration frames.
+
+    Returns:
+        Path of the model to pass to ``YOLO``.
+
+    Raises:
+        ValueError: If the backend is unknown, or ``onnx_int8`` is requested
+            without a calibration source.
+    """
+    if backend == "torch":
+        return model_path
+    if backend not in _EXPORT_SUFFIXES:
+        raise ValueError(f"Unknown inference backend: {backend}")
+
+    source = Path(model_path)
+    if not source.is_file():
+        # Let ultralytics resolve or download the weights first.
+        source = Path(str(YOLO(model_path).ckpt_path or model_path))
+
+    variant = ""
+    if backend == "onnx_int8":
+        if not calibration_source:
+            raise ValueError("onnx_int8 requires a calibration source")
+        variant = f"c{calibration_fingerprint(calibration_source)}"
+        variant += f"x{calibration_frames}"
+
+    cache = Path(cache_dir)
+    cache.mkdir(parents=True, exist_ok=True)
+    target = cached_export_path(source, backend, imgsz, cache, variant)
+
+    if target.exists():
+        logger.info("model_export_cache_hit", backend=backend, path=str(target))
+        return str(target)
+
+    logger.info("model_export_started", backend=backend, imgsz=imgsz)
+    with tempfile.TemporaryDirectory(dir=cache) as tmp:
+        if backend == "onnx_int8" and calibration_source:
+            fp32 = resolve_model_path(str(source), "onnx", imgsz, cache_dir)
+            frames = load_calibration_frames(calibration_source, calibration_frames)
+            exported = Path(tmp) / target.name
+            quantize_onnx_int8(Path(fp32), exported, frames, imgsz)
+        else:
+            staged = Path(tmp) / source.name
+            shutil.copy2(source, staged)
+            exported = YOLO(str(staged)).export(
+                format=backend, imgsz=imgsz, dynamic=True, verbose=False
+            )
+        try:
+            os.replace(exported, target)
+        except OSError:
+            # Another worker finished the same export first.
+            if not target.exists():
+                raise
+
+    logger.info("model_export_finished", backend=backend, path=str(target))
+    return str(target)
@@ -0,0 +1,61 @@
+"""Cheap frame-differencing motion detection used to skip static frames."""
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """Decide whether a frame differs enough from the last moving frame.
+
+    Frames are reduced to small blurred grayscale thumbnails and compared to
+    the thumbnail of the last frame that was considered moving. A frame is
+    static when the fraction of pixels whose intensity changed by more than
+    ``pixel_delta`` stays below ``threshold``. Comparing against the last
+    moving frame rather than the previous frame means slow movement still
+    accumulates until it crosses the threshold.
+    """
+
+    def __init__(
+        self, threshold: float, pixel_delta: int = 25, width: int = 160
+    ) -> None:
+        """Initialize the gate.
+
+        Args:
+            threshold: Fraction of changed thumbnail pixels (0-1) above which
+                a frame counts as moving.
+            pixel_delta: Minimum per-pixel intensity change to count a pixel
+                as changed.
+            width: Thumbnail width in pixels.
+        """
+        self.threshold = threshold
+        self.pixel_delta = pixel_delta
+        self.width = width
+        self._reference: np.ndarray | None = None
+
+    def is_static(self, frame: np.ndarray) -> bool:
+        """Check a frame against the reference and update it on motion.
+
+        The first frame is never static.
+
+        Args:
+            frame: BGR frame.
+
+        Returns:
+            True if the frame is static relative to the last moving frame.
+        """
+        thumbnail = self._thumbnail(frame)
+        if self._reference is not None:
+            diff = cv2.absdiff(thumbnail, self._reference)
+            changed = np.count_nonzero(diff > self.pixel_delta) / diff.size
+            if changed < self.threshold:
+                return True
+
+        self._reference = thumbnail
+        return False
+
+    def _thumbnail(self, frame: np.ndarray) -> np.ndarray:
+        height, width = frame.shape[:2]
+        size = (self.width, max(1, round(height * self.width / width)))
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        small = cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+        return cv2.GaussianBlur(small, (5, 5), 0)
@@ -0,0 +1,132 @@
+"""Composable frame-processing stages with an optional threaded runner."""
+
+import queue
+import threading
+from collections.abc import Callable, Generator, Iterable, Iterator, Sequence
+from typing import Any
+
+from backend.app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+Stage = Callable[[Iterator[Any]], Iterable[Any]]
+"""A stage consumes an iterator of items and yields transformed items."""
+
+_SENTINEL = object()
+_POLL_INTERVAL = 0.1
+
+
+def run_stages(
+    source: Iterable[Any], stages: Sequence[Stage]
+) -> Generator[Any, None, None]:
+    """Chain stages lazily on the calling thread.
+
+    Args:
+        source: Items fed into the first stage.
+        stages: Stages applied in order.
+
+    Yields:
+        Output items of the last stage, in source order.
+    """
+    items: Iterator[Any] = iter(source)
+    for stage in stages:
+        items = iter(stage(items))
+    yield from items
+
+
+def run_pipelined(
+    source: Iterable[Any], stages: Sequence[Stage], queue_depth: int
+) -> Generator[Any, None, None]:
+    """Run each stage in its own thread, connected by bounded queues.
+
+    Iterating the source and every stage happens on a dedicated thread, while
+    the caller consumes the output of the last stage. Each stage is a single
+    thread reading a FIFO queue, so item order is preserved end to end. Every
+    queue holds at most ``queue_depth`` items, which caps the number of
+    frames in flight.
+
+    If any stage raises, the remaining stages are stopped and the exception
+    is re-raised in the caller. Closing the generator early (for example via
+    ``contextlib.closing``) stops the stage threads as well.
+
+    Args:
+        source: Items fed into the first stage.
+        stages: Stages applied in order.
+        queue_depth: Maximum number of items buffered between two stages.
+
+    Yields:
+        Output items of the last stage, in source order.
+
+    Raises:
+        ValueError: If ``queue_depth`` is not positive.
+    """
+    if queue_depth < 1:
+        raise ValueError(f"queue_depth must be positive, got {queue_depth}")
+
+    stop = threading.Event()
+    errors: list[BaseException] = []
+    queues: list[queue.Queue[Any]] = [
+        queue.Queue(maxsize=queue_depth) for _ in range(len(stages) + 1)
+    ]
+
+    def put(q: queue.Queue[Any], item: Any) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def drain(q: queue.Queue[Any]) -> Iterator[Any]:
+        while True:
+            try:
+                item = q.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                if stop.is_set():
+                    return
+                continue
+            if item is _SENTINEL:
+                return
+            yield item
+
+    def work(
+        name: str, produce: Callable[[], Iterable[Any]], out: queue.Queue[Any]
+    ) -> None:
+        try:
+            for item in produce():
+                if not put(out, item):
+                    return
+            put(out, _SENTINEL)
+        except BaseException as e:
+            logger.error("pipeline_stage_failed", stage=name, error=str(e))
+            errors.append(e)
+            stop.set()
+
+    def bind(stage: Stage, inbox: queue.Queue[Any]) -> Callable[[], Iterable[Any]]:
+        return lambda: stage(drain(inbox))
+
+    producers: list[Callable[[], Iterable[Any]]] = [lambda: source]
+    producers += [bind(stage, queues[i]) for i, stage in enumerate(stages)]
+
+    threads = [
+        threading.Thread(
+            target=work,
+            args=(f"stage-{i}", produce, queues[i]),
+            name=f"pipeline-stage-{i}",
+            daemon=True,
+        )
+        for i, produce in enumerate(producers)
+    ]
+    for thread in threads:
+        thread.start()
+
+    try:
+        yield from drain(queues[-1])
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    if errors:
+        raise errors[0]
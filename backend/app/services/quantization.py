@@ -0,0 +1,165 @@
+"""INT8 post-training quantization of exported ONNX models."""
+
+import hashlib
+from collections.abc import Iterator
+from pathlib import Path
+from typing import TYPE_CHECKING, cast
+
+import cv2
+import numpy as np
+import supervision as sv
+
+from backend.app.core.logger import get_logger
+
+if TYPE_CHECKING:
+    from onnxruntime.quantization import CalibrationDataReader
+
+logger = get_logger(__name__)
+
+IMAGE_SUFFIXES = frozenset({".jpg", ".jpeg", ".png", ".bmp"})
+VIDEO_SUFFIXES = frozenset({".mp4", ".avi", ".mov", ".mkv"})
+
+
+def _calibration_files(source: Path) -> list[Path]:
+    files = sorted(source.iterdir()) if source.is_dir() else [source]
+    return [f for f in files if f.suffix.lower() in IMAGE_SUFFIXES | VIDEO_SUFFIXES]
+
+
+def calibration_fingerprint(source: str) -> str:
+    """Identify a calibration set by its file names and sizes.
+
+    Cheap enough to compute on every worker start, unlike hashing the
+    contents of calibration videos.
+
+    Args:
+        source: Image/video file or a directory of them.
+
+    Returns:
+        A short hex digest.
+    """
+    digest = hashlib.sha256()
+    for path in _calibration_files(Path(source)):
+        digest.update(f"{path.name}:{path.stat().st_size}\n".encode())
+    return digest.hexdigest()[:8]
+
+
+def load_calibration_frames(source: str, limit: int) -> list[np.ndarray]:
+    """Collect BGR frames for calibration from local images and videos.
+
+    Frames are sampled evenly across each video so a short calibration set
+    still covers the whole clip. The budget is split evenly between files.
+
+    Args:
+        source: Image/video file or a directory of them.
+        limit: Maximum number of frames to return.
+
+    Returns:
+        Up to ``limit`` frames.
+
+    Raises:
+        ValueError: If no frames could be read.
+    """
+    files = _calibration_files(Path(source))
+    frames: list[np.ndarray] = []
+
+    for i, path in enumerate(files):
+        budget = (limit - len(frames)) // (len(files) - i)
+        if budget <= 0:
+            continue
+        if path.suffix.lower() in IMAGE_SUFFIXES:
+            image = cv2.imread(str(path))
+            if image is not None:
+                frames.append(image)
+            continue
+
+        total = sv.VideoInfo.from_video_path(str(path)).total_frames or budget
+        stride = max(1, total // budget)
+        sampled = sv.get_video_frames_generator(str(path), stride=stride)
+        frames.extend(frame for _, frame in zip(range(budget), sampled, strict=False))
+
+    if not frames:
+        raise ValueError(f"No calibration frames found in {source}")
+    return frames
+
+
+def preprocess(frame: np.ndarray, imgsz: int) -> np.ndarray:
+    """Letterbox a BGR frame into the model's NCHW float input.
+
+    Matches the ultralytics preprocessing: aspect-preserving resize, gray
+    (114) padding, RGB channel order and scaling to 0-1.
+
+    Args:
+        frame: BGR frame.
+        imgsz: Square model input size.
+
+    Returns:
+        Array of shape ``(1, 3, imgsz, imgsz)``.
+    """
+    height, width = frame.shape[:2]
+    scale = min(imgsz / height, imgsz / width)
+    resized_w, resized_h = round(width * scale), round(height * scale)
+    resized = cv2.resize(frame, (resized_w, resized_h), interpolation=cv2.INTER_LINEAR)
+
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    top, left = (imgsz - resized_h) // 2, (imgsz - resized_w) // 2
+    canvas[top : top + resized_h, left : left + resized_w] = resized
+
+    rgb = canvas[:, :, ::-1].transpose(2, 0, 1)
+    return np.ascontiguousarray(rgb, dtype=np.float32)[None] / 255.0
+
+
+class FrameCalibrationReader:
+    """Feed preprocessed frames to the ONNX Runtime calibrator one by one."""
+
+    def __init__(self, input_name: str, frames: list[np.ndarray], imgsz: int) -> None:
+        """Initialize the reader.
+
+        Args:
+            input_name: Name of the model's image input.
+            frames: BGR calibration frames.
+            imgsz: Model input size.
+        """
+        self._inputs: Iterator[dict[str, np.ndarray]] = (
+            {input_name: preprocess(frame, imgsz)} for frame in frames
+        )
+
+    def get_next(self) -> dict[str, np.ndarray] | None:
+        """Return the next calibration input, or None when exhausted."""
+        return next(self._inputs, None)
+
+
+def quantize_onnx_int8(
+    model_path: Path, target: Path, frames: list[np.ndarray], imgsz: int
+) -> None:
+    """Statically quantize an ONNX model to INT8.
+
+    Only convolutions and matrix multiplications are quantized. The detection
+    head's box decoding and concatenations stay in float, which keeps box
+    coordinates accurate at almost no cost in speed.
+
+    Args:
+        model_path: Path to the float ONNX model.
+        target: Output path of the quantized model.
+        frames: BGR calibration frames.
+        imgsz: Model input size.
+    """
+    import onnx
+    from onnxruntime.quantization import QuantFormat, QuantType, quantize_static
+
+    input_name = onnx.load(str(model_path), load_external_data=False).graph.input[0]
+    # ONNX Runtime accepts any object with ``get_next`` as a data reader.
+    reader = cast(
+        "CalibrationDataReader", FrameCalibrationReader(input_name.name, frames, imgsz)
+    )
+    logger.info("model_quantization_started", frames=len(frames), imgsz=imgsz)
+    quantize_static(
+        str(model_path),
+        str(target),
+        reader,
+        quant_format=QuantFormat.QDQ,
+        op_types_to_quantize=["Conv", "MatMul"],
+        per_channel=True,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+    )
+    logger.info("model_quantization_finished", path=str(target))
@@ -0,0 +1,190 @@
+"""On-disk form of analytics reports: a slim JSON summary plus Parquet series.
+
+The JSON file holds the report's ``meta``, ``summary`` and time buckets
+with an empty ``time_series``. The per-frame time series, when kept, lives
+next to it in a zstd-compressed Parquet file with the columns ``frame_id``,
+``timestamp`` and one count column per class, which is far smaller than
+per-frame JSON objects and can be read column by column. Only frames with
+detections have a row.
+"""
+
+import uuid
+from pathlib import Path
+from types import TracebackType
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from backend.app.schemas.analytics import AnalyticsReport
+
+FRAME_ID_COLUMN = "frame_id"
+TIMESTAMP_COLUMN = "timestamp"
+
+
+def time_series_path(json_path: str) -> str:
+    """Return the Parquet time series path belonging to a report JSON path."""
+    return str(Path(json_path).with_suffix(".parquet"))
+
+
+def analytics_key(task_id: uuid.UUID | str, suffix: str) -> str:
+    """Return the object storage key of a task's analytics file.
+
+    Args:
+        task_id: Task the report belongs to.
+        suffix: File suffix, ``.json`` or ``.parquet``.
+
+    Returns:
+        The storage key.
+    """
+    return f"analytics/{task_id}{suffix}"
+
+
+def write_summary(report: AnalyticsReport, json_path: str) -> None:
+    """Write only the JSON summary of a report, without its time series.
+
+    Args:
+        report: Report whose ``meta`` and ``summary`` are written.
+        json_path: Path of the JSON summary.
+    """
+    summary = report.model_copy(update={"time_series": []})
+    Path(json_path).write_text(summary.model_dump_json(indent=2))
+
+
+def _timestamps(frame_ids: np.ndarray, fps: float) -> np.ndarray:
+    if fps <= 0:
+        return np.zeros(len(frame_ids))
+    return np.round(frame_ids / fps, 2)
+
+
+class TimeSeriesWriter:
+    """Stream per-frame class counts to a Parquet file in fixed-size chunks.
+
+    Counts of frames with detections are collected in a preallocated int32
+    buffer of ``chunk_frames`` rows and written out as one row group
+    whenever it fills up, so memory use does not depend on the video length.
+    There is one count column per model class.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        names: dict[int, str],
+        fps: float,
+        chunk_frames: int = 4096,
+    ) -> None:
+        """Open the Parquet file.
+
+        Args:
+            path: Output path.
+            names: Class names by class id; ids must be ``0..len(names)-1``.
+            fps: Frame rate used to derive timestamps.
+            chunk_frames: Frames with detections buffered per row group.
+        """
+        self.path = path
+        self.fps = fps
+        self.classes = [names[i] for i in range(len(names))]
+
+        self._counts = np.zeros((chunk_frames, len(names)), dtype=np.int32)
+        self._frame_ids = np.zeros(chunk_frames, dtype=np.int32)
+        self._rows = 0
+
+        fields = [
+            pa.field(FRAME_ID_COLUMN, pa.int32()),
+            pa.field(TIMESTAMP_COLUMN, pa.float64()),
+        ]
+        fields += [pa.field(name, pa.int32()) for name in self.classes]
+        self._writer = pq.ParquetWriter(path, pa.schema(fields), compression="zstd")
+
+    def add(self, frame_id: int, counts: np.ndarray) -> None:
+        """Record the detections of a frame.
+
+        Args:
+            frame_id: Frame index; must increase from call to call.
+            counts: Detection count per class id.
+        """
+        self._counts[self._rows] = counts
+        self._frame_ids[self._rows] = frame_id
+        self._rows += 1
+        if self._rows == len(self._counts):
+            self._flush()
+
+    def close(self) -> None:
+        """Write the remaining rows and close the file."""
+        self._flush()
+        self._writer.close()
+
+    def __enter__(self) -> "TimeSeriesWriter":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def _flush(self) -> None:
+        if not self._rows:
+            return
+        frame_ids = self._frame_ids[: self._rows]
+        counts = self._counts[: self._rows]
+
+        arrays = [
+            pa.array(frame_ids),
+            pa.array(_timestamps(frame_ids, self.fps)),
+        ]
+        arrays += [pa.array(counts[:, i]) for i in range(len(self.classes))]
+        self._writer.write_table(
+            pa.Table.from_arrays(arrays, schema=self._writer.schema)
+        )
+        self._rows = 0
+
+
+def concat_time_series(
+    paths: list[str], frame_offsets: list[int], fps: float, target: str
+) -> None:
+    """Join Parquet time series of consecutive video segments.
+
+    Frame ids of each input are shifted by its offset and timestamps are
+    recomputed. Inputs are copied one row group at a time, so memory use
+    does not depend on their length. Classes missing from an input get zero
+    counts.
+
+    Args:
+        paths: Time series files in playback order.
+        frame_offsets: Frame id offset of each file.
+        fps: Frame rate used to derive timestamps.
+        target: Output path.
+    """
+    files = [pq.ParquetFile(p) for p in paths]
+    columns: list[str] = []
+    for f in files:
+        columns += [n for n in f.schema_arrow.names if n not in columns]
+    classes = [c for c in columns if c not in (FRAME_ID_COLUMN, TIMESTAMP_COLUMN)]
+
+    fields = [
+        pa.field(FRAME_ID_COLUMN, pa.int32()),
+        pa.field(TIMESTAMP_COLUMN, pa.float64()),
+    ]
+    fields += [pa.field(name, pa.int32()) for name in classes]
+    schema = pa.schema(fields)
+
+    with pq.ParquetWriter(target, schema, compression="zstd") as writer:
+        for f, offset in zip(files, frame_offsets, strict=True):
+            for i in range(f.num_row_groups):
+                group = f.read_row_group(i)
+                frame_ids = group.column(FRAME_ID_COLUMN).to_numpy() + offset
+                zeros = np.zeros(len(group), dtype=np.int32)
+                arrays = [
+                    pa.array(frame_ids, type=pa.int32()),
+                    pa.array(_timestamps(frame_ids, fps)),
+                ]
+                arrays += [
+                    group.column(name)
+                    if name in group.column_names
+                    else pa.array(zeros)
+                    for name in classes
+                ]
+                writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
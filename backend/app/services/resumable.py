@@ -0,0 +1,333 @@
+"""Resumable uploads assembled from checksummed chunks in local storage.
+
+An upload is created with its final size, filled by appending chunks at the
+current offset and completed once all bytes have arrived. The offset is the
+size of the partial file on disk, so a client that lost its connection asks
+for it and continues from there. Each chunk is checked against its SHA-256
+digest before it is written, so the partial file only ever holds verified
+data. The digest of the whole file is kept up to date as chunks arrive and
+stored with the metadata once the last one is in, so completing an upload
+does not read the file again. Uploads without activity for longer than
+their TTL are deleted by ``collect_garbage``.
+
+Partial data and metadata live under ``<upload_dir>/resumable``; API
+replicas must share that directory.
+"""
+
+import asyncio
+import fcntl
+import hashlib
+import os
+import time
+import uuid
+from collections.abc import AsyncIterator, Iterator
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
+
+from backend.app.core.logger import get_logger
+from backend.app.models.task import ProcessingMode
+
+logger = get_logger(__name__)
+
+
+class ResumableUploadError(Exception):
+    """Base exception for resumable upload errors."""
+
+
+class UploadNotFoundError(ResumableUploadError):
+    """Raised when an upload does not exist or was collected."""
+
+
+class UploadBusyError(ResumableUploadError):
+    """Raised when another request is writing to the same upload."""
+
+
+class OffsetMismatchError(ResumableUploadError):
+    """Raised when a chunk does not start at the upload's current offset."""
+
+    def __init__(self, offset: int) -> None:
+        super().__init__(f"Chunk must start at offset {offset}")
+        self.offset = offset
+
+
+class ChunkTooLargeError(ResumableUploadError):
+    """Raised when a chunk exceeds the chunk limit or the declared size."""
+
+
+class ChecksumMismatchError(ResumableUploadError):
+    """Raised when a chunk does not match its SHA-256 digest."""
+
+
+class UploadIncompleteError(ResumableUploadError):
+    """Raised when completing an upload that is missing bytes."""
+
+
+class ResumableUpload(BaseModel):
+    """Metadata of a resumable upload, stored next to its partial data."""
+
+    upload_id: uuid.UUID = Field(default_factory=uuid.uuid4)
+    filename: str
+    size: int
+    mode: ProcessingMode = ProcessingMode.FULL
+    raw_time_series: bool = False
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    sha256: str | None = None
+    """Hex SHA-256 digest of the whole file, set once all bytes arrived."""
+
+
+class ResumableUploadService:
+    """Service managing resumable uploads on the local file system."""
+
+    def __init__(self, upload_dir: str, chunk_max_bytes: int, ttl_seconds: float):
+        """Initialize the service.
+
+        Args:
+            upload_dir: Upload directory; uploads are kept in its
+                ``resumable`` subdirectory.
+            chunk_max_bytes: Largest accepted chunk. Chunks are held in
+                memory until verified.
+            ttl_seconds: Inactivity after which an upload is collected.
+        """
+        self.root = Path(upload_dir) / "resumable"
+        self.chunk_max_bytes = chunk_max_bytes
+        self.ttl_seconds = ttl_seconds
+        # Running digests of the partial files this process appended to,
+        # with the number of bytes each has seen.
+        self._digests: dict[uuid.UUID, tuple[int, hashlib._Hash]] = {}
+
+    def _meta_path(self, upload_id: uuid.UUID) -> Path:
+        return self.root / f"{upload_id}.json"
+
+    def _data_path(self, upload_id: uuid.UUID) -> Path:
+        return self.root / f"{upload_id}.part"
+
+    async def create(self, upload: ResumableUpload) -> ResumableUpload:
+        """Register a new upload with no data yet.
+
+        Args:
+            upload: Metadata of the upload.
+
+        Returns:
+            The registered upload.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._data_path(upload.upload_id).touch(exist_ok=False)
+        self._meta_path(upload.upload_id).write_text(upload.model_dump_json())
+        logger.info(
+            "resumable_upload_created",
+            upload_id=str(upload.upload_id),
+            size=upload.size,
+        )
+        return upload
+
+    async def get(self, upload_id: uuid.UUID) -> tuple[ResumableUpload, int]:
+        """Return an upload and its current offset.
+
+        Raises:
+            UploadNotFoundError: If the upload does not exist.
+        """
+        try:
+            upload = ResumableUpload.model_validate_json(
+                self._meta_path(upload_id).read_text()
+            )
+            offset = self._data_path(upload_id).stat().st_size
+        except FileNotFoundError as e:
+            raise UploadNotFoundError(f"Upload {upload_id} not found") from e
+        return upload, offset
+
+    @contextmanager
+    def _locked(self, upload_id: uuid.UUID) -> Iterator[int]:
+        """Open the partial file, locked against other writers."""
+        try:
+            fd = os.open(self._data_path(upload_id), os.O_WRONLY)
+        except FileNotFoundError as e:
+            raise UploadNotFoundError(f"Upload {upload_id} not found") from e
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError as e:
+                raise UploadBusyError(f"Upload {upload_id} is busy") from e
+            yield fd
+        finally:
+            os.close(fd)
+
+    async def append(
+        self,
+        upload_id: uuid.UUID,
+        offset: int,
+        chunks: AsyncIterator[bytes],
+        sha256: str,
+    ) -> int:
+        """Append a chunk at the upload's current offset.
+
+        The chunk is received completely and verified before anything is
+        written, so a failed or interrupted request leaves the upload as it
+        was.
+
+        Args:
+            upload_id: The upload.
+            offset: Offset the client sends the chunk for.
+            chunks: The chunk's bytes, as received.
+            sha256: Hex SHA-256 digest of the chunk.
+
+        Returns:
+            The new offset.
+
+        Raises:
+            UploadNotFoundError: If the upload does not exist.
+            UploadBusyError: If another chunk is being appended.
+            OffsetMismatchError: If ``offset`` is not the current offset.
+            ChunkTooLargeError: If the chunk is over the chunk limit or runs
+                past the upload's size.
+            ChecksumMismatchError: If the chunk does not match ``sha256``.
+        """
+        upload, _ = await self.get(upload_id)
+        with self._locked(upload_id) as fd:
+            current = os.fstat(fd).st_size
+            if offset != current:
+                raise OffsetMismatchError(current)
+
+            limit = min(self.chunk_max_bytes, upload.size - current)
+            buffer = bytearray()
+            async for chunk in chunks:
+                buffer += chunk
+                if len(buffer) > limit:
+                    raise ChunkTooLargeError(f"Chunk exceeds {limit} bytes")
+
+            if hashlib.sha256(buffer).hexdigest() != sha256.lower():
+                raise ChecksumMismatchError("Chunk does not match its SHA-256")
+            await run_in_threadpool(_write_at, fd, buffer, current)
+
+            offset = current + len(buffer)
+            digest = await self._extend_digest(upload_id, current, buffer)
+            if offset == upload.size:
+                upload.sha256 = digest.hexdigest()
+                self._meta_path(upload_id).write_text(upload.model_dump_json())
+                self._digests.pop(upload_id, None)
+
+        logger.debug(
+            "resumable_upload_appended", upload_id=str(upload_id), offset=offset
+        )
+        return offset
+
+    async def _extend_digest(
+        self, upload_id: uuid.UUID, offset: int, chunk: bytearray
+    ) -> "hashlib._Hash":
+        """Add a chunk written at ``offset`` to the upload's running digest.
+
+        If this process has not seen every byte before ``offset`` (earlier
+        chunks went to another replica, or the process restarted), the
+        digest is rebuilt from the partial file first.
+        """
+        hashed, digest = self._digests.pop(upload_id, (0, None))
+        if offset == 0:
+            digest = hashlib.sha256()
+        elif digest is None or hashed != offset:
+            path = self._data_path(upload_id)
+            digest = await run_in_threadpool(_digest_prefix, path, offset)
+        digest.update(chunk)
+        self._digests[upload_id] = (offset + len(chunk), digest)
+        return digest
+
+    async def complete(self, upload_id: uuid.UUID, target: str) -> ResumableUpload:
+        """Move a fully received upload to ``target`` and forget it.
+
+        Args:
+            upload_id: The upload.
+            target: Path the assembled file is moved to.
+
+        Returns:
+            The upload's metadata, with the digest of the whole file.
+
+        Raises:
+            UploadNotFoundError: If the upload does not exist.
+            UploadBusyError: If a chunk is being appended.
+            UploadIncompleteError: If bytes are missing.
+        """
+        upload, _ = await self.get(upload_id)
+        with self._locked(upload_id) as fd:
+            offset = os.fstat(fd).st_size
+            if offset != upload.size:
+                raise UploadIncompleteError(f"Received {offset} of {upload.size} bytes")
+            if upload.sha256 is None:
+                # Empty uploads, and uploads filled by an earlier version.
+                path = self._data_path(upload_id)
+                digest = await run_in_threadpool(_digest_prefix, path, offset)
+                upload.sha256 = digest.hexdigest()
+            os.replace(self._data_path(upload_id), target)
+        self._meta_path(upload_id).unlink(missing_ok=True)
+        logger.info("resumable_upload_completed", upload_id=str(upload_id))
+        return upload
+
+    async def abort(self, upload_id: uuid.UUID) -> None:
+        """Delete an upload and its partial data.
+
+        Raises:
+            UploadNotFoundError: If the upload does not exist.
+        """
+        await self.get(upload_id)
+        self._remove(upload_id)
+        logger.info("resumable_upload_aborted", upload_id=str(upload_id))
+
+    def _remove(self, upload_id: uuid.UUID) -> None:
+        self._digests.pop(upload_id, None)
+        self._data_path(upload_id).unlink(missing_ok=True)
+        self._meta_path(upload_id).unlink(missing_ok=True)
+
+    def collect_garbage(self) -> int:
+        """Delete uploads without activity for longer than the TTL.
+
+        Returns:
+            Number of uploads deleted.
+        """
+        if not self.root.exists():
+            return 0
+        deadline = time.time() - self.ttl_seconds
+        ids = {p.stem for p in self.root.iterdir() if p.suffix in (".json", ".part")}
+        removed = 0
+        for stem in ids:
+            try:
+                upload_id = uuid.UUID(stem)
+            except ValueError:
+                continue
+            paths = (self._data_path(upload_id), self._meta_path(upload_id))
+            mtimes = [p.stat().st_mtime for p in paths if p.exists()]
+            if mtimes and max(mtimes) < deadline:
+                self._remove(upload_id)
+                removed += 1
+        if removed:
+            logger.info("resumable_uploads_collected", count=removed)
+        return removed
+
+    async def run_garbage_collector(self, interval_seconds: float) -> None:
+        """Collect abandoned uploads every ``interval_seconds``, until cancelled."""
+        while True:
+            try:
+                await run_in_threadpool(self.collect_garbage)
+            except OSError as e:
+                logger.warning("resumable_upload_gc_failed", error=str(e))
+            await asyncio.sleep(interval_seconds)
+
+
+def _digest_prefix(path: Path, length: int) -> "hashlib._Hash":
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while length > 0:
+            block = f.read(min(length, 1 << 20))
+            if not block:
+                break
+            digest.update(block)
+            length -= len(block)
+    return digest
+
+
+def _write_at(fd: int, data: bytearray, offset: int) -> None:
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
@@ -0,0 +1,440 @@
+"""Parallel processing of long videos split into keyframe-aligned segments."""
+
+import math
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from itertools import accumulate
+from pathlib import Path
+
+import billiard
+import supervision as sv
+from billiard.pool import Pool
+
+from backend.app.core.config import settings
+from backend.app.core.logger import get_logger
+from backend.app.models.task import ProcessingMode
+from backend.app.schemas.analytics import (
+    AnalysisSummary,
+    AnalyticsReport,
+    VideoMeta,
+)
+from backend.app.services.detection_cache import (
+    concat_detection_caches,
+    detection_cache_path,
+)
+from backend.app.services.encoder import has_audio_stream
+from backend.app.services.report_files import (
+    concat_time_series,
+    time_series_path,
+    write_summary,
+)
+from backend.app.services.time_buckets import aggregate_time_series
+from backend.app.services.yolo import (
+    ProcessingResult,
+    VideoProcessingError,
+    get_yolo_service,
+)
+
+logger = get_logger(__name__)
+
+# Segment worker pool of this process, kept across tasks so that its
+# children load the model once.
+_pool: Pool | None = None
+_pool_size = 0
+_pool_lock = threading.Lock()
+
+
+def _run_ffmpeg(command: list[str]) -> None:
+    try:
+        subprocess.run(command, check=True, capture_output=True)
+    except subprocess.CalledProcessError as e:
+        message = e.stderr.decode(errors="replace").strip()
+        raise VideoProcessingError(f"ffmpeg failed: {message}") from e
+
+
+def split_video(input_path: str, workdir: str, cut_times: list[float]) -> list[str]:
+    """Split a video into segments without re-encoding.
+
+    The segment muxer cuts at the first keyframe at or after each requested
+    time, so every segment starts on a keyframe and decodes independently.
+    Segments are Matroska files, which hold every video codec the API
+    accepts (MP4 cannot take VP8 or MJPEG without re-encoding). Audio is
+    dropped; ``concat_videos`` takes it from the original file.
+
+    Args:
+        input_path: Path to the source video.
+        workdir: Directory receiving the segment files.
+        cut_times: Requested cut points in seconds.
+
+    Returns:
+        Segment paths in playback order.
+
+    Raises:
+        VideoProcessingError: If ffmpeg fails.
+    """
+    pattern = str(Path(workdir) / "segment_%04d.mkv")
+    _run_ffmpeg(
+        [
+            "ffmpeg",
+            "-y",
+            "-loglevel",
+            "error",
+            "-i",
+            input_path,
+            "-map",
+            "0:v:0",
+            "-an",
+            "-c",
+            "copy",
+            "-f",
+            "segment",
+            "-segment_times",
+            ",".join(f"{t:.3f}" for t in cut_times),
+            "-reset_timestamps",
+            "1",
+            pattern,
+        ]
+    )
+    return sorted(str(p) for p in Path(workdir).glob("segment_*.mkv"))
+
+
+def concat_videos(paths: list[str], output_path: str, audio_source: str) -> None:
+    """Join encoded segments into one video without re-encoding them.
+
+    The audio track of ``audio_source``, if it has one, is encoded to AAC
+    alongside, as ``FfmpegPipeWriter`` does, since MP4 cannot hold every
+    audio codec of the accepted inputs (e.g. Vorbis).
+
+    Args:
+        paths: Segment videos in playback order, all with the same codec
+            parameters.
+        output_path: Path of the joined video.
+        audio_source: Original video whose audio is muxed into the output.
+
+    Raises:
+        VideoProcessingError: If ffmpeg fails.
+    """
+    list_path = Path(output_path).with_suffix(".concat.txt")
+    list_path.write_text("".join(f"file '{Path(p).resolve()}'\n" for p in paths))
+
+    command = ["ffmpeg", "-y", "-loglevel", "error"]
+    command += ["-f", "concat", "-safe", "0", "-i", str(list_path)]
+    if has_audio_stream(audio_source):
+        command += ["-i", audio_source, "-map", "0:v:0", "-map", "1:a:0"]
+        command += ["-c:a", "aac"]
+    command += ["-c:v", "copy", output_path]
+
+    try:
+        _run_ffmpeg(command)
+    finally:
+        list_path.unlink(missing_ok=True)
+
+
+def merge_reports(results: list[ProcessingResult], filename: str) -> AnalyticsReport:
+    """Combine per-segment reports into a report for the whole video.
+
+    Counts are summed. Frame totals are the frames each segment actually
+    decoded, as used to shift its frame ids, rather than the containers'
+    frame counts. Segment reports carry no time series;
+    ``concat_time_series`` joins their per-frame files instead.
+
+    Args:
+        results: Segment results in playback order.
+        filename: Original filename.
+
+    Returns:
+        The merged report.
+    """
+    fps = results[0].report.meta.fps
+    counts: Counter[str] = Counter()
+    skipped_frames = 0.0
+    offset = 0
+
+    for result in results:
+        report = result.report
+        counts.update(report.summary.class_distribution)
+        skipped_frames += report.summary.skipped_frames_ratio * result.processed_frames
+        offset += result.processed_frames
+
+    most_common = counts.most_common(1)
+    return AnalyticsReport(
+        meta=VideoMeta(
+            source_filename=filename,
+            fps=fps,
+            total_frames=offset,
+            resolution=results[0].report.meta.resolution,
+            duration_seconds=round(offset / fps, 2) if fps > 0 else 0.0,
+        ),
+        summary=AnalysisSummary(
+            total_detections=sum(counts.values()),
+            unique_classes=list(counts.keys()),
+            dominant_class=most_common[0][0] if most_common else None,
+            class_distribution=dict(counts),
+            skipped_frames_ratio=round(skipped_frames / offset, 4) if offset else 0.0,
+        ),
+        time_series=[],
+    )
+
+
+def _init_segment_worker(threads: int) -> None:
+    """Limit intra-op threads and load the model in a segment worker."""
+    import torch
+
+    # Without this every worker would start one thread per core.
+    torch.set_num_threads(threads)
+    get_yolo_service()
+
+
+def _process_segment(
+    segment_path: str,
+    output_path: str,
+    conf: float,
+    mode: ProcessingMode,
+    cache_path: str | None,
+) -> ProcessingResult:
+    # Segment cuts do not fall on bucket boundaries, so the parent rebuilds
+    # the buckets from the joined per-frame series.
+    return get_yolo_service().process_video(
+        segment_path,
+        output_path,
+        conf=conf,
+        mode=mode,
+        raw_time_series=True,
+        detection_cache=cache_path,
+    )
+
+
+def get_segment_pool(workers: int) -> Pool:
+    """Get the segment worker pool of this process, starting it on first use.
+
+    The pool comes from ``billiard``, Celery's fork of ``multiprocessing``:
+    Celery pool processes are daemonic, and the standard library refuses to
+    start children from a daemonic process. Spawning (rather than forking)
+    keeps the children clear of the parent's threads and its already
+    initialized inference runtime. Each child loads the model once, when it
+    starts, and then serves the segments of every later task.
+
+    Args:
+        workers: Number of worker processes. A pool of another size is
+            closed and replaced.
+
+    Returns:
+        The shared ``billiard`` pool.
+    """
+    global _pool, _pool_size
+    with _pool_lock:
+        pool = _pool
+        if pool is not None and _pool_size != workers:
+            pool.close()
+            pool.join()
+            pool = None
+        if pool is None:
+            threads = max(1, (os.cpu_count() or 1) // workers)
+            context = billiard.get_context("spawn")
+            pool = context.Pool(
+                workers, initializer=_init_segment_worker, initargs=(threads,)
+            )
+            logger.info("segment_pool_started", workers=workers, threads=threads)
+        _pool, _pool_size = pool, workers
+        return pool
+
+
+def close_segment_pool() -> None:
+    """Stop the segment worker pool of this process, if one was started."""
+    global _pool, _pool_size
+    with _pool_lock:
+        pool, _pool, _pool_size = _pool, None, 0
+    if pool is not None:
+        pool.close()
+        pool.join()
+
+
+def _run_segments(
+    segments: list[str],
+    outputs: list[str],
+    workers: int,
+    conf: float,
+    mode: ProcessingMode,
+    caches: list[str] | None = None,
+) -> list[ProcessingResult]:
+    """Process segments in the process's segment worker pool.
+
+    With ``caches``, each segment writes its detection cache to the path
+    at its position.
+
+    Args:
+        segments: Paths of the segment videos.
+        outputs: Output video path of each segment.
+        workers: Size of the worker pool, see ``get_segment_pool``.
+        conf: Confidence threshold for detections.
+        mode: Processing mode of every segment.
+        caches: Detection cache path of each segment, if any.
+
+    Returns:
+        The segments' results, in segment order.
+
+    Raises:
+        VideoProcessingError: If the pool has been closed.
+    """
+    cache_paths = caches or [None] * len(segments)
+    jobs = [
+        (segment, out, conf, mode, cache)
+        for segment, out, cache in zip(segments, outputs, cache_paths, strict=True)
+    ]
+    # billiard returns None instead of raising once the pool is closed.
+    results = get_segment_pool(workers).starmap(_process_segment, jobs)
+    if results is None:
+        raise VideoProcessingError("Segment worker pool is closed")
+    return results
+
+
+def process_video_segmented(
+    input_path: str,
+    output_path: str,
+    workers: int,
+    conf: float = 0.25,
+    mode: ProcessingMode = ProcessingMode.FULL,
+    raw_time_series: bool = False,
+    detection_cache: str | None = None,
+    on_report: Callable[[ProcessingResult], None] | None = None,
+) -> ProcessingResult:
+    """Process a video by splitting it into segments handled in parallel.
+
+    The video is cut into up to ``workers`` keyframe-aligned segments of at
+    least ``settings.SEGMENT_MIN_SECONDS`` each. Every segment runs through
+    ``YoloService.process_video`` in its own process; the segment reports are
+    merged, their per-frame series joined and aggregated into time buckets
+    and, in ``FULL`` mode, the annotated segments are concatenated.
+    Videos too short for two segments, or that cannot be split, are
+    processed in the calling process.
+
+    Args:
+        input_path: Path to the input video file.
+        output_path: Path for the output annotated video.
+        workers: Maximum number of segments processed at once.
+        conf: Confidence threshold for detections.
+        mode: Processing mode, as for ``YoloService.process_video``.
+        raw_time_series: Keep the joined per-frame series next to the
+            summary, as for ``YoloService.process_video``.
+        detection_cache: Path to write the raw detections to, as for
+            ``YoloService.process_video``; the segments' caches are joined.
+        on_report: Called with the result once the merged report is written,
+            before the annotated segments are concatenated, as for
+            ``YoloService.process_video``.
+
+    Returns:
+        The merged report and the files written for it, as for
+        ``YoloService.process_video``.
+
+    Raises:
+        FileNotFoundError: If input video doesn't exist.
+        VideoProcessingError: If splitting, processing or joining fails.
+    """
+    if not Path(input_path).exists():
+        raise FileNotFoundError(f"Input video not found: {input_path}")
+
+    info = sv.VideoInfo.from_video_path(input_path)
+    duration = (info.total_frames or 0) / info.fps if info.fps > 0 else 0.0
+    count = min(workers, math.floor(duration / settings.SEGMENT_MIN_SECONDS))
+    if count < 2:
+        return get_yolo_service().process_video(
+            input_path,
+            output_path,
+            conf=conf,
+            mode=mode,
+            raw_time_series=raw_time_series,
+            detection_cache=detection_cache,
+            on_report=on_report,
+        )
+
+    out_p = Path(output_path)
+    json_output_path = out_p.with_suffix(".json")
+    cut_times = [duration * i / count for i in range(1, count)]
+    logger.info("segmented_processing_started", segments=count, duration=duration)
+
+    timings: dict[str, float] = {}
+    with tempfile.TemporaryDirectory(dir=out_p.parent) as workdir:
+        start = time.perf_counter()
+        try:
+            segments = split_video(input_path, workdir, cut_times)
+        except VideoProcessingError as e:
+            # Nothing has been processed yet, so the whole file can still
+            # go through a single process.
+            logger.warning("segment_split_failed", error=str(e))
+            return get_yolo_service().process_video(
+                input_path,
+                output_path,
+                conf=conf,
+                mode=mode,
+                raw_time_series=raw_time_series,
+                detection_cache=detection_cache,
+                on_report=on_report,
+            )
+        outputs = [str(Path(s).with_name(f"out_{Path(s).stem}.mp4")) for s in segments]
+        caches = None
+        if detection_cache is not None:
+            caches = [detection_cache_path(out) for out in outputs]
+        timings["split"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        try:
+            results = _run_segments(segments, outputs, workers, conf, mode, caches)
+        except VideoProcessingError:
+            raise
+        except Exception as e:
+            raise VideoProcessingError(f"Segment processing failed: {e}") from e
+        timings["segments"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        report = merge_reports(results, Path(input_path).name)
+        # Shift by the frames each segment decoded, as the detection caches
+        # are, not by the containers' frame counts.
+        offsets = accumulate((r.processed_frames for r in results[:-1]), initial=0)
+        series_path = time_series_path(str(json_output_path))
+        if not raw_time_series:
+            series_path = str(Path(workdir) / "series.parquet")
+        concat_time_series(
+            [time_series_path(r.json_path) for r in results],
+            list(offsets),
+            report.meta.fps,
+            series_path,
+        )
+        report.bucket_seconds = settings.TIME_BUCKET_SECONDS
+        report.time_buckets = aggregate_time_series(
+            series_path,
+            report.meta.fps,
+            settings.TIME_BUCKET_SECONDS,
+            report.meta.total_frames,
+        )
+        write_summary(report, str(json_output_path))
+        if caches is not None and detection_cache is not None:
+            concat_detection_caches(caches, detection_cache)
+        timings["merge"] = time.perf_counter() - start
+
+        result = ProcessingResult(
+            report=report,
+            json_path=str(json_output_path),
+            video_path=output_path if mode == ProcessingMode.FULL else None,
+            time_series_path=series_path if raw_time_series else None,
+            processed_frames=report.meta.total_frames,
+            timings=timings,
+        )
+        if on_report is not None:
+            on_report(result)
+
+        if mode == ProcessingMode.FULL:
+            start = time.perf_counter()
+            concat_videos(outputs, output_path, input_path)
+            timings["concat"] = time.perf_counter() - start
+
+    logger.info(
+        "segmented_processing_finished",
+        segments=len(segments),
+        frames=report.meta.total_frames,
+    )
+    return result
@@ -0,0 +1,207 @@
+"""Staging of task inputs from object storage into a worker's scratch directory.
+
+Tasks carry the object key of their input video instead of a local path, so
+any worker node can run them. Each worker keeps inputs and outputs in a
+local scratch directory. While a pool process works on one task, the
+worker's main process downloads the input of the next task it has reserved
+(``InputPrefetcher``), and ``stage_input`` picks the file up when that task
+starts instead of downloading it again.
+
+A download is written to ``<path>.part`` and renamed into place when done.
+Creating the ``.part`` file exclusively claims the download, so the
+prefetcher and the pool process never fetch the same input twice. A claim
+whose file has not grown for ``PREFETCH_STALE_SECONDS`` was left behind by
+a process that died; the task then downloads its input on its own.
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from backend.app.core.logger import get_logger
+from backend.app.services.file import FileService
+
+logger = get_logger(__name__)
+
+# Interval at which a task waiting for a prefetch in progress checks on it.
+PREFETCH_POLL_INTERVAL = 0.2
+
+# Seconds without writes after which a claimed download counts as abandoned.
+PREFETCH_STALE_SECONDS = 30.0
+
+
+def input_key(task_id: str, file_ext: str) -> str:
+    """Return the object storage key of a task's input video.
+
+    Args:
+        task_id: Task (or direct upload) id.
+        file_ext: Extension of the video, including the dot.
+
+    Returns:
+        The storage key.
+    """
+    return f"uploads/{task_id}{file_ext}"
+
+
+def scratch_paths(scratch_dir: str, task_id: str, key: str) -> tuple[str, str]:
+    """Return the local input and output video paths of a task.
+
+    Args:
+        scratch_dir: The worker's scratch directory.
+        task_id: The task id.
+        key: Object storage key of the input video.
+
+    Returns:
+        The input path and the output video path. Report files are written
+        next to the output video.
+    """
+    root = Path(scratch_dir)
+    input_path = root / f"{task_id}.input{Path(key).suffix}"
+    return str(input_path), str(root / f"{task_id}.mp4")
+
+
+def _part_path(path: str) -> str:
+    return f"{path}.part"
+
+
+def _claim(path: str) -> bool:
+    """Claim the download of ``path``; False if it exists or is claimed."""
+    if os.path.exists(path):
+        return False
+    try:
+        os.close(os.open(_part_path(path), os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except FileExistsError:
+        return False
+    return True
+
+
+def _is_abandoned(path: str) -> bool:
+    """Whether the claim on ``path`` has seen no writes for a while."""
+    try:
+        mtime = os.stat(_part_path(path)).st_mtime
+    except FileNotFoundError:
+        return False
+    return time.time() - mtime > PREFETCH_STALE_SECONDS
+
+
+async def _download(
+    file_service: FileService, key: str, path: str, part: str | None = None
+) -> None:
+    """Download an input to ``part`` and move it into place.
+
+    ``part`` defaults to the claimed ``.part`` file of ``path``.
+    """
+    part = part or _part_path(path)
+    try:
+        await file_service.download_file_from_s3(key, part)
+        os.replace(part, path)
+    finally:
+        Path(part).unlink(missing_ok=True)
+
+
+async def _take_over(file_service: FileService, key: str, path: str) -> None:
+    """Download an input whose claim was abandoned, then drop the claim.
+
+    The download goes to a file of its own rather than the claimed one, so
+    a claim holder that was only slow cannot interleave its writes with it.
+    """
+    fd, part = tempfile.mkstemp(
+        dir=Path(path).parent, prefix=f"{Path(path).name}.", suffix=".part"
+    )
+    os.close(fd)
+    await _download(file_service, key, path, part)
+    Path(_part_path(path)).unlink(missing_ok=True)
+
+
+async def stage_input(
+    file_service: FileService, key: str, path: str, timeout: float
+) -> None:
+    """Make a task's input video available at ``path``.
+
+    Uses the file prefetched for the task if there is one, waits for a
+    prefetch in progress and otherwise downloads the video. A prefetch
+    whose file has stopped growing is given up on and the video is
+    downloaded directly.
+
+    Args:
+        file_service: Service used for the download.
+        key: Object storage key of the input video.
+        path: Local path of the input video.
+        timeout: Seconds to wait for a prefetch in progress.
+
+    Raises:
+        TimeoutError: If a prefetch in progress does not finish in time.
+        S3DownloadError: If the download fails.
+    """
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(path):
+        if _claim(path):
+            await _download(file_service, key, path)
+            logger.info("input_downloaded", key=key)
+            return
+        if _is_abandoned(path):
+            logger.warning("input_prefetch_abandoned", key=key)
+            await _take_over(file_service, key, path)
+            logger.info("input_downloaded", key=key)
+            return
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Prefetch of {key} did not finish in time")
+        await asyncio.sleep(PREFETCH_POLL_INTERVAL)
+    logger.info("input_prefetch_hit", key=key)
+
+
+class InputPrefetcher:
+    """Download inputs of reserved tasks in the background.
+
+    Runs in the Celery worker's main process, which receives and reserves
+    tasks before handing them to pool processes. Downloads run one at a time
+    on a background thread. A download is skipped if its task has started
+    or finished by the time its turn comes; the task then fetches its own
+    input.
+    """
+
+    def __init__(self, file_service_factory: Callable[[], FileService]) -> None:
+        """Initialize the prefetcher.
+
+        Args:
+            file_service_factory: Returns the service used for downloads.
+        """
+        self.file_service_factory = file_service_factory
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="input-prefetch"
+        )
+
+    def submit(self, key: str, path: str, is_pending: Callable[[], bool]) -> None:
+        """Queue the download of a reserved task's input.
+
+        Args:
+            key: Object storage key of the input video.
+            path: Local path the task will read the input from.
+            is_pending: Returns whether the task is still waiting to start.
+        """
+        self._executor.submit(self._prefetch, key, path, is_pending)
+
+    def shutdown(self) -> None:
+        """Drop queued downloads and wait for the running one."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _prefetch(self, key: str, path: str, is_pending: Callable[[], bool]) -> None:
+        if not is_pending():
+            return
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        if not _claim(path):
+            return
+        start = time.perf_counter()
+        try:
+            asyncio.run(_download(self.file_service_factory(), key, path))
+        except Exception as e:
+            logger.warning("input_prefetch_failed", key=key, error=str(e))
+            return
+        logger.info(
+            "input_prefetched", key=key, seconds=round(time.perf_counter() - start, 3)
+        )
@@ -1,8 +1,10 @@
 import uuid
 
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import col, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from backend.app.models.task import Task, TaskStatus
+from backend.app.models.task import ProcessingMode, Task, TaskStatus
 
 
 class TaskService:
@@ -16,21 +18,81 @@ class TaskService:
         """
         self.session = session
 
-    async def create_task(self, filename: str) -> Task:
+    async def create_task(
+        self,
+        filename: str,
+        mode: ProcessingMode = ProcessingMode.FULL,
+        raw_time_series: bool = False,
+    ) -> Task:
         """Create a new processing task.
 
         Args:
             filename: Original filename of the uploaded video.
+            mode: Processing mode requested for the video.
+            raw_time_series: Whether the per-frame time series is kept.
 
         Returns:
             The created task.
         """
-        task = Task(input_filename=filename)
+        task = Task(input_filename=filename, mode=mode, raw_time_series=raw_time_series)
         self.session.add(task)
         await self.session.commit()
         await self.session.refresh(task)
         return task
 
+    async def create_upload_task(
+        self,
+        upload_id: uuid.UUID,
+        filename: str,
+        mode: ProcessingMode = ProcessingMode.FULL,
+        raw_time_series: bool = False,
+    ) -> tuple[Task, bool]:
+        """Create the task of a direct upload, unless it already has one.
+
+        Args:
+            upload_id: The direct upload.
+            filename: Original filename of the uploaded video.
+            mode: Processing mode requested for the video.
+            raw_time_series: Whether the per-frame time series is kept.
+
+        Returns:
+            The upload's task and whether it was created by this call.
+        """
+        existing = await self.get_task_by_upload(upload_id)
+        if existing is not None:
+            return existing, False
+
+        task = Task(
+            input_filename=filename,
+            mode=mode,
+            raw_time_series=raw_time_series,
+            upload_id=upload_id,
+        )
+        self.session.add(task)
+        try:
+            await self.session.commit()
+        except IntegrityError:
+            # A concurrent request created the upload's task first.
+            await self.session.rollback()
+            existing = await self.get_task_by_upload(upload_id)
+            if existing is None:
+                raise
+            return existing, False
+        await self.session.refresh(task)
+        return task, True
+
+    async def get_task_by_upload(self, upload_id: uuid.UUID) -> Task | None:
+        """Retrieve the task confirmed from a direct upload.
+
+        Args:
+            upload_id: The direct upload.
+
+        Returns:
+            The task if found, None otherwise.
+        """
+        query = select(Task).where(Task.upload_id == upload_id)
+        return (await self.session.exec(query)).first()
+
     async def get_task(self, task_id: uuid.UUID) -> Task | None:
         """Retrieve a task by its ID.
 
@@ -42,6 +104,71 @@ class TaskService:
         """
         return await self.session.get(Task, task_id)
 
+    async def deduplicate(
+        self, task: Task, content_hash: str, dedupe_key: str, reuse: bool = True
+    ) -> Task | None:
+        """Record a task's content and complete it from an earlier result.
+
+        An earlier task qualifies if it completed with the same dedupe key,
+        produced its results itself and, if the task asks for the per-frame
+        time series, kept one. The lookup goes through the index on
+        ``content_hash``.
+
+        Args:
+            task: The queued task.
+            content_hash: Hex SHA-256 digest of the task's video.
+            dedupe_key: The task's dedupe key (see ``services.dedupe``).
+            reuse: Look for an earlier result; if False the content is only
+                recorded.
+
+        Returns:
+            The task whose result was reused, or None if the task still has
+            to be processed.
+        """
+        task.content_hash = content_hash
+        task.dedupe_key = dedupe_key
+
+        source = None
+        if reuse:
+            query = (
+                select(Task)
+                .where(
+                    Task.content_hash == content_hash,
+                    Task.dedupe_key == dedupe_key,
+                    Task.status == TaskStatus.COMPLETED,
+                    col(Task.source_task_id).is_(None),
+                    Task.id != task.id,
+                )
+                .order_by(col(Task.created_at).desc())
+                .limit(1)
+            )
+            if task.raw_time_series:
+                query = query.where(col(Task.raw_time_series).is_(True))
+            source = (await self.session.exec(query)).first()
+
+        if source is not None:
+            task.status = TaskStatus.COMPLETED
+            task.result_url = source.result_url
+            task.source_task_id = source.id
+        self.session.add(task)
+        await self.session.commit()
+        return source
+
+    async def record_input(
+        self, task: Task, input_key: str | None, content_hash: str | None
+    ) -> None:
+        """Record where a task's video is stored and its content hash.
+
+        Args:
+            task: The task to update.
+            input_key: Object storage key of the video, if known.
+            content_hash: Hex SHA-256 digest of the video, if known.
+        """
+        task.input_key = input_key or task.input_key
+        task.content_hash = content_hash or task.content_hash
+        self.session.add(task)
+        await self.session.commit()
+
     async def mark_processing(self, task: Task) -> None:
         """Mark a task as currently processing.
 
@@ -57,7 +184,8 @@ class TaskService:
 
         Args:
             task: The task to update.
-            result_url: S3 key or URL of the result video.
+            result_url: S3 key or URL of the result video, or of the
+                analytics report for analytics-only tasks.
         """
         task.status = TaskStatus.COMPLETED
         task.result_url = result_url
@@ -0,0 +1,165 @@
+"""Aggregation of per-frame class counts into fixed-length time buckets."""
+
+from collections.abc import Sequence
+
+import numpy as np
+import pyarrow.parquet as pq
+
+from backend.app.schemas.analytics import TimeBucket
+from backend.app.services.report_files import FRAME_ID_COLUMN, TIMESTAMP_COLUMN
+
+
+class TimeBucketAggregator:
+    """Reduce a stream of per-frame class counts to per-bucket statistics.
+
+    Frames are grouped into buckets of ``bucket_seconds``; for each bucket
+    with detections the maximum, mean and sum of every class's per-frame
+    count are kept. The mean is taken over all frames of the bucket,
+    including frames without detections. Per-class totals and the frame in
+    which each class first appeared are tracked for the report summary.
+    Memory use grows with the number of buckets, not frames.
+    """
+
+    def __init__(self, classes: list[str], fps: float, bucket_seconds: float) -> None:
+        """Initialize the aggregator.
+
+        Args:
+            classes: Class name of every count column, by class id.
+            fps: Frame rate of the video.
+            bucket_seconds: Bucket length in seconds.
+        """
+        self.classes = classes
+        self.fps = fps
+        self.bucket_seconds = bucket_seconds
+        self.bucket_frames = max(1, round(bucket_seconds * fps))
+        self.frames = 0
+        self.totals = np.zeros(len(classes), dtype=np.int64)
+        self.first_seen = np.full(len(classes), -1, dtype=np.int64)
+        self.buckets: list[TimeBucket] = []
+
+        self._index = -1
+        self._sum = np.zeros(len(classes), dtype=np.int64)
+        self._max = np.zeros(len(classes), dtype=np.int64)
+
+    def add(self, class_ids: Sequence[int] | np.ndarray | None) -> np.ndarray | None:
+        """Count the detections of the next frame.
+
+        Args:
+            class_ids: Class id of every detection in the frame, if any.
+
+        Returns:
+            The frame's count per class id, or None if it has no detections.
+        """
+        frame_id = self.frames
+        self.frames += 1
+        if class_ids is None or not len(class_ids):
+            return None
+
+        counts = np.bincount(class_ids, minlength=len(self.classes))
+        self._accumulate(frame_id // self.bucket_frames, counts, counts)
+        self.totals += counts
+        self.first_seen[(self.first_seen < 0) & (counts > 0)] = frame_id
+        return counts
+
+    def add_rows(self, frame_ids: np.ndarray, counts: np.ndarray) -> None:
+        """Add counts of frames given out of the per-frame stream.
+
+        Args:
+            frame_ids: Ascending ids of frames with detections.
+            counts: Matching rows of counts, one column per class.
+        """
+        if not len(frame_ids):
+            return
+        index = frame_ids // self.bucket_frames
+        starts = np.flatnonzero(np.r_[True, index[1:] != index[:-1]])
+        sums = np.add.reduceat(counts, starts, axis=0)
+        maxes = np.maximum.reduceat(counts, starts, axis=0)
+        for i, bucket_sum, bucket_max in zip(
+            index[starts].tolist(), sums, maxes, strict=True
+        ):
+            self._accumulate(i, bucket_sum, bucket_max)
+
+        self.totals += sums.sum(axis=0)
+        present = counts > 0
+        new = (self.first_seen < 0) & present.any(axis=0)
+        self.first_seen[new] = frame_ids[present.argmax(axis=0)[new]]
+
+    def finish(self, total_frames: int | None = None) -> list[TimeBucket]:
+        """Close the last bucket and return all buckets with detections.
+
+        Args:
+            total_frames: Number of frames in the video. Defaults to the
+                number of frames passed to ``add``.
+
+        Returns:
+            Buckets in time order.
+        """
+        self._emit()
+        total_frames = self.frames if total_frames is None else total_frames
+        if self.buckets and self._index >= 0:
+            # Only the video's last bucket can be shorter than the rest.
+            frames = total_frames - self._index * self.bucket_frames
+            last = self.buckets[-1]
+            if 0 < frames < last.frames:
+                last.frames = frames
+                last.mean = {n: round(s / frames, 3) for n, s in last.sum.items()}
+        return self.buckets
+
+    def _accumulate(self, index: int, counts: np.ndarray, maxes: np.ndarray) -> None:
+        if index != self._index:
+            self._emit()
+            self._index = index
+        self._sum += counts
+        np.maximum(self._max, maxes, out=self._max)
+
+    def _emit(self) -> None:
+        if self._index < 0 or not self._sum.any():
+            return
+        present = np.flatnonzero(self._sum).tolist()
+        start = self._index * self.bucket_frames
+        self.buckets.append(
+            TimeBucket(
+                start=round(start / self.fps, 2) if self.fps > 0 else 0.0,
+                frames=self.bucket_frames,
+                max={self.classes[c]: int(self._max[c]) for c in present},
+                mean={
+                    self.classes[c]: round(int(self._sum[c]) / self.bucket_frames, 3)
+                    for c in present
+                },
+                sum={self.classes[c]: int(self._sum[c]) for c in present},
+            )
+        )
+        self._sum[:] = 0
+        self._max[:] = 0
+
+
+def aggregate_time_series(
+    parquet_path: str, fps: float, bucket_seconds: float, total_frames: int
+) -> list[TimeBucket]:
+    """Aggregate a Parquet per-frame time series into time buckets.
+
+    The file is read one row group at a time.
+
+    Args:
+        parquet_path: Time series written by ``TimeSeriesWriter``.
+        fps: Frame rate of the video.
+        bucket_seconds: Bucket length in seconds.
+        total_frames: Number of frames in the video.
+
+    Returns:
+        Buckets with detections, in time order.
+    """
+    source = pq.ParquetFile(parquet_path)
+    classes = [
+        n
+        for n in source.schema_arrow.names
+        if n not in (FRAME_ID_COLUMN, TIMESTAMP_COLUMN)
+    ]
+    if not classes:
+        return []
+    aggregator = TimeBucketAggregator(classes, fps, bucket_seconds)
+    for i in range(source.num_row_groups):
+        group = source.read_row_group(i)
+        counts = np.column_stack([group.column(name).to_numpy() for name in classes])
+        aggregator.add_rows(group.column(FRAME_ID_COLUMN).to_numpy(), counts)
+    return aggregator.finish(total_frames)
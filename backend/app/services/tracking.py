@@ -0,0 +1,94 @@
+"""Cheap box propagation between keyframes using sparse optical flow."""
+
+import dataclasses
+
+import cv2
+import numpy as np
+import supervision as sv
+
+
+class BoxPropagator:
+    """Carry detections from a keyframe across the following frames.
+
+    Each box is moved by the median Lucas-Kanade optical flow of a small grid
+    of points sampled inside it. Flow is computed on downscaled grayscale
+    frames, which costs a small fraction of a detector forward pass. Class
+    ids and confidences are kept from the keyframe.
+    """
+
+    def __init__(self, scale: float = 0.5, grid_size: int = 4) -> None:
+        """Initialize the propagator.
+
+        Args:
+            scale: Downscale factor applied to frames before computing flow.
+            grid_size: Number of sample points per box side.
+        """
+        self.scale = scale
+        fractions = (np.arange(grid_size) + 0.5) / grid_size
+        grid_x, grid_y = np.meshgrid(fractions, fractions)
+        self._grid_x = grid_x.ravel()
+        self._grid_y = grid_y.ravel()
+
+        self._prev_gray: np.ndarray | None = None
+        self._detections: sv.Detections = sv.Detections.empty()
+
+    def reset(self, frame: np.ndarray, detections: sv.Detections) -> None:
+        """Start propagating from a new keyframe.
+
+        Args:
+            frame: The keyframe.
+            detections: Detector output for the keyframe.
+        """
+        self._prev_gray = self._prepare(frame)
+        self._detections = detections
+
+    def propagate(self, frame: np.ndarray) -> sv.Detections:
+        """Estimate detections for the next frame.
+
+        Args:
+            frame: The frame following the previous keyframe or propagated
+                frame.
+
+        Returns:
+            Detections shifted by the estimated motion of each box.
+        """
+        gray = self._prepare(frame)
+        prev_gray, self._prev_gray = self._prev_gray, gray
+
+        if prev_gray is None or len(self._detections) == 0:
+            return self._detections
+
+        xyxy = self._detections.xyxy * self.scale
+        points = self._sample_points(xyxy)
+        next_points, status, _ = cv2.calcOpticalFlowPyrLK(
+            prev_gray, gray, points, points.copy(), winSize=(15, 15), maxLevel=2
+        )
+
+        samples = len(self._grid_x)
+        flow = (next_points - points).reshape(len(xyxy), samples, 2)
+        tracked = status.reshape(len(xyxy), samples).astype(bool)
+
+        shifts = np.zeros((len(xyxy), 2), dtype=np.float32)
+        for i in range(len(xyxy)):
+            if tracked[i].any():
+                shifts[i] = np.median(flow[i][tracked[i]], axis=0)
+
+        height, width = frame.shape[:2]
+        moved = self._detections.xyxy + np.tile(shifts / self.scale, 2)
+        moved[:, [0, 2]] = moved[:, [0, 2]].clip(0, width)
+        moved[:, [1, 3]] = moved[:, [1, 3]].clip(0, height)
+
+        self._detections = dataclasses.replace(self._detections, xyxy=moved)
+        return self._detections
+
+    def _prepare(self, frame: np.ndarray) -> np.ndarray:
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(
+            gray, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA
+        )
+
+    def _sample_points(self, xyxy: np.ndarray) -> np.ndarray:
+        x1, y1, x2, y2 = xyxy.T
+        xs = x1[:, None] + (x2 - x1)[:, None] * self._grid_x[None, :]
+        ys = y1[:, None] + (y2 - y1)[:, None] * self._grid_y[None, :]
+        return np.stack([xs, ys], axis=-1).reshape(-1, 1, 2).astype(np.float32)
@@ -0,0 +1,103 @@
+"""Cache of presigned URLs, so polling clients do not cause re-signing."""
+
+import time
+from collections import OrderedDict
+from typing import Any
+
+import structlog
+from redis.exceptions import RedisError
+
+logger = structlog.get_logger(__name__)
+
+REDIS_KEY_PREFIX = "presigned_url:"
+
+
+class PresignedUrlCache:
+    """Bounded in-process cache of presigned URLs, optionally backed by Redis.
+
+    A URL is kept for ``reuse_fraction`` of the lifetime it was signed for,
+    so every URL handed out stays valid for at least the remaining part of
+    that lifetime and an expired URL is never returned. Entries are evicted
+    least recently used first once ``max_entries`` is reached. With a Redis
+    client, URLs are shared between processes under a Redis expiry; Redis
+    errors are logged and treated as misses.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        reuse_fraction: float = 0.5,
+        redis: Any = None,
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            max_entries: URLs kept in process.
+            reuse_fraction: Part of a URL's lifetime during which it is
+                reused, between 0 and 1.
+            redis: Optional ``redis.asyncio`` client, owned by the caller.
+
+        Raises:
+            ValueError: If ``reuse_fraction`` is not between 0 and 1.
+        """
+        if not 0 < reuse_fraction < 1:
+            raise ValueError("reuse_fraction must be between 0 and 1")
+        self.max_entries = max_entries
+        self.reuse_fraction = reuse_fraction
+        self.redis = redis
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+
+    async def get(self, key: str) -> str | None:
+        """Return the cached URL for a key, if it may still be handed out.
+
+        Args:
+            key: Cache key of the URL.
+
+        Returns:
+            The URL, or None on a miss.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            url, deadline = entry
+            if time.monotonic() < deadline:
+                self._entries.move_to_end(key)
+                return url
+            del self._entries[key]
+
+        if self.redis is None:
+            return None
+        try:
+            url = await self.redis.get(REDIS_KEY_PREFIX + key)
+            ttl_ms = await self.redis.pttl(REDIS_KEY_PREFIX + key)
+        except RedisError as e:
+            logger.warning("presigned_url_cache_redis_failed", error=str(e))
+            return None
+        # A negative TTL means the key expired in between or never expires.
+        if url is None or ttl_ms <= 0:
+            return None
+        url = url.decode() if isinstance(url, bytes) else url
+        self._store(key, url, ttl_ms / 1000)
+        return url
+
+    async def set(self, key: str, url: str, expires_in: float) -> None:
+        """Cache a freshly signed URL.
+
+        Args:
+            key: Cache key of the URL.
+            url: The presigned URL.
+            expires_in: Seconds the URL was signed to stay valid for.
+        """
+        ttl = expires_in * self.reuse_fraction
+        self._store(key, url, ttl)
+        if self.redis is None or ttl < 1:
+            return
+        try:
+            await self.redis.set(REDIS_KEY_PREFIX + key, url, ex=int(ttl))
+        except RedisError as e:
+            logger.warning("presigned_url_cache_redis_failed", error=str(e))
+
+    def _store(self, key: str, url: str, ttl: float) -> None:
+        self._entries[key] = (url, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
@@ -1,18 +1,26 @@
-import json
+import asyncio
 import uuid
+from collections.abc import Awaitable, Callable
 from pathlib import Path
+from typing import Any
 
 import structlog
 from fastapi.concurrency import run_in_threadpool
 
-from backend.app.api.deps import get_bigquery_service
+from backend.app.api.deps import get_bigquery_service, get_file_service
 from backend.app.core.config import settings
 from backend.app.core.db import async_session_factory
 from backend.app.core.logger import get_logger
-from backend.app.schemas.analytics import AnalyticsReport
+from backend.app.models.task import ProcessingMode
+from backend.app.services.bigquery import BigQueryService
+from backend.app.services.dedupe import file_sha256
+from backend.app.services.detection_cache import detection_cache_path, detections_key
 from backend.app.services.file import FileService
+from backend.app.services.report_files import analytics_key, time_series_path
+from backend.app.services.segments import process_video_segmented
+from backend.app.services.staging import stage_input
 from backend.app.services.task import TaskService
-from backend.app.services.yolo import YoloService
+from backend.app.services.yolo import ProcessingResult, get_yolo_service
 
 logger = get_logger("workflow")
 
@@ -21,37 +29,54 @@ async def process_video_workflow(
     task_id: uuid.UUID,
     input_path: str,
     output_path: str,
+    mode: ProcessingMode = ProcessingMode.FULL,
+    raw_time_series: bool = False,
+    input_key: str | None = None,
 ) -> None:
     """Process a video through the complete detection workflow.
 
     This function orchestrates the entire video processing pipeline:
-    1. Updates task status to PROCESSING
-    2. Runs YOLO detection on the video
-    3. Uploads results to S3
-    4. Sends analytics to BigQuery
-    5. Updates task status to COMPLETED or FAILED
-    6. Cleans up local files
+    1. Updates task status to PROCESSING and stages the input video from
+       object storage, unless it was prefetched already
+    2. Runs YOLO detection on the video, split into segments processed in
+       parallel when ``SEGMENT_WORKERS`` > 1
+    3. As soon as the report is written, uploads the JSON summary and, if
+       requested, the Parquet per-frame time series to S3, as well as the
+       raw detections (see ``detection_cache``) when
+       ``DETECTION_CACHE_ENABLED``, and sends analytics to BigQuery. This
+       runs alongside the video upload
+    4. Uploads the video to S3 once it is finished (skipped in
+       analytics-only mode)
+    5. Deletes the uploaded report again if finishing or uploading the
+       video fails. BigQuery rows cannot be taken back and stay; only a
+       task failing before its report exists is never inserted
+    6. Updates task status to COMPLETED or FAILED
+    7. Cleans up local files and deletes the input video from object
+       storage, unless it is kept for re-rendering (see below)
+
+    The input video is kept, and recorded on the task, only when
+    ``DETECTION_CACHE_ENABLED`` and the task completed: re-thresholding
+    needs both the cached detections and the video to annotate again.
 
     Args:
         task_id: UUID of the task being processed.
         input_path: Path to the input video file.
         output_path: Path for the output annotated video.
+        mode: Processing mode. In ``ANALYTICS_ONLY`` mode no video is rendered
+            and the task's result points at the analytics report.
+        raw_time_series: Keep the per-frame time series next to the report,
+            which otherwise only carries counts aggregated into time buckets.
+        input_key: Object storage key of the input video. If given, the
+            video is staged at ``input_path`` before processing.
     """
     structlog.contextvars.bind_contextvars(task_id=str(task_id))
 
     async with async_session_factory() as session:
         task_service = TaskService(session)
-        yolo_service = YoloService()
+        yolo_service = get_yolo_service()
         bq_service = get_bigquery_service()
 
-        file_service = FileService(
-            s3_endpoint=settings.S3_ENDPOINT,
-            access_key=settings.S3_ACCESS_KEY,
-            secret_key=settings.S3_SECRET_KEY,
-            bucket_name=settings.S3_BUCKET_NAME,
-            upload_dir=settings.UPLOAD_DIR,
-            results_dir=settings.RESULTS_DIR,
-        )
+        file_service = get_file_service()
 
         task = await task_service.get_task(task_id)
         if not task:
@@ -59,38 +84,154 @@ async def process_video_workflow(
             return
 
         await task_service.mark_processing(task)
-        json_path: str | None = None
+        result: ProcessingResult | None = None
+        keep_input = settings.DETECTION_CACHE_ENABLED
+        completed = False
 
         try:
-            logger.info("workflow_started", input_path=input_path)
+            logger.info("workflow_started", input_path=input_path, mode=mode)
 
-            json_path = await run_in_threadpool(
-                yolo_service.process_video,
-                input_path,
-                output_path,
+            if input_key:
+                await stage_input(
+                    file_service,
+                    input_key,
+                    input_path,
+                    settings.INPUT_PREFETCH_WAIT_SECONDS,
+                )
+
+            cache_path = None
+            content_hash = task.content_hash
+            if settings.DETECTION_CACHE_ENABLED:
+                cache_path = detection_cache_path(output_path)
+                content_hash = content_hash or await file_sha256(input_path)
+            await task_service.record_input(
+                task, input_key if keep_input else None, content_hash
             )
 
-            video_s3_key = f"results/{Path(output_path).name}"
-            await file_service.upload_file_to_s3(output_path, video_s3_key)
+            # The cache is stored by video content and stays valid even if
+            # finishing the annotated video fails.
+            async def publish_report(report: ProcessingResult) -> None:
+                await asyncio.gather(
+                    _upload_detection_cache(file_service, cache_path, content_hash),
+                    _insert_report(bq_service, task_id, report),
+                )
+
+            if settings.SEGMENT_WORKERS > 1:
+                result, result_s3_key = await _process_and_upload(
+                    file_service,
+                    task_id,
+                    publish_report,
+                    process_video_segmented,
+                    input_path,
+                    output_path,
+                    settings.SEGMENT_WORKERS,
+                    conf=settings.DETECTION_CONF,
+                    mode=mode,
+                    raw_time_series=raw_time_series,
+                    detection_cache=cache_path,
+                )
+            else:
+                result, result_s3_key = await _process_and_upload(
+                    file_service,
+                    task_id,
+                    publish_report,
+                    yolo_service.process_video,
+                    input_path,
+                    output_path,
+                    conf=settings.DETECTION_CONF,
+                    mode=mode,
+                    raw_time_series=raw_time_series,
+                    detection_cache=cache_path,
+                )
+            logger.info("processing_timings", **result.timings)
+
+            await task_service.mark_completed(task, result_s3_key)
+            completed = True
+
+            logger.info("workflow_finished", status="success")
+
+        except Exception as e:
+            logger.exception("workflow_failed", error=str(e))
+            await task_service.mark_failed(task, str(e))
+
+        finally:
+            await _cleanup(file_service, input_path, output_path)
+            if input_key and not (keep_input and completed):
+                await file_service.delete_file_from_s3(input_key)
+            structlog.contextvars.clear_contextvars()
+
+
+async def rethreshold_workflow(
+    task_id: uuid.UUID,
+    detections_key: str,
+    conf: float,
+    input_path: str,
+    output_path: str,
+    mode: ProcessingMode = ProcessingMode.ANALYTICS_ONLY,
+    raw_time_series: bool = False,
+    input_key: str | None = None,
+) -> None:
+    """Rebuild a video's results from its detection cache at a new threshold.
+
+    Works like ``process_video_workflow`` without running the model: the
+    detection cache is downloaded and filtered at ``conf``, and in ``FULL``
+    mode the input video is staged to be annotated again. The results are
+    not sent to BigQuery, which holds one report per processed video.
 
-            if json_path and Path(json_path).exists():
-                json_s3_key = f"analytics/{task_id}.json"
-                await file_service.upload_file_to_s3(json_path, json_s3_key)
-                logger.info("analytics_s3_uploaded", key=json_s3_key)
+    Args:
+        task_id: UUID of the task being processed.
+        detections_key: Object storage key of the video's detection cache.
+        conf: Confidence threshold of the new results.
+        input_path: Local path for the input video.
+        output_path: Path for the output annotated video.
+        mode: Processing mode; ``FULL`` renders an annotated video.
+        raw_time_series: Keep the per-frame time series.
+        input_key: Object storage key of the input video; required in
+            ``FULL`` mode.
+    """
+    structlog.contextvars.bind_contextvars(task_id=str(task_id))
 
-                try:
-                    with open(json_path) as f:
-                        data_dict = json.load(f)
-                        report = AnalyticsReport(**data_dict)
+    async with async_session_factory() as session:
+        task_service = TaskService(session)
+        yolo_service = get_yolo_service()
+        file_service = get_file_service()
 
-                    await run_in_threadpool(
-                        bq_service.insert_report, str(task_id), report
-                    )
+        task = await task_service.get_task(task_id)
+        if not task:
+            logger.warning("task_not_found_in_db", task_id=str(task_id))
+            return
 
-                except Exception as bq_e:
-                    logger.error("bq_integration_failed", error=str(bq_e))
+        await task_service.mark_processing(task)
+        cache_path = detection_cache_path(output_path)
 
-            await task_service.mark_completed(task, video_s3_key)
+        try:
+            logger.info("rethreshold_started", conf=conf, mode=mode)
+            await file_service.download_file_from_s3(detections_key, cache_path)
+            render_input = None
+            if input_key and mode == ProcessingMode.FULL:
+                render_input = input_path
+                await stage_input(
+                    file_service,
+                    input_key,
+                    input_path,
+                    settings.INPUT_PREFETCH_WAIT_SECONDS,
+                )
+
+            result, result_s3_key = await _process_and_upload(
+                file_service,
+                task_id,
+                None,
+                yolo_service.render_cached_detections,
+                render_input,
+                output_path,
+                cache_path,
+                conf,
+                mode=mode,
+                raw_time_series=raw_time_series,
+            )
+            logger.info("processing_timings", **result.timings)
+
+            await task_service.mark_completed(task, result_s3_key)
 
             logger.info("workflow_finished", status="success")
 
@@ -99,9 +240,150 @@ async def process_video_workflow(
             await task_service.mark_failed(task, str(e))
 
         finally:
-            await file_service.cleanup_local_file(input_path)
-            await file_service.cleanup_local_file(output_path)
-            if json_path:
-                await file_service.cleanup_local_file(json_path)
-
+            await _cleanup(file_service, input_path, output_path)
             structlog.contextvars.clear_contextvars()
+
+
+async def _process_and_upload(
+    file_service: FileService,
+    task_id: uuid.UUID,
+    publish_report: Callable[[ProcessingResult], Awaitable[None]] | None,
+    process: Callable[..., ProcessingResult],
+    *args: Any,
+    **kwargs: Any,
+) -> tuple[ProcessingResult, str]:
+    """Process a video in a worker thread, uploading results as they are ready.
+
+    ``process`` is ``YoloService.process_video`` or one of its siblings,
+    called with ``args``, ``kwargs`` and an ``on_report`` callback. Once it
+    reports, the summary and time series are uploaded while
+    ``publish_report`` runs; the video is uploaded once ``process`` returns. With the
+    ``ffmpeg_pipe`` encoder the video is already encoded when the report is
+    ready, so the report uploads overlap with the video upload only; with
+    ``opencv`` or in segments they also overlap with finishing the video
+    (converting it to H.264, or concatenating its segments).
+
+    Both branches are awaited even if one of them fails, so no upload is
+    still reading a file when the task's files are cleaned up. If either
+    fails, the uploaded summary and time series are deleted again, so a
+    failed task leaves no report behind.
+
+    Returns:
+        The processing result and the key of the task's result: the video,
+        or the JSON summary if no video was rendered.
+
+    Raises:
+        Exception: The first error of processing or either branch.
+    """
+    loop = asyncio.get_running_loop()
+    report_ready: asyncio.Future[ProcessingResult] = loop.create_future()
+
+    def on_report(ready: ProcessingResult) -> None:
+        loop.call_soon_threadsafe(report_ready.set_result, ready)
+
+    processing = asyncio.ensure_future(
+        run_in_threadpool(process, *args, on_report=on_report, **kwargs)
+    )
+    await asyncio.wait([report_ready, processing], return_when=asyncio.FIRST_COMPLETED)
+    # Processing that fails before reporting raises here.
+    report = report_ready.result() if report_ready.done() else await processing
+
+    async def upload_report() -> None:
+        uploads: list[Awaitable[None]] = [_upload_report(file_service, task_id, report)]
+        if publish_report is not None:
+            uploads.append(publish_report(report))
+        await asyncio.gather(*uploads)
+
+    async def upload_video() -> ProcessingResult:
+        result = await processing
+        if result.video_path:
+            await file_service.upload_file_to_s3(
+                result.video_path, _video_key(result.video_path)
+            )
+        return result
+
+    outcomes = await asyncio.gather(
+        upload_report(), upload_video(), return_exceptions=True
+    )
+    for outcome in outcomes:
+        if isinstance(outcome, BaseException):
+            await _delete_report(file_service, task_id, report)
+            raise outcome
+    result = await processing
+    if result.video_path:
+        return result, _video_key(result.video_path)
+    return result, analytics_key(task_id, ".json")
+
+
+async def _upload_report(
+    file_service: FileService, task_id: uuid.UUID, result: ProcessingResult
+) -> None:
+    """Upload the JSON summary and, if kept, the per-frame time series."""
+
+    async def upload(local_path: str, suffix: str, event: str) -> None:
+        key = analytics_key(task_id, suffix)
+        await file_service.upload_file_to_s3(local_path, key)
+        logger.info(event, key=key)
+
+    uploads = [upload(result.json_path, ".json", "analytics_s3_uploaded")]
+    if result.time_series_path:
+        uploads.append(
+            upload(result.time_series_path, ".parquet", "time_series_s3_uploaded")
+        )
+    await asyncio.gather(*uploads)
+
+
+async def _delete_report(
+    file_service: FileService, task_id: uuid.UUID, result: ProcessingResult
+) -> None:
+    """Delete the summary and time series uploaded by ``_upload_report``."""
+    suffixes = [".json"]
+    if result.time_series_path:
+        suffixes.append(".parquet")
+    await asyncio.gather(
+        *(
+            file_service.delete_file_from_s3(analytics_key(task_id, suffix))
+            for suffix in suffixes
+        )
+    )
+    logger.info("analytics_s3_discarded", task_id=str(task_id))
+
+
+async def _upload_detection_cache(
+    file_service: FileService, cache_path: str | None, content_hash: str | None
+) -> None:
+    """Store a video's detection cache; failures are logged, not raised."""
+    if not cache_path or not content_hash:
+        return
+    cache_key = detections_key(content_hash)
+    try:
+        await file_service.upload_file_to_s3(cache_path, cache_key)
+        logger.info("detection_cache_s3_uploaded", key=cache_key)
+    except Exception as cache_e:
+        logger.error("detection_cache_upload_failed", error=str(cache_e))
+
+
+async def _insert_report(
+    bq_service: BigQueryService, task_id: uuid.UUID, result: ProcessingResult
+) -> None:
+    """Send a report to BigQuery; failures are logged, not raised."""
+    try:
+        await run_in_threadpool(bq_service.insert_report, str(task_id), result.report)
+    except Exception as bq_e:
+        logger.error("bq_integration_failed", error=str(bq_e))
+
+
+def _video_key(video_path: str) -> str:
+    return f"results/{Path(video_path).name}"
+
+
+async def _cleanup(
+    file_service: FileService, input_path: str, output_path: str
+) -> None:
+    """Remove a task's input and every file written next to its output."""
+    await file_service.cleanup_local_file(input_path)
+    await file_service.cleanup_local_file(output_path)
+    json_path = str(Path(output_path).with_suffix(".json"))
+    await file_service.cleanup_local_file(json_path)
+    await file_service.cleanup_local_file(time_series_path(json_path))
+    await file_service.cleanup_local_file(detection_cache_path(output_path))
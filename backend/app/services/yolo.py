@@ -1,20 +1,43 @@
 import shutil
 import subprocess
-from collections import Counter
+import threading
+import time
+from collections.abc import Callable, Generator, Iterable, Iterator
+from contextlib import ExitStack, closing
+from dataclasses import dataclass, field
+from enum import Enum
 from pathlib import Path
+from typing import cast
 
 import cv2
+import numpy as np
 import supervision as sv
 from ultralytics import YOLO
 
 from backend.app.core.config import settings
 from backend.app.core.logger import get_logger
+from backend.app.models.task import ProcessingMode
 from backend.app.schemas.analytics import (
     AnalysisSummary,
     AnalyticsReport,
-    FrameDetection,
     VideoMeta,
 )
+from backend.app.services.detection_cache import (
+    DetectionCache,
+    DetectionCacheWriter,
+    inference_conf,
+)
+from backend.app.services.encoder import FfmpegPipeWriter, has_audio_stream
+from backend.app.services.inference_backend import resolve_model_path
+from backend.app.services.motion import MotionGate
+from backend.app.services.pipeline import Stage, run_pipelined, run_stages
+from backend.app.services.report_files import (
+    TimeSeriesWriter,
+    time_series_path,
+    write_summary,
+)
+from backend.app.services.time_buckets import TimeBucketAggregator
+from backend.app.services.tracking import BoxPropagator
 
 logger = get_logger(__name__)
 
@@ -31,16 +54,93 @@ class VideoProcessingError(YoloServiceError):
     """Raised when video processing fails."""
 
 
+class _Action(Enum):
+    """How a frame gets its detections in ``YoloService.detect_frames``."""
+
+    INFER = "infer"
+    PROPAGATE = "propagate"
+    REUSE = "reuse"
+
+
+@dataclass
+class InferenceStats:
+    """Counters collected while detecting objects in a stream of frames."""
+
+    frames: int = 0
+    inferred_frames: int = 0
+    static_frames: int = 0
+
+    @property
+    def static_ratio(self) -> float:
+        """Fraction of frames skipped by the motion gate."""
+        return self.static_frames / self.frames if self.frames else 0.0
+
+
+@dataclass
+class ProcessingResult:
+    """Outcome of processing a video.
+
+    ``processed_frames`` is the number of frames actually decoded, which can
+    differ from the container's frame count in ``report.meta.total_frames``.
+    ``timings`` holds the wall-clock seconds spent in each stage, keyed by
+    stage name.
+    """
+
+    report: AnalyticsReport
+    json_path: str
+    video_path: str | None = None
+    time_series_path: str | None = None
+    processed_frames: int = 0
+    timings: dict[str, float] = field(default_factory=dict)
+
+
 class YoloService:
     """Service for video processing using YOLO object detection."""
 
     def __init__(self) -> None:
-        """Initialize the YOLO service and verify dependencies."""
+        """Initialize the YOLO service and verify dependencies.
+
+        With ``INFERENCE_BACKEND`` set to ``onnx``, ``onnx_int8`` or
+        ``openvino`` the weights are exported once and the cached artifact is
+        loaded instead. ``onnx_int8`` calibrates on frames from
+        ``CALIBRATION_DIR``.
+        """
         self._verify_ffmpeg()
-        logger.info("yolo_model_loading", model_path=settings.MODEL_PATH)
-        self.model = YOLO(settings.MODEL_PATH)
+        self.backend = settings.INFERENCE_BACKEND
+        self.imgsz = settings.INFERENCE_IMGSZ
+        logger.info(
+            "yolo_model_loading", model_path=settings.MODEL_PATH, backend=self.backend
+        )
+        if self.backend == "torch":
+            self.model = YOLO(settings.MODEL_PATH)
+        else:
+            model_path = resolve_model_path(
+                settings.MODEL_PATH,
+                self.backend,
+                self.imgsz,
+                settings.MODEL_CACHE_DIR,
+                calibration_source=settings.CALIBRATION_DIR,
+                calibration_frames=settings.CALIBRATION_FRAMES,
+            )
+            self.model = YOLO(model_path, task="detect")
         logger.info("yolo_model_loaded")
 
+    def warmup(self, size: int | None = None) -> None:
+        """Run a single inference on a blank frame.
+
+        The first model call fuses layers and allocates buffers, which makes it
+        much slower than later calls. Doing it up front keeps that cost out of
+        the first real task.
+
+        Args:
+            size: Height and width of the blank frame. Defaults to the
+                inference input size.
+        """
+        size = size or self.imgsz
+        blank = np.zeros((size, size, 3), dtype=np.uint8)
+        self.model(blank, imgsz=self.imgsz, verbose=False)
+        logger.info("yolo_model_warmed_up", size=size)
+
     def _verify_ffmpeg(self) -> None:
         """Verify that ffmpeg is available in the system.
 
@@ -54,118 +154,582 @@ class YoloService:
             )
 
     def process_video(
-        self, input_path: str, output_path: str, conf: float = 0.25
-    ) -> str:
+        self,
+        input_path: str,
+        output_path: str,
+        conf: float = 0.25,
+        batch_size: int | None = None,
+        pipelined: bool | None = None,
+        mode: ProcessingMode = ProcessingMode.FULL,
+        stride: int | None = None,
+        motion_gate: bool | None = None,
+        raw_time_series: bool = False,
+        detection_cache: str | None = None,
+        on_report: Callable[[ProcessingResult], None] | None = None,
+    ) -> ProcessingResult:
         """Process a video file with YOLO object detection.
 
         Args:
             input_path: Path to the input video file.
             output_path: Path for the output annotated video.
             conf: Confidence threshold for detections.
+            batch_size: Number of frames per model call. Defaults to
+                ``settings.INFERENCE_BATCH_SIZE``.
+            pipelined: Run decode, inference, annotation and encoding on
+                separate threads connected by bounded queues. Defaults to
+                ``settings.PIPELINE_ENABLED``.
+            mode: In ``ANALYTICS_ONLY`` mode frames are only decoded and
+                counted; annotation, video encoding and the H.264 conversion
+                are skipped and no output video is written.
+            stride: Run the detector on every ``stride``-th frame and
+                propagate boxes in between. Defaults to
+                ``settings.INFERENCE_STRIDE``.
+            motion_gate: Skip the model on frames with no motion since the
+                last moving frame and reuse the previous detections. Defaults
+                to ``settings.MOTION_GATE_ENABLED``.
+            raw_time_series: Also keep the per-frame counts, written next to
+                the summary as Parquet (see ``report_files``). The summary
+                itself carries counts aggregated into
+                ``settings.TIME_BUCKET_SECONDS`` buckets.
+            detection_cache: Path to write every frame's raw detections to
+                (see ``detection_cache``), so the results can be rebuilt at
+                another threshold by ``render_cached_detections``. The model
+                then runs at ``settings.DETECTION_CACHE_MIN_CONF`` if that is
+                lower than ``conf``; the results only use detections at
+                ``conf``.
+            on_report: Called from the processing thread with the result as
+                soon as the report and its files are written, before the
+                annotated video is converted to H.264. The result's
+                ``video_path`` is not final until this method returns.
 
         Returns:
-            Path to the generated analytics JSON file.
+            The report together with the files written for it: the JSON
+            summary, the annotated video in ``FULL`` mode and the per-frame
+            series if requested.
 
         Raises:
             FileNotFoundError: If input video doesn't exist.
+            ValueError: If ``batch_size`` or ``stride`` is not positive.
             VideoProcessingError: If video processing fails.
         """
         if not Path(input_path).exists():
             raise FileNotFoundError(f"Input video not found: {input_path}")
 
+        if batch_size is None:
+            batch_size = settings.INFERENCE_BATCH_SIZE
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be positive, got {batch_size}")
+        if pipelined is None:
+            pipelined = settings.PIPELINE_ENABLED
+        if stride is None:
+            stride = settings.INFERENCE_STRIDE
+        if stride < 1:
+            raise ValueError(f"stride must be positive, got {stride}")
+        if motion_gate is None:
+            motion_gate = settings.MOTION_GATE_ENABLED
+
         in_p = Path(input_path)
         out_p = Path(output_path)
 
         temp_video_path = out_p.with_name(f"{out_p.stem}_temp{out_p.suffix}")
         json_output_path = out_p.with_suffix(".json")
 
-        logger.info("processing_started", input=str(in_p))
+        logger.info(
+            "processing_started",
+            input=str(in_p),
+            batch_size=batch_size,
+            stride=stride,
+            pipelined=pipelined,
+            mode=mode,
+            motion_gate=motion_gate,
+            raw_time_series=raw_time_series,
+        )
 
         video_info = sv.VideoInfo.from_video_path(str(in_p))
         frame_generator = sv.get_video_frames_generator(str(in_p))
-        box_annotator = sv.BoxAnnotator(thickness=2)
+        render_video = mode == ProcessingMode.FULL
 
-        fourcc = cv2.VideoWriter_fourcc(*"mp4v")  # type: ignore[attr-defined]
-        writer = cv2.VideoWriter(
-            str(temp_video_path), fourcc, video_info.fps, video_info.resolution_wh
-        )
+        encoder = settings.VIDEO_ENCODER
+        writer: cv2.VideoWriter | FfmpegPipeWriter | None = None
+        if render_video:
+            writer = self._open_writer(
+                encoder, str(in_p), str(out_p), str(temp_video_path), video_info
+            )
 
-        total_counts: Counter[str] = Counter()
-        time_series_data: list[FrameDetection] = []
-        processed_frames = 0
+        timings: dict[str, float] = {}
+        start = time.perf_counter()
 
-        try:
-            for i, frame in enumerate(frame_generator):
-                result = self.model(frame, conf=conf, verbose=False)[0]
-                detections = sv.Detections.from_ultralytics(result)
+        gate = MotionGate(settings.MOTION_THRESHOLD) if motion_gate else None
+        stats = InferenceStats()
 
-                annotated_frame = box_annotator.annotate(
-                    scene=frame, detections=detections
+        # Works for exported models too, unlike ``self.model.model.names``.
+        names = self.model.names
+        cache: DetectionCacheWriter | None = None
+        model_conf = conf
+        if detection_cache is not None:
+            model_conf = inference_conf(conf)
+            cache = DetectionCacheWriter(
+                detection_cache, names, video_info, in_p.name, model_conf
+            )
+
+        stages: list[Stage] = [
+            lambda frames: self.detect_frames(
+                frames, model_conf, batch_size, stride, gate, stats
+            ),
+        ]
+        if cache is not None:
+            stages.append(lambda items: self._record_detections(items, cache, conf))
+        if render_video:
+            box_annotator = sv.BoxAnnotator(thickness=2)
+            stages.append(lambda items: self._annotate_frames(items, box_annotator))
+        if pipelined:
+            results = run_pipelined(
+                frame_generator, stages, settings.PIPELINE_QUEUE_DEPTH
+            )
+        else:
+            results = run_stages(frame_generator, stages)
+
+        try:
+            with ExitStack() as stack:
+                if cache is not None:
+                    stack.enter_context(cache)
+                counter, series_path = self._count_frames(
+                    results,
+                    names,
+                    video_info,
+                    str(json_output_path),
+                    writer,
+                    raw_time_series,
                 )
-                writer.write(annotated_frame)
-
-                if detections.class_id is not None:
-                    class_names = [
-                        self.model.model.names[cid]  # type: ignore[union-attr]
-                        for cid in detections.class_id
-                    ]
-
-                    frame_counts = Counter(class_names)
-                    total_counts.update(class_names)
-
-                    if frame_counts:
-                        time_series_data.append(
-                            FrameDetection(
-                                frame_id=i,
-                                timestamp=round(i / video_info.fps, 2),
-                                objects=dict(frame_counts),
-                            )
-                        )
+                if cache is not None:
+                    cache.skipped_frames_ratio = stats.static_ratio
+            timings["frames"] = time.perf_counter() - start
+
+            logger.info(
+                "inference_finished",
+                frames=stats.frames,
+                inferred_frames=stats.inferred_frames,
+                static_frames=stats.static_frames,
+            )
+            report = self._write_report(
+                video_info,
+                in_p.name,
+                counter,
+                stats.static_ratio,
+                str(json_output_path),
+                series_path,
+                timings,
+            )
+            result = ProcessingResult(
+                report=report,
+                json_path=str(json_output_path),
+                video_path=str(out_p) if render_video else None,
+                time_series_path=series_path,
+                processed_frames=counter.frames,
+                timings=timings,
+            )
+            if on_report is not None:
+                on_report(result)
+            if render_video and encoder == "opencv":
+                start = time.perf_counter()
+                self._convert_to_h264(str(temp_video_path), str(out_p))
+                timings["h264_conversion"] = time.perf_counter() - start
 
-                processed_frames += 1
+        except Exception as e:
+            logger.error("processing_failed", error=str(e))
+            raise VideoProcessingError(f"Video processing failed: {e}") from e
+        finally:
+            self._cleanup(str(temp_video_path), writer)
 
-            writer.release()
+        return result
 
-            if processed_frames == 0:
-                raise VideoProcessingError("No frames were processed from the video.")
+    def render_cached_detections(
+        self,
+        input_path: str | None,
+        output_path: str,
+        cache_path: str,
+        conf: float,
+        mode: ProcessingMode = ProcessingMode.ANALYTICS_ONLY,
+        raw_time_series: bool = False,
+        pipelined: bool | None = None,
+        on_report: Callable[[ProcessingResult], None] | None = None,
+    ) -> ProcessingResult:
+        """Rebuild a video's results from its detection cache.
+
+        Detections are read from the cache (see ``detection_cache``) and
+        filtered at ``conf`` instead of running the model. In
+        ``ANALYTICS_ONLY`` mode the video is not read at all; in ``FULL``
+        mode it is only decoded, annotated and encoded.
 
-            report = self._build_report(
-                video_info, in_p.name, total_counts, time_series_data
-            )
+        Args:
+            input_path: Path to the input video file; only needed in ``FULL``
+                mode.
+            output_path: Path for the output annotated video.
+            cache_path: Path of the video's detection cache.
+            conf: Confidence threshold, at least the threshold the cache was
+                written at.
+            mode: Processing mode, as for ``process_video``.
+            raw_time_series: Also keep the per-frame counts, as for
+                ``process_video``.
+            pipelined: Run decoding, annotation and encoding on separate
+                threads. Defaults to ``settings.PIPELINE_ENABLED``.
+            on_report: Called once the report is written, as for
+                ``process_video``.
 
-            with open(json_output_path, "w") as f:
-                f.write(report.model_dump_json(indent=2))
+        Returns:
+            The report together with the files written for it, as for
+            ``process_video``.
 
-            logger.info("analytics_generated", json_path=str(json_output_path))
-            self._convert_to_h264(str(temp_video_path), str(out_p))
+        Raises:
+            ValueError: If ``conf`` is below the cache's threshold, or no
+                input video is given in ``FULL`` mode.
+            VideoProcessingError: If rendering fails.
+        """
+        if pipelined is None:
+            pipelined = settings.PIPELINE_ENABLED
+        cache = DetectionCache(cache_path)
+        detections = cache.iter_frames(conf)
+        render_video = mode == ProcessingMode.FULL
+        if render_video and input_path is None:
+            raise ValueError("Rendering a video requires the input video")
+
+        out_p = Path(output_path)
+        temp_video_path = out_p.with_name(f"{out_p.stem}_temp{out_p.suffix}")
+        json_output_path = out_p.with_suffix(".json")
+        logger.info("cached_rendering_started", conf=conf, mode=mode)
+
+        timings: dict[str, float] = {}
+        start = time.perf_counter()
+        encoder = settings.VIDEO_ENCODER
+        writer: cv2.VideoWriter | FfmpegPipeWriter | None = None
+        video_info = cache.video_info
+        results: Generator[tuple[np.ndarray | None, sv.Detections], None, None]
+        if render_video and input_path is not None:
+            video_info = sv.VideoInfo.from_video_path(input_path)
+            writer = self._open_writer(
+                encoder, input_path, str(out_p), str(temp_video_path), video_info
+            )
+            box_annotator = sv.BoxAnnotator(thickness=2)
+            frames = zip(
+                sv.get_video_frames_generator(input_path), detections, strict=True
+            )
+            stages: list[Stage] = [
+                lambda items: self._annotate_frames(items, box_annotator)
+            ]
+            if pipelined:
+                results = run_pipelined(frames, stages, settings.PIPELINE_QUEUE_DEPTH)
+            else:
+                results = run_stages(frames, stages)
+        else:
+            results = ((None, d) for d in detections)
+
+        try:
+            counter, series_path = self._count_frames(
+                results,
+                cache.names,
+                video_info,
+                str(json_output_path),
+                writer,
+                raw_time_series,
+            )
+            timings["frames"] = time.perf_counter() - start
+            report = self._write_report(
+                video_info,
+                cache.source_filename,
+                counter,
+                cache.skipped_frames_ratio,
+                str(json_output_path),
+                series_path,
+                timings,
+            )
+            result = ProcessingResult(
+                report=report,
+                json_path=str(json_output_path),
+                video_path=str(out_p) if render_video else None,
+                time_series_path=series_path,
+                processed_frames=counter.frames,
+                timings=timings,
+            )
+            if on_report is not None:
+                on_report(result)
+            if render_video and encoder == "opencv":
+                start = time.perf_counter()
+                self._convert_to_h264(str(temp_video_path), str(out_p))
+                timings["h264_conversion"] = time.perf_counter() - start
 
         except Exception as e:
-            logger.error("processing_failed", error=str(e))
-            raise VideoProcessingError(f"Video processing failed: {e}") from e
+            logger.error("cached_rendering_failed", error=str(e))
+            raise VideoProcessingError(f"Rendering failed: {e}") from e
         finally:
             self._cleanup(str(temp_video_path), writer)
 
-        return str(json_output_path)
+        return result
+
+    def _count_frames(
+        self,
+        results: Generator[tuple[np.ndarray | None, sv.Detections], None, None],
+        names: dict[int, str],
+        video_info: sv.VideoInfo,
+        json_path: str,
+        writer: cv2.VideoWriter | FfmpegPipeWriter | None,
+        raw_time_series: bool,
+    ) -> tuple[TimeBucketAggregator, str | None]:
+        """Consume processed frames: write them out and count detections.
+
+        Args:
+            results: Frames, or None where no video is written, paired with
+                their detections; closed once consumed.
+            names: Class names by class id.
+            video_info: Information about the video.
+            json_path: Path of the JSON summary; the per-frame series is
+                written next to it.
+            writer: Writer of the output video, released at the end.
+            raw_time_series: Keep the per-frame counts.
+
+        Returns:
+            The aggregator that has seen every frame and the path of the
+            per-frame series, if kept.
+
+        Raises:
+            VideoProcessingError: If there were no frames.
+        """
+        counter = TimeBucketAggregator(
+            [names[i] for i in range(len(names))],
+            video_info.fps,
+            settings.TIME_BUCKET_SECONDS,
+        )
+        processed_frames = 0
+        with ExitStack() as stack:
+            stack.enter_context(closing(results))
+            # Per-frame counts go straight to disk in fixed-size row
+            # groups, so memory stays flat however long the video is.
+            series = None
+            if raw_time_series:
+                series = stack.enter_context(
+                    TimeSeriesWriter(time_series_path(json_path), names, video_info.fps)
+                )
+            for frame, detections in results:
+                if writer is not None and frame is not None:
+                    writer.write(frame)
+                counts = counter.add(detections.class_id)
+                if series is not None and counts is not None:
+                    series.add(processed_frames, counts)
+                processed_frames += 1
+
+        if writer is not None:
+            writer.release()
+
+        if processed_frames == 0:
+            raise VideoProcessingError("No frames were processed from the video.")
+        return counter, series.path if series is not None else None
+
+    def _write_report(
+        self,
+        video_info: sv.VideoInfo,
+        filename: str,
+        counter: TimeBucketAggregator,
+        skipped_ratio: float,
+        json_path: str,
+        series_path: str | None,
+        timings: dict[str, float],
+    ) -> AnalyticsReport:
+        """Build the report, write its summary and record the time taken."""
+        start = time.perf_counter()
+        report = self._build_report(
+            video_info, filename, counter, skipped_ratio=skipped_ratio
+        )
+        write_summary(report, json_path)
+        timings["report"] = time.perf_counter() - start
+
+        logger.info(
+            "analytics_generated",
+            json_path=json_path,
+            buckets=len(report.time_buckets),
+            time_series_path=series_path,
+        )
+        return report
+
+    def detect_frames(
+        self,
+        frames: Iterable[np.ndarray],
+        conf: float,
+        batch_size: int,
+        stride: int = 1,
+        motion_gate: MotionGate | None = None,
+        stats: InferenceStats | None = None,
+    ) -> Iterator[tuple[np.ndarray, sv.Detections]]:
+        """Run batched inference over a stream of frames.
+
+        Frames that need the model are grouped into batches of ``batch_size``
+        and passed to it in a single call, so preprocessing, the forward pass
+        and NMS are amortized across the batch. Results are yielded in input
+        order.
+
+        With ``stride`` > 1 only every ``stride``-th frame (a keyframe) goes
+        through the model; boxes for the frames in between are carried over
+        from the last keyframe by a ``BoxPropagator``. With a ``motion_gate``,
+        frames it reports as static reuse the previous frame's detections
+        without calling the model.
+
+        Args:
+            frames: Iterable of BGR frames.
+            conf: Confidence threshold for detections.
+            batch_size: Number of frames per model call.
+            stride: Run the detector on every ``stride``-th frame.
+            motion_gate: Optional gate used to skip static frames.
+            stats: Optional counters updated as frames are processed.
+
+        Yields:
+            Tuples of the original frame and its detections.
+        """
+        stats = stats if stats is not None else InferenceStats()
+        propagator = BoxPropagator() if stride > 1 else None
+        detections = sv.Detections.empty()
+
+        for chunk in self._plan_frames(frames, batch_size, stride, motion_gate):
+            keyframes = [frame for frame, action in chunk if action is _Action.INFER]
+            results = iter(
+                self.model(keyframes, conf=conf, imgsz=self.imgsz, verbose=False)
+                if keyframes
+                else ()
+            )
+
+            for frame, action in chunk:
+                if action is _Action.INFER:
+                    detections = sv.Detections.from_ultralytics(next(results))
+                    if propagator is not None:
+                        propagator.reset(frame, detections)
+                    stats.inferred_frames += 1
+                elif action is _Action.REUSE:
+                    stats.static_frames += 1
+                elif propagator is not None:
+                    detections = propagator.propagate(frame)
+                stats.frames += 1
+                yield frame, detections
+
+    def _plan_frames(
+        self,
+        frames: Iterable[np.ndarray],
+        batch_size: int,
+        stride: int,
+        motion_gate: MotionGate | None,
+    ) -> Iterator[list[tuple[np.ndarray, _Action]]]:
+        """Assign an action to every frame and group them into chunks.
+
+        A chunk holds at most ``batch_size`` frames to infer plus the frames
+        that depend on them, and never more than ``batch_size * stride``
+        frames, so a long static stretch cannot grow it without bound.
+
+        Args:
+            frames: Iterable of BGR frames.
+            batch_size: Number of frames per model call.
+            stride: Run the detector on every ``stride``-th frame.
+            motion_gate: Optional gate used to skip static frames.
+
+        Yields:
+            Lists of frames paired with their action, in input order.
+        """
+        chunk: list[tuple[np.ndarray, _Action]] = []
+        pending_inference = 0
+        since_inference = stride
+
+        for frame in frames:
+            if motion_gate is not None and motion_gate.is_static(frame):
+                action = _Action.REUSE
+            elif since_inference >= stride:
+                action = _Action.INFER
+                since_inference = 0
+            else:
+                action = _Action.PROPAGATE
+            since_inference += 1
+
+            batch_full = action is _Action.INFER and pending_inference == batch_size
+            if chunk and (batch_full or len(chunk) >= batch_size * stride):
+                yield chunk
+                chunk, pending_inference = [], 0
+
+            chunk.append((frame, action))
+            if action is _Action.INFER:
+                pending_inference += 1
+
+        if chunk:
+            yield chunk
+
+    def _record_detections(
+        self,
+        items: Iterator[tuple[np.ndarray, sv.Detections]],
+        cache: DetectionCacheWriter,
+        conf: float,
+    ) -> Iterator[tuple[np.ndarray, sv.Detections]]:
+        """Write each frame's detections to the cache, then apply ``conf``.
+
+        Args:
+            items: Iterator of frames paired with their raw detections.
+            cache: Writer of the detection cache.
+            conf: Confidence threshold of the results.
+
+        Yields:
+            Tuples of the frame and its detections at ``conf``.
+        """
+        for frame_id, (frame, detections) in enumerate(items):
+            cache.add(frame_id, detections)
+            if detections.confidence is not None:
+                detections = cast(
+                    sv.Detections, detections[detections.confidence >= conf]
+                )
+            yield frame, detections
+
+    def _annotate_frames(
+        self,
+        items: Iterator[tuple[np.ndarray, sv.Detections]],
+        annotator: sv.BoxAnnotator,
+    ) -> Iterator[tuple[np.ndarray, sv.Detections]]:
+        """Draw detection boxes onto each frame.
+
+        Args:
+            items: Iterator of frames paired with their detections.
+            annotator: Box annotator used for drawing.
+
+        Yields:
+            Tuples of the annotated frame and its detections.
+        """
+        for frame, detections in items:
+            yield annotator.annotate(scene=frame, detections=detections), detections
 
     def _build_report(
         self,
         info: sv.VideoInfo,
         filename: str,
-        counts: Counter[str],
-        series: list[FrameDetection],
+        counter: TimeBucketAggregator,
+        skipped_ratio: float = 0.0,
     ) -> AnalyticsReport:
-        """Build an analytics report from processed video data.
+        """Build the analytics report from the aggregated frame counts.
+
+        Class ids are resolved to names here, once per class, rather than for
+        every detection while processing. Classes are listed in order of
+        first appearance. Instead of per-frame data the report carries the
+        counter's time buckets; the per-frame series, if kept, is streamed
+        to its own file while processing.
 
         Args:
             info: Video information from supervision.
             filename: Original filename.
-            counts: Total detection counts per class.
-            series: Time series of frame detections.
+            counter: Aggregator that has seen every processed frame.
+            skipped_ratio: Fraction of frames whose inference was skipped by
+                the motion gate.
 
         Returns:
-            Complete analytics report.
+            Analytics report with time buckets and an empty time series.
         """
-        most_common = counts.most_common(1)
+        totals, names = counter.totals, counter.classes
+        present = np.flatnonzero(totals)
+        first_seen = counter.first_seen[present]
+        classes = present[np.argsort(first_seen, kind="stable")].tolist()
+        distribution = {names[c]: int(totals[c]) for c in classes}
+
+        dominant_class = None
+        if classes:
+            dominant_class = names[max(classes, key=lambda c: totals[c])]
 
         total_frames = info.total_frames or 0
         duration = 0.0
@@ -181,17 +745,63 @@ class YoloService:
                 duration_seconds=duration,
             ),
             summary=AnalysisSummary(
-                total_detections=sum(counts.values()),
-                unique_classes=list(counts.keys()),
-                dominant_class=most_common[0][0] if most_common else None,
-                class_distribution=dict(counts),
+                total_detections=int(totals.sum()),
+                unique_classes=list(distribution),
+                dominant_class=dominant_class,
+                class_distribution=distribution,
+                skipped_frames_ratio=round(skipped_ratio, 4),
             ),
-            time_series=series,
+            time_series=[],
+            bucket_seconds=counter.bucket_seconds,
+            time_buckets=counter.finish(),
         )
 
+    def _open_writer(
+        self,
+        encoder: str,
+        source: str,
+        target: str,
+        temp_path: str,
+        info: sv.VideoInfo,
+    ) -> cv2.VideoWriter | FfmpegPipeWriter:
+        """Open the video writer for the configured encoder backend.
+
+        ``ffmpeg_pipe`` streams frames straight into libx264 and writes the
+        final output in one pass, muxing the source audio only if it has any.
+        ``opencv`` writes an intermediate mp4v file to ``temp_path`` that
+        ``_convert_to_h264`` re-encodes afterwards.
+
+        Args:
+            encoder: Encoder backend name.
+            source: Source video path, used for the audio track.
+            target: Final output video path.
+            temp_path: Intermediate file path for the opencv backend.
+            info: Video information from supervision.
+
+        Returns:
+            A writer exposing ``write`` and ``release``.
+
+        Raises:
+            ValueError: If the encoder backend is unknown.
+        """
+        if encoder == "ffmpeg_pipe":
+            audio_source = source if has_audio_stream(source) else None
+            return FfmpegPipeWriter(
+                target, info.fps, info.resolution_wh, audio_source=audio_source
+            )
+
+        if encoder == "opencv":
+            fourcc = cv2.VideoWriter_fourcc(*"mp4v")  # type: ignore[attr-defined]
+            return cv2.VideoWriter(temp_path, fourcc, info.fps, info.resolution_wh)
+
+        raise ValueError(f"Unknown video encoder: {encoder}")
+
     def _convert_to_h264(self, source: str, target: str) -> None:
         """Convert video to H.264 codec using ffmpeg.
 
+        Used by the ``opencv`` encoder backend. The intermediate mp4v file
+        written by OpenCV never carries audio, so no audio encoder is run.
+
         Args:
             source: Source video path.
             target: Target video path.
@@ -208,10 +818,7 @@ class YoloService:
                     source,
                     "-vcodec",
                     "libx264",
-                    "-acodec",
-                    "aac",
-                    "-strict",
-                    "experimental",
+                    "-an",
                     target,
                 ],
                 check=True,
@@ -221,17 +828,20 @@ class YoloService:
         except subprocess.CalledProcessError as e:
             raise VideoProcessingError(f"ffmpeg conversion failed: {e}") from e
 
-    def _cleanup(self, temp_path: str, writer: cv2.VideoWriter) -> None:
+    def _cleanup(
+        self, temp_path: str, writer: cv2.VideoWriter | FfmpegPipeWriter | None
+    ) -> None:
         """Clean up temporary resources.
 
         Args:
             temp_path: Path to temporary video file.
-            writer: OpenCV video writer to release.
+            writer: Video writer to release, if one was opened.
         """
-        try:
-            writer.release()
-        except Exception:
-            pass
+        if writer is not None:
+            try:
+                writer.release()
+            except Exception:
+                pass
 
         temp_file = Path(temp_path)
         if temp_file.exists():
@@ -239,3 +849,25 @@ class YoloService:
                 temp_file.unlink()
             except OSError as e:
                 logger.warning("temp_file_cleanup_failed", path=temp_path, error=str(e))
+
+
+_service: YoloService | None = None
+_service_lock = threading.Lock()
+
+
+def get_yolo_service() -> YoloService:
+    """Return the process-wide YoloService, loading it on first use.
+
+    The model is loaded and warmed up once per process and then shared by
+    every task that runs in it.
+
+    Returns:
+        The shared, warmed-up YoloService.
+    """
+    global _service
+    with _service_lock:
+        if _service is None:
+            service = YoloService()
+            service.warmup()
+            _service = service
+    return _service
@@ -1,21 +1,132 @@
 import asyncio
 import uuid
+from collections.abc import Coroutine
+from typing import Any
 
+from celery.signals import (
+    task_received,
+    worker_process_init,
+    worker_process_shutdown,
+    worker_shutdown,
+)
+from celery.worker import state
+from celery.worker.request import Request
+
+from backend.app.api.deps import close_storage, get_file_service, open_storage
 from backend.app.core.celery_app import celery_app
+from backend.app.core.config import settings
 from backend.app.core.logger import get_logger
-from backend.app.services.workflow import process_video_workflow
+from backend.app.models.task import ProcessingMode
+from backend.app.services.segments import close_segment_pool, get_segment_pool
+from backend.app.services.staging import InputPrefetcher, scratch_paths
+from backend.app.services.workflow import (
+    process_video_workflow,
+    rethreshold_workflow,
+)
+from backend.app.services.yolo import get_yolo_service
 
 logger = get_logger("worker")
 
+# Event loop of this worker process, kept across tasks so that clients bound
+# to it (the pooled S3 client) outlive a single task.
+_loop: asyncio.AbstractEventLoop | None = None
+
+# Input downloader of the worker's main process, created on the first task.
+_prefetcher: InputPrefetcher | None = None
+
+
+def _run(coro: Coroutine[Any, Any, None]) -> None:
+    if _loop is None:
+        asyncio.run(coro)
+    else:
+        _loop.run_until_complete(coro)
+
+
+@worker_process_init.connect
+def init_worker_process(**_: object) -> None:
+    """Load and warm up the YOLO model before the process accepts tasks.
+
+    Celery does not hand tasks to a pool process until its init signal
+    handlers have returned, so the first task never pays for model loading.
+    The process's event loop and its pooled S3 client are created here too,
+    and so is the segment worker pool when ``SEGMENT_WORKERS`` > 1.
+    """
+    global _loop
+    logger.info("worker_process_warmup_started")
+    try:
+        get_yolo_service()
+        if settings.SEGMENT_WORKERS > 1:
+            get_segment_pool(settings.SEGMENT_WORKERS)
+        _loop = asyncio.new_event_loop()
+        _loop.run_until_complete(open_storage())
+    except Exception as e:
+        logger.exception("worker_process_warmup_failed", error=str(e))
+        raise
+    logger.info("worker_process_ready")
+
+
+@worker_process_shutdown.connect
+def shutdown_worker_process(**_: object) -> None:
+    """Close the segment pool, the pooled S3 client and the event loop."""
+    global _loop
+    close_segment_pool()
+    loop, _loop = _loop, None
+    if loop is None:
+        return
+    try:
+        loop.run_until_complete(close_storage())
+    finally:
+        loop.close()
+
+
+@task_received.connect
+def prefetch_task_input(request: Request, **_: object) -> None:
+    """Start downloading the input of a task reserved by this worker.
+
+    Runs in the worker's main process when a task is received, usually
+    while the pool is still busy with earlier tasks.
+    """
+    global _prefetcher
+    if request.name != "process_video_task" or not settings.INPUT_PREFETCH_ENABLED:
+        return
+    task_id_str, key = (str(arg) for arg in request.args[:2])
+    input_path = scratch_paths(settings.WORKER_SCRATCH_DIR, task_id_str, key)[0]
+    if _prefetcher is None:
+        _prefetcher = InputPrefetcher(get_file_service)
+    _prefetcher.submit(
+        key,
+        input_path,
+        lambda: request.time_start is None and request.id not in state.revoked,
+    )
+
+
+@worker_shutdown.connect
+def shutdown_prefetcher(**_: object) -> None:
+    """Stop the input prefetcher of the worker's main process."""
+    global _prefetcher
+    prefetcher, _prefetcher = _prefetcher, None
+    if prefetcher is not None:
+        prefetcher.shutdown()
+
 
 @celery_app.task(acks_late=True, name="process_video_task")
-def celery_process_video(task_id_str: str, input_path: str, output_path: str) -> str:
+def celery_process_video(
+    task_id_str: str,
+    input_key: str,
+    mode: str = ProcessingMode.FULL,
+    raw_time_series: bool = False,
+) -> str:
     """Celery task for processing video with YOLO detection.
 
+    The input is staged from object storage into the worker's scratch
+    directory, where the outputs are written too, so the task can run on
+    any worker node.
+
     Args:
         task_id_str: String representation of the task UUID.
-        input_path: Path to the input video file.
-        output_path: Path for the output video file.
+        input_key: Object storage key of the input video.
+        mode: Processing mode value (see ``ProcessingMode``).
+        raw_time_series: Keep the per-frame time series.
 
     Returns:
         "OK" on success, "FAILED" on UUID parsing error.
@@ -23,7 +134,63 @@ def celery_process_video(task_id_str: str, input_path: str, output_path: str) ->
     Raises:
         Exception: Re-raises any exception from the video processing workflow.
     """
-    logger.info("worker_task_started", task_id=task_id_str)
+    logger.info("worker_task_started", task_id=task_id_str, mode=mode)
+
+    try:
+        task_id = uuid.UUID(task_id_str)
+    except ValueError:
+        logger.error("worker_invalid_uuid", task_id=task_id_str)
+        return "FAILED"
+
+    input_path, output_path = scratch_paths(
+        settings.WORKER_SCRATCH_DIR, task_id_str, input_key
+    )
+    try:
+        _run(
+            process_video_workflow(
+                task_id,
+                input_path,
+                output_path,
+                ProcessingMode(mode),
+                raw_time_series,
+                input_key,
+            )
+        )
+        logger.info("worker_task_completed", task_id=task_id_str)
+        return "OK"
+
+    except Exception as e:
+        logger.exception("worker_task_failed", task_id=task_id_str, error=str(e))
+        raise
+
+
+@celery_app.task(acks_late=True, name="rethreshold_video_task")
+def celery_rethreshold_video(
+    task_id_str: str,
+    detections_key: str,
+    conf: float,
+    mode: str = ProcessingMode.ANALYTICS_ONLY,
+    raw_time_series: bool = False,
+    input_key: str | None = None,
+) -> str:
+    """Celery task rebuilding a video's results from its detection cache.
+
+    Args:
+        task_id_str: String representation of the task UUID.
+        detections_key: Object storage key of the video's detection cache.
+        conf: Confidence threshold of the new results.
+        mode: Processing mode value (see ``ProcessingMode``); ``full``
+            renders the annotated video again.
+        raw_time_series: Keep the per-frame time series.
+        input_key: Object storage key of the input video, needed to render.
+
+    Returns:
+        "OK" on success, "FAILED" on UUID parsing error.
+
+    Raises:
+        Exception: Re-raises any exception from the workflow.
+    """
+    logger.info("worker_task_started", task_id=task_id_str, mode=mode, conf=conf)
 
     try:
         task_id = uuid.UUID(task_id_str)
@@ -31,8 +198,22 @@ def celery_process_video(task_id_str: str, input_path: str, output_path: str) ->
         logger.error("worker_invalid_uuid", task_id=task_id_str)
         return "FAILED"
 
+    input_path, output_path = scratch_paths(
+        settings.WORKER_SCRATCH_DIR, task_id_str, input_key or ""
+    )
     try:
-        asyncio.run(process_video_workflow(task_id, input_path, output_path))
+        _run(
+            rethreshold_workflow(
+                task_id,
+                detections_key,
+                conf,
+                input_path,
+                output_path,
+                ProcessingMode(mode),
+                raw_time_series,
+                input_key,
+            )
+        )
         logger.info("worker_task_completed", task_id=task_id_str)
         return "OK"
 
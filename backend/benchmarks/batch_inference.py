@@ -0,0 +1,73 @@
+"""Benchmark YOLO inference throughput for different batch sizes.
+
+Decodes up to ``--frames`` frames from a sample video into memory once, then
+times ``YoloService.detect_frames`` over them for each batch size, so decode
+and encode costs do not skew the comparison.
+
+Usage:
+    python -m backend.benchmarks.batch_inference path/to/video.mp4
+
+Requires the same environment (``.env``) as the Celery worker.
+"""
+
+import argparse
+import time
+from itertools import islice
+
+import supervision as sv
+
+from backend.app.services.yolo import YoloService
+
+DEFAULT_BATCH_SIZES: tuple[int, ...] = (1, 4, 8, 16)
+
+
+def run(video_path: str, max_frames: int, batch_sizes: tuple[int, ...]) -> None:
+    """Run the benchmark and print frames per second for each batch size.
+
+    Args:
+        video_path: Path to the sample video.
+        max_frames: Maximum number of frames to decode.
+        batch_sizes: Batch sizes to compare.
+    """
+    frames = list(islice(sv.get_video_frames_generator(video_path), max_frames))
+    if not frames:
+        raise SystemExit(f"No frames decoded from {video_path}")
+
+    service = YoloService()
+
+    # Warm up so model fusion and lazy allocations are not timed.
+    for _ in service.detect_frames(frames[:1], conf=0.25, batch_size=1):
+        pass
+
+    height, width = frames[0].shape[:2]
+    print(f"frames={len(frames)} resolution={width}x{height}")
+    print(f"{'batch':>6} {'seconds':>10} {'fps':>10}")
+
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        for _ in service.detect_frames(frames, conf=0.25, batch_size=batch_size):
+            pass
+        elapsed = time.perf_counter() - start
+        print(f"{batch_size:>6} {elapsed:>10.2f} {len(frames) / elapsed:>10.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare YOLO inference fps across batch sizes."
+    )
+    parser.add_argument("video", help="Path to a sample video")
+    parser.add_argument("--frames", type=int, default=256, help="Frames to decode")
+    parser.add_argument(
+        "--batch-sizes",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_BATCH_SIZES),
+        help="Batch sizes to compare",
+    )
+    args = parser.parse_args()
+
+    run(args.video, args.frames, tuple(args.batch_sizes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Benchmark YOLO inference throughput across CPU inference backends.
+
+Exports ``MODEL_PATH`` to each requested backend (reusing the export cache),
+then times inference over the same in-memory frames.
+
+Usage:
+    python -m backend.benchmarks.inference_backends path/to/video.mp4 \
+        --backends torch onnx openvino
+
+Requires the same environment (``.env``) as the Celery worker.
+"""
+
+import argparse
+import time
+from itertools import batched, islice
+
+import supervision as sv
+from ultralytics import YOLO
+
+from backend.app.core.config import settings
+from backend.app.services.inference_backend import (
+    InferenceBackend,
+    resolve_model_path,
+)
+
+
+def run(
+    video_path: str,
+    max_frames: int,
+    batch_size: int,
+    imgsz: int,
+    backends: list[InferenceBackend],
+) -> None:
+    """Run the benchmark and print frames per second for each backend.
+
+    Args:
+        video_path: Path to the sample video.
+        max_frames: Maximum number of frames to decode.
+        batch_size: Frames per model call.
+        imgsz: Inference input size.
+        backends: Backends to compare.
+    """
+    frames = list(islice(sv.get_video_frames_generator(video_path), max_frames))
+    if not frames:
+        raise SystemExit(f"No frames decoded from {video_path}")
+
+    print(f"frames={len(frames)} batch_size={batch_size} imgsz={imgsz}")
+    print(f"{'backend':>10} {'seconds':>10} {'fps':>10}")
+
+    for backend in backends:
+        model_path = resolve_model_path(
+            settings.MODEL_PATH, backend, imgsz, settings.MODEL_CACHE_DIR
+        )
+        model = YOLO(model_path, task="detect")
+        model(frames[:batch_size], imgsz=imgsz, verbose=False)
+
+        start = time.perf_counter()
+        for batch in batched(frames, batch_size):
+            model(list(batch), conf=0.25, imgsz=imgsz, verbose=False)
+        elapsed = time.perf_counter() - start
+        print(f"{backend:>10} {elapsed:>10.2f} {len(frames) / elapsed:>10.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare YOLO inference fps across CPU backends."
+    )
+    parser.add_argument("video", help="Path to a sample video")
+    parser.add_argument("--frames", type=int, default=256, help="Frames to decode")
+    parser.add_argument("--batch-size", type=int, default=1, help="Frames per call")
+    parser.add_argument("--imgsz", type=int, default=settings.INFERENCE_IMGSZ)
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        default=["torch", "onnx"],
+        choices=["torch", "onnx", "openvino"],
+        help="Backends to compare",
+    )
+    args = parser.parse_args()
+
+    backends: list[InferenceBackend] = args.backends
+    run(args.video, args.frames, args.batch_size, args.imgsz, backends)
+
+
+if __name__ == "__main__":
+    main()
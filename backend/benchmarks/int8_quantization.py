@@ -0,0 +1,109 @@
+"""Benchmark the INT8-quantized model against its float baseline.
+
+Runs the analytics-only pipeline on each reference clip once per backend and
+reports throughput, peak memory and how the per-class counts
+(``AnalysisSummary.class_distribution``) move relative to the first backend.
+Each run happens in a fresh process so peak RSS is measured per backend.
+
+Usage:
+    python -m backend.benchmarks.int8_quantization clip1.mp4 clip2.mp4 \
+        --backends onnx onnx_int8
+
+Calibration frames are read from ``CALIBRATION_DIR``. Requires the same
+environment (``.env``) as the Celery worker.
+"""
+
+import argparse
+import multiprocessing
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+from backend.app.core.config import settings
+from backend.app.models.task import ProcessingMode
+from backend.app.services.inference_backend import InferenceBackend
+from backend.app.services.yolo import YoloService
+
+
+def _measure(
+    clip: str, backend: InferenceBackend, batch_size: int
+) -> tuple[float, float, dict[str, int]]:
+    settings.INFERENCE_BACKEND = backend
+    service = YoloService()
+    service.warmup()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        report = service.process_video(
+            clip,
+            str(Path(tmp) / "out.mp4"),
+            batch_size=batch_size,
+            mode=ProcessingMode.ANALYTICS_ONLY,
+        ).report
+        elapsed = time.perf_counter() - start
+
+    fps = report.meta.total_frames / elapsed
+    # ru_maxrss is reported in kilobytes on Linux.
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return fps, peak_mb, report.summary.class_distribution
+
+
+def run(clips: list[str], backends: list[InferenceBackend], batch_size: int) -> None:
+    """Run the benchmark and print one table per clip.
+
+    Args:
+        clips: Paths to the reference clips.
+        backends: Backends to compare; the first one is the baseline.
+        batch_size: Frames per model call.
+    """
+    context = multiprocessing.get_context("spawn")
+
+    for clip in clips:
+        results: dict[str, tuple[float, float, dict[str, int]]] = {}
+        for backend in backends:
+            with context.Pool(1) as pool:
+                results[backend] = pool.apply(_measure, (clip, backend, batch_size))
+
+        baseline = results[backends[0]][2]
+        classes = sorted(set().union(*(counts for _, _, counts in results.values())))
+
+        print(f"\n{clip} (baseline: {backends[0]})")
+        print(f"{'backend':>10} {'fps':>8} {'peak MB':>9} {'detections':>11}")
+        for backend, (fps, peak_mb, counts) in results.items():
+            print(
+                f"{backend:>10} {fps:>8.1f} {peak_mb:>9.0f} {sum(counts.values()):>11}"
+            )
+
+        print(f"{'class':>14} " + " ".join(f"{b:>10}" for b in backends))
+        for name in classes:
+            expected = baseline.get(name, 0)
+            cells = []
+            for backend in backends:
+                count = results[backend][2].get(name, 0)
+                change = (count - expected) / expected if expected else 0.0
+                cells.append(f"{count:>5} {change:>+4.0%}")
+            print(f"{name:>14} " + " ".join(f"{cell:>10}" for cell in cells))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare INT8 and float models on fps, memory and counts."
+    )
+    parser.add_argument("clips", nargs="+", help="Reference video clips")
+    parser.add_argument("--batch-size", type=int, default=1, help="Frames per call")
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        default=["onnx", "onnx_int8"],
+        choices=["torch", "onnx", "onnx_int8", "openvino"],
+        help="Backends to compare; the first is the baseline",
+    )
+    args = parser.parse_args()
+
+    backends: list[InferenceBackend] = args.backends
+    run(args.clips, backends, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Benchmark peak memory of report generation against video length.
+
+For synthetic detection streams of increasing length, compares collecting
+the whole count matrix in memory and writing the report at the end (the
+previous ``process_video`` path) with streaming the counts through
+``TimeSeriesWriter``. Peak Python allocations are measured with
+``tracemalloc``; the streaming peak should stay flat as the stream grows.
+Detections are generated on the fly, so no model or video is needed.
+
+Usage:
+    python -m backend.benchmarks.report_memory --frames 10000 100000 1000000
+"""
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from backend.app.schemas.analytics import FrameDetection
+from backend.app.services.report_files import TimeSeriesWriter
+from backend.app.services.time_buckets import TimeBucketAggregator
+
+NAMES: dict[int, str] = {i: f"class_{i}" for i in range(80)}
+FPS = 30.0
+
+
+def _synthetic_class_ids(frames: int, seed: int) -> Iterator[np.ndarray]:
+    rng = np.random.default_rng(seed)
+    # Traffic footage is dominated by a handful of classes.
+    weights = np.r_[np.full(8, 10.0), np.ones(len(NAMES) - 8)]
+    weights /= weights.sum()
+    for _ in range(frames):
+        yield rng.choice(len(NAMES), size=int(rng.poisson(6)), p=weights)
+
+
+def report_in_memory(class_ids: Iterator[np.ndarray], path: str) -> None:
+    """Collect every frame's counts, then build and write the series."""
+    rows: list[np.ndarray] = []
+    for ids in class_ids:
+        rows.append(np.bincount(ids, minlength=len(NAMES)).astype(np.int32))
+    counts = np.stack(rows)
+
+    series = [
+        FrameDetection(
+            frame_id=i,
+            timestamp=round(i / FPS, 2),
+            objects={
+                NAMES[c]: int(counts[i, c]) for c in np.flatnonzero(counts[i]).tolist()
+            },
+        )
+        for i in np.flatnonzero(counts.any(axis=1)).tolist()
+    ]
+    # The previous conversion of the report's time series to a table.
+    column = {name: i for i, name in enumerate(NAMES.values())}
+    table_counts = np.zeros((len(series), len(column)), dtype=np.int32)
+    for row, frame in enumerate(series):
+        for name, count in frame.objects.items():
+            table_counts[row, column[name]] = count
+    arrays: dict[str, pa.Array] = {
+        "frame_id": pa.array([f.frame_id for f in series], type=pa.int32()),
+        "timestamp": pa.array([f.timestamp for f in series], type=pa.float64()),
+    }
+    for name, i in column.items():
+        arrays[name] = pa.array(table_counts[:, i])
+    pq.write_table(pa.table(arrays), path)
+
+
+def report_streaming(class_ids: Iterator[np.ndarray], path: str) -> None:
+    """Stream the counts to Parquet row groups as they are produced."""
+    counter = TimeBucketAggregator(list(NAMES.values()), FPS, 1.0)
+    with TimeSeriesWriter(path, NAMES, FPS) as series:
+        for i, ids in enumerate(class_ids):
+            counts = counter.add(ids)
+            if counts is not None:
+                series.add(i, counts)
+    counter.finish()
+
+
+def _measure(
+    write: Callable[[Iterator[np.ndarray], str], None], frames: int, seed: int
+) -> tuple[float, float, float]:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "series.parquet")
+        class_ids = _synthetic_class_ids(frames, seed)
+        tracemalloc.start()
+        start = time.perf_counter()
+        write(class_ids, path)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        size = Path(path).stat().st_size
+    return elapsed, peak / 2**20, size / 2**20
+
+
+def run(frame_counts: list[int], seed: int, methods: list[str]) -> None:
+    """Run the benchmark and print time, peak memory and file size.
+
+    Args:
+        frame_counts: Stream lengths to measure.
+        seed: Random seed for the synthetic detections.
+        methods: Methods to compare, ``memory`` and/or ``streaming``.
+    """
+    writers = {"memory": report_in_memory, "streaming": report_streaming}
+    print(f"{'frames':>9} {'method':>10} {'seconds':>8} {'peak MB':>8} {'file MB':>8}")
+    for frames in frame_counts:
+        for name in methods:
+            elapsed, peak_mb, size_mb = _measure(writers[name], frames, seed)
+            print(
+                f"{frames:>9} {name:>10} {elapsed:>8.2f} "
+                f"{peak_mb:>8.1f} {size_mb:>8.2f}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare peak memory of in-memory and streaming reports."
+    )
+    parser.add_argument(
+        "--frames",
+        type=int,
+        nargs="+",
+        default=[10_000, 100_000, 500_000],
+        help="Synthetic stream lengths",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument(
+        "--methods",
+        nargs="+",
+        choices=["memory", "streaming"],
+        default=["memory", "streaming"],
+    )
+    args = parser.parse_args()
+
+    run(args.frames, args.seed, args.methods)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Benchmark re-thresholding from the detection cache against re-processing.
+
+The video is processed once with the detection cache enabled, which is the
+cost of a full re-run at a new threshold. The results are then rebuilt from
+the cache at each threshold, once analytics-only (no decoding) and once
+with the annotated video rendered again (decode, annotate, encode). The
+size of the cache is printed too.
+
+Usage:
+    python -m backend.benchmarks.rethreshold path/to/video.mp4 --conf 0.4 0.6
+
+Requires the same environment (``.env``) as the Celery worker.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from backend.app.core.config import settings
+from backend.app.models.task import ProcessingMode
+from backend.app.services.detection_cache import detection_cache_path
+from backend.app.services.yolo import YoloService
+
+
+def run(video_path: str, confs: list[float], mode: ProcessingMode) -> None:
+    """Run the benchmark and print seconds and speedup per threshold.
+
+    Args:
+        video_path: Path to the sample video.
+        confs: Thresholds to rebuild the results at.
+        mode: Processing mode of the full run.
+    """
+    service = YoloService()
+    service.warmup()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        output = str(Path(workdir) / "full.mp4")
+        cache = detection_cache_path(output)
+        start = time.perf_counter()
+        service.process_video(
+            video_path,
+            output,
+            conf=settings.DETECTION_CONF,
+            mode=mode,
+            detection_cache=cache,
+        )
+        full = time.perf_counter() - start
+        size_kib = os.path.getsize(cache) / 1024
+
+        print(f"cache={size_kib:.0f} KiB full run ({mode})={full:.2f}s")
+        print(f"{'conf':>6} {'rebuild':>14} {'seconds':>8} {'speedup':>8}")
+        for conf in confs:
+            for name, rebuild_mode in (
+                ("analytics", ProcessingMode.ANALYTICS_ONLY),
+                ("render", ProcessingMode.FULL),
+            ):
+                target = str(Path(workdir) / f"{name}_{conf}.mp4")
+                start = time.perf_counter()
+                service.render_cached_detections(
+                    video_path, target, cache, conf, mode=rebuild_mode
+                )
+                elapsed = time.perf_counter() - start
+                print(
+                    f"{conf:>6.2f} {name:>14} {elapsed:>8.2f} {full / elapsed:>7.1f}x"
+                )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare re-thresholding from the cache with a full run."
+    )
+    parser.add_argument("video", help="Path to a sample video")
+    parser.add_argument(
+        "--conf",
+        type=float,
+        nargs="+",
+        default=[0.4, 0.6],
+        help="Thresholds to rebuild the results at",
+    )
+    parser.add_argument(
+        "--mode",
+        type=ProcessingMode,
+        default=ProcessingMode.FULL,
+        help="Processing mode of the full run",
+    )
+    args = parser.parse_args()
+
+    run(args.video, args.conf, args.mode)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Benchmark segment-parallel processing against a single process.
+
+For each worker count, processes the whole video with
+``process_video_segmented`` and reports wall-clock time, speedup over the
+first worker count and parallel efficiency (speedup per added worker).
+The segment pool is started before timing each worker count, as the worker
+starts it once per process in production.
+
+Usage:
+    python -m backend.benchmarks.segment_parallel path/to/long_video.mp4 \
+        --workers 1 2 4 8
+
+Requires ffmpeg and the same environment (``.env``) as the Celery worker.
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from backend.app.core.config import settings
+from backend.app.models.task import ProcessingMode
+from backend.app.services.segments import (
+    close_segment_pool,
+    get_segment_pool,
+    process_video_segmented,
+)
+from backend.app.services.yolo import get_yolo_service
+
+
+def run(video_path: str, workers: list[int], mode: ProcessingMode) -> None:
+    """Run the benchmark and print timings per worker count.
+
+    Args:
+        video_path: Path to the sample video.
+        workers: Worker counts to compare; the first one is the baseline.
+        mode: Processing mode passed to every run.
+    """
+    # Load the in-process model up front so the 1-worker run is not penalized.
+    get_yolo_service()
+
+    print(f"mode={mode} min_segment={settings.SEGMENT_MIN_SECONDS}s")
+    print(f"{'workers':>7} {'seconds':>9} {'speedup':>8} {'efficiency':>10}")
+
+    baseline: float | None = None
+    for count in workers:
+        if count > 1:
+            get_segment_pool(count)
+        with tempfile.TemporaryDirectory() as tmp:
+            start = time.perf_counter()
+            process_video_segmented(
+                video_path, str(Path(tmp) / "out.mp4"), count, mode=mode
+            )
+            elapsed = time.perf_counter() - start
+
+        baseline = baseline or elapsed
+        speedup = baseline / elapsed
+        efficiency = speedup * workers[0] / count
+        print(f"{count:>7} {elapsed:>9.1f} {speedup:>7.2f}x {efficiency:>10.0%}")
+    close_segment_pool()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Measure how segment-parallel processing scales with cores."
+    )
+    parser.add_argument("video", help="Path to a long sample video")
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=[1, 2, 4], help="Worker counts"
+    )
+    parser.add_argument(
+        "--mode",
+        type=ProcessingMode,
+        default=ProcessingMode.ANALYTICS_ONLY,
+        choices=list(ProcessingMode),
+    )
+    parser.add_argument(
+        "--min-segment-seconds",
+        type=float,
+        default=settings.SEGMENT_MIN_SECONDS,
+        help="Shortest segment worth a separate process",
+    )
+    args = parser.parse_args()
+
+    settings.SEGMENT_MIN_SECONDS = args.min_segment_seconds
+    run(args.video, args.workers, args.mode)
+
+
+if __name__ == "__main__":
+    main()
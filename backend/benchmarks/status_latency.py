@@ -0,0 +1,98 @@
+"""Benchmark ``/status`` latency with per-request and shared S3 clients.
+
+Requests the status of a completed task, which signs a result URL, through
+the ASGI app in process. The ``per-request`` run leaves the shared storage
+closed, so every request builds its own S3 client; the ``shared`` run opens
+the pooled client and the presigned URL cache once, as the application
+lifespan does. Requests cycle through a fixed set of tasks, like clients
+polling for results, so the shared run mostly hits the cache. The task lookup
+and API key check are overridden, so no database is needed.
+
+Usage:
+    python -m backend.benchmarks.status_latency --requests 500 --tasks 10
+
+Requires the same environment (``.env``) as the API.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+
+from backend.app.api.deps import close_storage, get_task_service, open_storage
+from backend.app.core.security import verify_api_key
+from backend.app.main import app
+from backend.app.models.task import Task, TaskStatus
+
+
+class _CompletedTasks:
+    async def get_task(self, task_id: uuid.UUID) -> Task:
+        return Task(
+            id=task_id,
+            status=TaskStatus.COMPLETED,
+            input_filename="video.mp4",
+            result_url=f"results/{task_id}.mp4",
+        )
+
+
+async def _measure(requests: int, warmup: int, tasks: int) -> list[float]:
+    task_ids = [uuid.uuid4() for _ in range(tasks)]
+    transport = httpx.ASGITransport(app=app)
+    latencies: list[float] = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+        for i in range(warmup + requests):
+            start = time.perf_counter()
+            response = await c.get(f"/api/v1/status/{task_ids[i % tasks]}")
+            elapsed = time.perf_counter() - start
+            response.raise_for_status()
+            if i >= warmup:
+                latencies.append(elapsed * 1000)
+    return latencies
+
+
+def _print_row(name: str, latencies: list[float]) -> None:
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"{name:>11} {statistics.fmean(latencies):>8.2f} "
+        f"{quantiles[49]:>8.2f} {quantiles[94]:>8.2f}"
+    )
+
+
+async def run(requests: int, warmup: int, tasks: int) -> None:
+    """Run the benchmark and print latency statistics in milliseconds.
+
+    Args:
+        requests: Measured requests per configuration.
+        warmup: Unmeasured requests sent first.
+        tasks: Distinct tasks polled.
+    """
+    app.dependency_overrides[get_task_service] = _CompletedTasks
+    app.dependency_overrides[verify_api_key] = lambda: "bench"
+
+    print(f"{'client':>11} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    _print_row("per-request", await _measure(requests, warmup, tasks))
+    await open_storage()
+    try:
+        _print_row("shared", await _measure(requests, warmup, tasks))
+    finally:
+        await close_storage()
+        app.dependency_overrides.clear()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare /status latency with per-request and shared clients."
+    )
+    parser.add_argument("--requests", type=int, default=500, help="Measured requests")
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests")
+    parser.add_argument("--tasks", type=int, default=10, help="Distinct tasks polled")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.requests, args.warmup, args.tasks))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Benchmark keyframe (stride) inference against full per-frame inference.
+
+For each stride, reports the speedup over stride 1 and how far the counts
+drift from the full-inference baseline:
+
+- ``total drift``: relative L1 difference of the per-class totals (the
+  ``class_distribution`` of the report).
+- ``frame MAE``: mean absolute error of per-frame, per-class counts.
+
+Usage:
+    python -m backend.benchmarks.stride_inference path/to/video.mp4
+
+Requires the same environment (``.env``) as the Celery worker.
+"""
+
+import argparse
+import time
+from itertools import islice
+
+import numpy as np
+import supervision as sv
+
+from backend.app.services.yolo import YoloService
+
+DEFAULT_STRIDES: tuple[int, ...] = (1, 2, 3, 5, 10)
+
+
+def _count_matrix(
+    service: YoloService,
+    frames: list[np.ndarray],
+    batch_size: int,
+    stride: int,
+    num_classes: int,
+) -> tuple[np.ndarray, float]:
+    counts = np.zeros((len(frames), num_classes), dtype=np.int64)
+    start = time.perf_counter()
+    outputs = service.detect_frames(frames, 0.25, batch_size, stride)
+    for i, (_, detections) in enumerate(outputs):
+        if detections.class_id is not None and len(detections.class_id):
+            counts[i] = np.bincount(detections.class_id, minlength=num_classes)
+    return counts, time.perf_counter() - start
+
+
+def run(
+    video_path: str, max_frames: int, batch_size: int, strides: tuple[int, ...]
+) -> None:
+    """Run the benchmark and print speedup and drift per stride.
+
+    Args:
+        video_path: Path to the sample video.
+        max_frames: Maximum number of frames to decode.
+        batch_size: Keyframes per model call.
+        strides: Strides to compare; stride 1 is always run as the baseline.
+    """
+    frames = list(islice(sv.get_video_frames_generator(video_path), max_frames))
+    if not frames:
+        raise SystemExit(f"No frames decoded from {video_path}")
+
+    service = YoloService()
+    service.warmup()
+    num_classes = len(service.model.names)
+
+    baseline, baseline_time = _count_matrix(service, frames, batch_size, 1, num_classes)
+    baseline_totals = baseline.sum(axis=0)
+
+    print(f"frames={len(frames)} batch_size={batch_size}")
+    print(
+        f"{'stride':>6} {'fps':>8} {'speedup':>8} {'total drift':>12} {'frame MAE':>10}"
+    )
+
+    for stride in strides:
+        if stride == 1:
+            counts, elapsed = baseline, baseline_time
+        else:
+            counts, elapsed = _count_matrix(
+                service, frames, batch_size, stride, num_classes
+            )
+
+        totals = counts.sum(axis=0)
+        drift = np.abs(totals - baseline_totals).sum() / max(baseline_totals.sum(), 1)
+        mae = np.abs(counts - baseline).mean()
+        print(
+            f"{stride:>6} {len(frames) / elapsed:>8.1f} "
+            f"{baseline_time / elapsed:>7.2f}x {drift:>11.2%} {mae:>10.3f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare stride inference speedup and count drift."
+    )
+    parser.add_argument("video", help="Path to a sample video")
+    parser.add_argument("--frames", type=int, default=300, help="Frames to decode")
+    parser.add_argument("--batch-size", type=int, default=1, help="Keyframes per call")
+    parser.add_argument(
+        "--strides",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_STRIDES),
+        help="Strides to compare",
+    )
+    args = parser.parse_args()
+
+    run(args.video, args.frames, args.batch_size, tuple(args.strides))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Benchmark persisting spooled uploads to the upload directory.
+
+For each size, an upload is spooled the way the server does it (a
+``SpooledTemporaryFile`` that moves to disk past 1 MiB) and persisted twice:
+with the previous chunked copy through ``aiofiles`` (1 MiB reads and writes,
+each through the thread pool) and with ``FileService.save_upload_locally``,
+with and without computing the SHA-256 digest. All read a spool that is in
+the page cache.
+
+Usage:
+    python -m backend.benchmarks.upload_persistence --sizes-mb 100 500 1000 2000
+
+Requires the same environment (``.env``) as the API; nothing is uploaded.
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import BinaryIO, cast
+
+import aiofiles
+from fastapi import UploadFile
+
+from backend.app.services.file import FileService, MiB
+
+SPOOL_MAX_SIZE = MiB
+
+
+def _spooled_upload(size: int, spool_dir: str | None) -> UploadFile:
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE, dir=spool_dir)
+    block = os.urandom(MiB)
+    for _ in range(size // MiB):
+        spool.write(block)
+    spool.write(block[: size % MiB])
+    spool.seek(0)
+    return UploadFile(cast(BinaryIO, spool), filename="video.mp4", size=size)
+
+
+async def save_chunked(file: UploadFile, path: str) -> None:
+    """The previous ``save_upload_locally``: 1 MiB chunks through aiofiles."""
+    async with aiofiles.open(path, "wb") as buffer:
+        while content := await file.read(MiB):
+            await buffer.write(content)
+
+
+async def _measure(
+    size: int, upload_dir: str, spool_dir: str | None
+) -> dict[str, float]:
+    service = FileService(
+        s3_endpoint="http://unused",
+        access_key="unused",
+        secret_key="unused",
+        bucket_name="unused",
+        upload_dir=upload_dir,
+        results_dir=upload_dir,
+    )
+    timings: dict[str, float] = {}
+    upload = _spooled_upload(size, spool_dir)
+    try:
+        target = Path(upload_dir) / "chunked.mp4"
+        start = time.perf_counter()
+        await save_chunked(upload, str(target))
+        timings["chunked"] = time.perf_counter() - start
+        target.unlink()
+
+        for name, hash_content in (("fast", False), ("fast+sha256", True)):
+            start = time.perf_counter()
+            await service.save_upload_locally(
+                upload, "fast.mp4", max_bytes=size, hash_content=hash_content
+            )
+            timings[name] = time.perf_counter() - start
+            (Path(upload_dir) / "fast.mp4").unlink()
+    finally:
+        await upload.close()
+    return timings
+
+
+async def run(sizes_mb: list[int], upload_dir: str | None, spool_dir: str | None):
+    """Run the benchmark and print time and throughput per size and method.
+
+    Args:
+        sizes_mb: Upload sizes in MiB.
+        upload_dir: Upload directory; a temporary one by default.
+        spool_dir: Directory of the spool files; the system default for
+            temporary files by default, as for the server.
+    """
+    with tempfile.TemporaryDirectory(dir=upload_dir) as target_dir:
+        print(f"{'MiB':>6} {'method':>12} {'seconds':>8} {'MiB/s':>8}")
+        for size_mb in sizes_mb:
+            timings = await _measure(size_mb * MiB, target_dir, spool_dir)
+            for name, seconds in timings.items():
+                print(
+                    f"{size_mb:>6} {name:>12} {seconds:>8.2f} {size_mb / seconds:>8.0f}"
+                )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare chunked and zero-copy persistence of uploads."
+    )
+    parser.add_argument(
+        "--sizes-mb",
+        type=int,
+        nargs="+",
+        default=[100, 500, 1000, 2000],
+        help="Upload sizes in MiB",
+    )
+    parser.add_argument("--upload-dir", help="Directory to persist uploads in")
+    parser.add_argument("--spool-dir", help="Directory of the spooled uploads")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.sizes_mb, args.upload_dir, args.spool_dir))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,9 @@ from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 # Set environment variables BEFORE importing the app
 # This is required because pydantic-settings loads config at import time
@@ -51,3 +54,19 @@ def mock_db_session_factory() -> tuple[MagicMock, AsyncMock]:
     mock_factory.return_value = mock_db_manager
 
     return mock_factory, mock_session
+
+
+@pytest.fixture(name="session")
+async def session_fixture() -> AsyncGenerator[AsyncSession, None]:
+    """Provide a session on an in-memory SQLite database with all tables."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    async_session = async_sessionmaker(
+        engine, expire_on_commit=False, class_=AsyncSession
+    )
+
+    async with async_session() as session:
+        yield session
@@ -1,19 +1,32 @@
+import asyncio
+import hashlib
 import uuid
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from backend.app.api.deps import get_file_service, get_task_service
+from backend.app.api.deps import (
+    get_file_service,
+    get_resumable_upload_service,
+    get_task_service,
+)
 from backend.app.core.security import verify_api_key
-from backend.app.models.task import Task, TaskStatus
-from backend.app.worker import celery_process_video
+from backend.app.models.task import ProcessingMode, Task, TaskStatus
+from backend.app.services.detection_cache import detections_key
+from backend.app.services.file import FileTooLargeError, SavedUpload
+from backend.app.services.resumable import ResumableUploadService
+from backend.app.services.task import TaskService
+from backend.app.worker import celery_process_video, celery_rethreshold_video
 
 
 @pytest.fixture
 def mock_file_service():
     mock = MagicMock()
-    mock.save_upload_locally = AsyncMock(return_value="/tmp/uploads/test.mp4")
-    mock.get_result_path_local = MagicMock(return_value="/tmp/results/test.mp4")
+    mock.save_upload_locally = AsyncMock(
+        return_value=SavedUpload(path="/tmp/uploads/test.mp4", size=12, sha256="0")
+    )
+    mock.upload_file_to_s3 = AsyncMock()
+    mock.cleanup_local_file = AsyncMock()
     mock.generate_presigned_url = AsyncMock(return_value="https://cdn.fake/video.mp4")
     return mock
 
@@ -36,6 +49,7 @@ async def test_detect_endpoint(client, mock_file_service):
     local_mock_task_service.create_task.return_value = Task(
         id=uuid.uuid4(), status=TaskStatus.QUEUED, input_filename="test.mp4"
     )
+    local_mock_task_service.deduplicate.return_value = None
 
     async def override_task_service():
         return local_mock_task_service
@@ -62,7 +76,58 @@ async def test_detect_endpoint(client, mock_file_service):
         assert "task_id" in data
         assert data["status"] == "queued"
 
-        mock_delay.assert_called_once()
+        # The video reaches the worker through storage, not the API's disk.
+        task_id = data["task_id"]
+        mock_file_service.upload_file_to_s3.assert_awaited_once_with(
+            "/tmp/uploads/test.mp4", f"uploads/{task_id}.mp4"
+        )
+        mock_file_service.cleanup_local_file.assert_awaited_once_with(
+            "/tmp/uploads/test.mp4"
+        )
+        mock_delay.assert_called_once_with(
+            task_id, f"uploads/{task_id}.mp4", ProcessingMode.FULL, False
+        )
+
+    app.dependency_overrides = {}
+
+
+@pytest.mark.asyncio
+async def test_detect_endpoint_analytics_only(client, mock_file_service):
+    local_mock_task_service = AsyncMock()
+    local_mock_task_service.create_task.return_value = Task(
+        id=uuid.uuid4(),
+        status=TaskStatus.QUEUED,
+        input_filename="test.mp4",
+        mode=ProcessingMode.ANALYTICS_ONLY,
+    )
+    local_mock_task_service.deduplicate.return_value = None
+
+    async def override_task_service():
+        return local_mock_task_service
+
+    async def override_security():
+        return "bypass-key"
+
+    from backend.app.main import app
+
+    app.dependency_overrides[get_task_service] = override_task_service
+    app.dependency_overrides[get_file_service] = lambda: mock_file_service
+    app.dependency_overrides[verify_api_key] = override_security
+
+    with patch.object(celery_process_video, "delay") as mock_delay:
+        files = {"file": ("video.mp4", b"fake content", "video/mp4")}
+
+        response = await client.post(
+            "/api/v1/detect",
+            params={"mode": "analytics_only", "raw_time_series": "true"},
+            files=files,
+        )
+
+        assert response.status_code == 202
+        local_mock_task_service.create_task.assert_awaited_once_with(
+            "video.mp4", ProcessingMode.ANALYTICS_ONLY, True
+        )
+        assert mock_delay.call_args[0][2:] == (ProcessingMode.ANALYTICS_ONLY, True)
 
     app.dependency_overrides = {}
 
@@ -113,3 +178,651 @@ async def test_security_rejection(client):
     response = await client.post("/api/v1/detect", files=files)
 
     assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fmt", ["json", "parquet"])
+async def test_analytics_endpoint_links_requested_format(
+    client, mock_file_service, fmt
+):
+    target_uuid = uuid.uuid4()
+    local_task_service = AsyncMock()
+    local_task_service.get_task.return_value = Task(
+        id=target_uuid,
+        status=TaskStatus.COMPLETED,
+        input_filename="test.mp4",
+        raw_time_series=True,
+    )
+    mock_file_service.generate_presigned_url.return_value = f"https://cdn.fake/a.{fmt}"
+
+    async def override_task():
+        return local_task_service
+
+    from backend.app.main import app
+
+    app.dependency_overrides[get_task_service] = override_task
+    app.dependency_overrides[get_file_service] = lambda: mock_file_service
+    app.dependency_overrides[verify_api_key] = lambda: "bypass-key"
+
+    response = await client.get(f"/api/v1/analytics/{target_uuid}?format={fmt}")
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "task_id": str(target_uuid),
+        "format": fmt,
+        "url": f"https://cdn.fake/a.{fmt}",
+    }
+    mock_file_service.generate_presigned_url.assert_awaited_once_with(
+        f"analytics/{target_uuid}.{fmt}"
+    )
+
+    app.dependency_overrides = {}
+
+
+@pytest.mark.asyncio
+async def test_analytics_endpoint_parquet_requires_raw_time_series(
+    client, mock_file_service
+):
+    local_task_service = AsyncMock()
+    local_task_service.get_task.return_value = Task(
+        status=TaskStatus.COMPLETED, input_filename="test.mp4"
+    )
+
+    async def override_task():
+        return local_task_service
+
+    from backend.app.main import app
+
+    app.dependency_overrides[get_task_service] = override_task
+    app.dependency_overrides[get_file_service] = lambda: mock_file_service
+    app.dependency_overrides[verify_api_key] = lambda: "bypass-key"
+
+    response = await client.get(f"/api/v1/analytics/{uuid.uuid4()}?format=parquet")
+
+    assert response.status_code == 404
+    mock_file_service.generate_presigned_url.assert_not_awaited()
+
+    app.dependency_overrides = {}
+
+
+@pytest.mark.asyncio
+async def test_analytics_endpoint_requires_completed_task(client, mock_file_service):
+    local_task_service = AsyncMock()
+    local_task_service.get_task.return_value = Task(
+        status=TaskStatus.PROCESSING, input_filename="test.mp4"
+    )
+
+    async def override_task():
+        return local_task_service
+
+    from backend.app.main import app
+
+    app.dependency_overrides[get_task_service] = override_task
+    app.dependency_overrides[get_file_service] = lambda: mock_file_service
+    app.dependency_overrides[verify_api_key] = lambda: "bypass-key"
+
+    response = await client.get(f"/api/v1/analytics/{uuid.uuid4()}")
+
+    assert response.status_code == 409
+    mock_file_service.generate_presigned_url.assert_not_awaited()
+
+    app.dependency_overrides = {}
+
+
+@pytest.mark.asyncio
+async def test_create_upload_returns_presigned_post(client, mock_file_service):
+    mock_file_service.generate_presigned_post = AsyncMock(
+        return_value={"url": "https://s3.fake/bucket", "fields": {"key": "k"}}
+    )
+
+    from backend.app.main import app
+
+    app.dependency_overrides[get_file_service] = lambda: mock_file_service
+    app.dependency_overrides[verify_api_key] = lambda: "bypass-key"
+
+    response = await client.post("/api/v1/uploads", json={"filename": "clip.MOV"})
+
+    assert response.status_code == 201
+    data = response.json()
+    assert data["url"] == "https://s3.fake/bucket"
+    assert data["fields"] == {"key": "k"}
+    key = mock_file_service.generate_presigned_post.await_args.args[0]
+    assert key == f"uploads/{data['upload_id']}.mov"
+
+    app.dependency_overrides = {}
+
+
+@pytest.mark.asyncio
+async def test_create_upload_rejects_unsupported_format(client, mock_file_service):
+    mock_file_service.generate_presigned_post = AsyncMock()
+
+    from backend.app.main import app
+
+    app.dependency_overrides[get_file_service] = lambda: mock_file_service
+    app.dependency_overrides[verify_api_key] = lambda: "bypass-key"
+
+    response = await client.post("/api/v1/uploads", json={"filename": "notes.txt"})
+
+    assert response.status_code == 400
+    mock_file_service.generate_presigned_post.assert_not_awaited()
+
+    app.dependency_overrides = {}
+
+
+@pytest.mark.asyncio
+async def test_confirm_upload_enqueues_task_with_object_key(client, mock_file_service):
+    upload_id = uuid.uuid4()
+    task = Task(id=uuid.uuid4(), status=TaskStatus.QUEUED, input_filename="a.mp4")
+    local_task_service = AsyncMock()
+    local_task_service.get_task_by_upload.return_value = None
+    local_task_service.create_upload_task.return_value = (task, True)
+    mock_file_service.object_size = AsyncMock(return_value=1024)
+
+    async def override_task():
+        return local_task_service
+
+    from backend.app.main import app
+
+    app.dependency_overrides[get_task_service] = override_task
+    app.dependency_overrides[get_file_service] = lambda: mock_file_service
+    app.dependency_overrides[verify_api_key] = lambda: "bypass-key"
+
+    with patch.object(celery_process_video, "delay") as mock_delay:
+        response = await client.post(
+            f"/api/v1/uploads/{upload_id}/confirm",
+            json={"filename": "a.mp4", "mode": "analytics_only"},
+        )
+
+    assert response.status_code == 202
+    assert response.json()["task_id"] == str(task.id)
+    mock_file_service.object_size.assert_awaited_once_with(f"uploads/{upload_id}.mp4")
+    local_task_service.create_upload_task.assert_awaited_once_with(
+        upload_id, "a.mp4", ProcessingMode.ANALYTICS_ONLY, False
+    )
+    mock_delay.assert_called_once_with(
+        str(task.id), f"uploads/{upload_id}.mp4", ProcessingMode.ANALYTICS_ONLY, False
+    )
+
+    app.dependency_overrides = {}
+
+
+@pytest.mark.asyncio
+async def test_confirming_an_upload_twice_returns_its_task(
+    client, mock_file_service, session
+):
+    upload_id = uuid.uuid4()
+    mock_file_service.object_size = AsyncMock(return_value=1024)
+
+    async def override_task():
+        return TaskService(session)
+
+    from backend.app.main import app
+
+    app.dependency_overrides[get_task_service] = override_task
+    app.dependency_overrides[get_file_service] = lambda: mock_file_service
+    app.dependency_overrides[verify_api_key] = lambda: "bypass-key"
+
+    with patch.object(celery_process_video, "delay") as mock_delay:
+        first = await client.post(
+            f"/api/v1/uploads/{upload_id}/confirm", json={"filename": "a.mp4"}
+        )
+        # The first task may have deleted the object by now.
+        mock_file_service.object_size.return_value = None
+        second = await client.post(
+            f"/api/v1/uploads/{upload_id}/confirm", json={"filename": "a.mp4"}
+        )
+
+    assert first.status_code == second.status_code == 202
+    assert first.json()["task_id"] == second.json()["task_id"]
+    mock_delay.assert_called_once()
+
+    app.dependency_overrides = {}
+
+
+@pytest.mark.asyncio
+async def test_confirm_upload_requires_uploaded_object(client, mock_file_service):
+    local_task_service = AsyncMock()
+    local_task_service.get_task_by_upload.return_value = None
+    mock_file_service.object_size = AsyncMock(return_value=None)
+
+    async def override_task():
+        return local_task_service
+
+    from backend.app.main import app
+
+    app.dependency_overrides[get_task_service] = override_task
+    app.dependency_overrides[get_file_service] = lambda: mock_file_service
+    app.dependency_overrides[verify_api_key] = lambda: "bypass-key"
+
+    with patch.object(celery_process_video, "delay") as mock_delay:
+        response = await client.post(
+            f"/api/v1/uploads/{uuid.uuid4()}/confirm", json={"filename": "a.mp4"}
+        )
+
+    assert response.status_code == 404
+    local_task_service.create_upload_task.assert_not_awaited()
+    mock_delay.assert_not_called()
+
+    app.dependency_overrides = {}
+
+
+@pytest.mark.asyncio
+async def test_detect_rejects_oversized_upload(client, mock_file_service):
+    task = Task(id=uuid.uuid4(), status=TaskStatus.QUEUED, input_filename="a.mp4")
+    local_task_service = AsyncMock()
+    local_task_service.create_task.return_value = task
+    mock_file_service.save_upload_locally.side_effect = FileTooLargeError("too big")
+
+    async def override_task():
+        return local_task_service
+
+    from backend.app.main import app
+
+    app.dependency_overrides[get_task_service] = override_task
+    app.dependency_overrides[get_file_service] = lambda: mock_file_service
+    app.dependency_overrides[verify_api_key] = lambda: "bypass-key"
+
+    with patch.object(celery_process_video, "delay") as mock_delay:
+        files = {"file": ("video.mp4", b"fake content", "video/mp4")}
+        response = await client.post("/api/v1/detect", files=files)
+
+    assert response.status_code == 413
+    local_task_service.mark_failed.assert_awaited_once_with(task, "too big")
+    mock_file_service.upload_file_to_s3.assert_not_awaited()
+    mock_delay.assert_not_called()
+
+    app.dependency_overrides = {}
+
+
+@pytest.mark.asyncio
+async def test_resumable_upload_flow(client, mock_file_service, tmp_path):
+    content = b"x" * 3000
+    task = Task(id=uuid.uuid4(), status=TaskStatus.QUEUED, input_filename="a.mp4")
+    local_task_service = AsyncMock()
+    local_task_service.create_task.return_value = task
+    local_task_service.deduplicate.return_value = None
+    uploads = ResumableUploadService(
+        str(tmp_path), chunk_max_bytes=2000, ttl_seconds=60
+    )
+
+    async def override_task():
+        return local_task_service
+
+    from backend.app.main import app
+
+    app.dependency_overrides[get_task_service] = override_task
+    app.dependency_overrides[get_file_service] = lambda: mock_file_service
+    app.dependency_overrides[get_resumable_upload_service] = lambda: uploads
+    app.dependency_overrides[verify_api_key] = lambda: "bypass-key"
+
+    response = await client.post(
+        "/api/v1/resumable-uploads",
+        json={"filename": "a.mp4", "size": len(content), "mode": "analytics_only"},
+    )
+    assert response.status_code == 201
+    assert response.json()["chunk_max_bytes"] == 2000
+    url = f"/api/v1/resumable-uploads/{response.json()['upload_id']}"
+
+    async def patch_chunk(offset: int, chunk: bytes, digest: str | None = None):
+        return await client.patch(
+            url,
+            content=chunk,
+            headers={
+                "Upload-Offset": str(offset),
+                "X-Chunk-SHA256": digest or hashlib.sha256(chunk).hexdigest(),
+            },
+        )
+
+    assert (await patch_chunk(0, content[:2000])).json()["offset"] == 2000
+    # A retried chunk is refused with the offset to continue from.
+    response = await patch_chunk(0, content[:2000])
+    assert response.status_code == 409
+    assert response.headers["Upload-Offset"] == "2000"
+    assert (await patch_chunk(2000, content[2000:], digest="0" * 64)).status_code == 422
+    assert (await client.get(url)).json()["offset"] == 2000
+    assert (await patch_chunk(2000, content[2000:])).json()["offset"] == 3000
+
+    with (
+        patch.object(celery_process_video, "delay") as mock_delay,
+        patch("backend.app.api.v1.router.settings.UPLOAD_DIR", str(tmp_path)),
+    ):
+        response = await client.post(f"{url}/complete")
+
+    assert response.status_code == 202
+    local_task_service.create_task.assert_awaited_once_with(
+        "a.mp4", ProcessingMode.ANALYTICS_ONLY, False
+    )
+    # The digest kept while appending is the content hash.
+    dedupe_args = local_task_service.deduplicate.await_args.args
+    assert dedupe_args[1] == hashlib.sha256(content).hexdigest()
+    local_path = str(tmp_path / f"{url.rsplit('/', 1)[1]}.mp4")
+    with open(local_path, "rb") as assembled:
+        assert assembled.read() == content
+    mock_file_service.upload_file_to_s3.assert_awaited_once_with(
+        local_path, f"uploads/{task.id}.mp4"
+    )
+    mock_file_service.cleanup_local_file.assert_awaited_once_with(local_path)
+    mock_delay.assert_called_once_with(
+        str(task.id), f"uploads/{task.id}.mp4", ProcessingMode.ANALYTICS_ONLY, False
+    )
+    assert (await client.get(url)).status_code == 404
+
+    app.dependency_overrides = {}
+
+
+@pytest.mark.asyncio
+async def test_resumable_upload_rejects_oversized_video(client):
+    from backend.app.main import app
+
+    app.dependency_overrides[verify_api_key] = lambda: "bypass-key"
+
+    with patch("backend.app.api.v1.router.settings.UPLOAD_MAX_BYTES", 10):
+        response = await client.post(
+            "/api/v1/resumable-uploads", json={"filename": "a.mp4", "size": 11}
+        )
+
+    assert response.status_code == 413
+
+    app.dependency_overrides = {}
+
+
+@pytest.mark.asyncio
+async def test_resumable_chunks_share_the_running_digest(client, tmp_path):
+    """Requests get the same service, so no chunk re-reads the partial file."""
+    from backend.app.main import app
+
+    app.dependency_overrides[verify_api_key] = lambda: "bypass-key"
+    content = b"x" * 4096
+    get_resumable_upload_service.cache_clear()
+    try:
+        with (
+            patch("backend.app.api.deps.settings.UPLOAD_DIR", str(tmp_path)),
+            patch("backend.app.api.deps.settings.RESUMABLE_CHUNK_MAX_BYTES", 1024),
+            patch(
+                "backend.app.services.resumable._digest_prefix",
+                side_effect=AssertionError("partial file read again"),
+            ),
+        ):
+            response = await client.post(
+                "/api/v1/resumable-uploads",
+                json={"filename": "a.mp4", "size": len(content)},
+            )
+            url = f"/api/v1/resumable-uploads/{response.json()['upload_id']}"
+            for offset in range(0, len(content), 1024):
+                chunk = content[offset : offset + 1024]
+                response = await client.patch(
+                    url,
+                    content=chunk,
+                    headers={
+                        "Upload-Offset": str(offset),
+                        "X-Chunk-SHA256": hashlib.sha256(chunk).hexdigest(),
+                    },
+                )
+                assert response.status_code == 200
+
+            upload, _ = await get_resumable_upload_service().get(
+                uuid.UUID(url.rsplit("/", 1)[1])
+            )
+        assert upload.sha256 == hashlib.sha256(content).hexdigest()
+    finally:
+        get_resumable_upload_service.cache_clear()
+        app.dependency_overrides = {}
+
+
+@pytest.mark.asyncio
+async def test_complete_resumable_upload_requires_all_bytes(client, tmp_path):
+    local_task_service = AsyncMock()
+    uploads = ResumableUploadService(str(tmp_path), chunk_max_bytes=10, ttl_seconds=60)
+
+    async def override_task():
+        return local_task_service
+
+    from backend.app.main import app
+
+    app.dependency_overrides[get_task_service] = override_task
+    app.dependency_overrides[get_resumable_upload_service] = lambda: uploads
+    app.dependency_overrides[verify_api_key] = lambda: "bypass-key"
+
+    response = await client.post(
+        "/api/v1/resumable-uploads", json={"filename": "a.mp4", "size": 5}
+    )
+    upload_id = response.json()["upload_id"]
+    response = await client.post(f"/api/v1/resumable-uploads/{upload_id}/complete")
+
+    assert response.status_code == 409
+    local_task_service.create_task.assert_not_awaited()
+
+    app.dependency_overrides = {}
+
+
+@pytest.mark.asyncio
+async def test_detect_reuses_result_of_duplicate_video(client, mock_file_service):
+    task = Task(id=uuid.uuid4(), status=TaskStatus.QUEUED, input_filename="a.mp4")
+    source = Task(id=uuid.uuid4(), status=TaskStatus.COMPLETED, input_filename="b.mp4")
+    local_task_service = AsyncMock()
+    local_task_service.create_task.return_value = task
+
+    async def deduplicate(task, content_hash, dedupe_key, reuse=True):
+        task.status = TaskStatus.COMPLETED
+        return source
+
+    local_task_service.deduplicate.side_effect = deduplicate
+
+    async def override_task():
+        return local_task_service
+
+    from backend.app.main import app
+
+    app.dependency_overrides[get_task_service] = override_task
+    app.dependency_overrides[get_file_service] = lambda: mock_file_service
+    app.dependency_overrides[verify_api_key] = lambda: "bypass-key"
+
+    with patch.object(celery_process_video, "delay") as mock_delay:
+        files = {"file": ("video.mp4", b"fake content", "video/mp4")}
+        response = await client.post("/api/v1/detect", files=files)
+
+    assert response.status_code == 202
+    assert response.json()["status"] == "completed"
+    assert local_task_service.deduplicate.await_args[0][1] == "0"
+    mock_file_service.upload_file_to_s3.assert_not_awaited()
+    mock_file_service.cleanup_local_file.assert_awaited_once_with(
+        "/tmp/uploads/test.mp4"
+    )
+    mock_delay.assert_not_called()
+
+    app.dependency_overrides = {}
+
+
+@pytest.mark.asyncio
+async def test_analytics_endpoint_links_reused_report(client, mock_file_service):
+    source_id = uuid.uuid4()
+    local_task_service = AsyncMock()
+    local_task_service.get_task.return_value = Task(
+        status=TaskStatus.COMPLETED, input_filename="a.mp4", source_task_id=source_id
+    )
+
+    async def override_task():
+        return local_task_service
+
+    from backend.app.main import app
+
+    app.dependency_overrides[get_task_service] = override_task
+    app.dependency_overrides[get_file_service] = lambda: mock_file_service
+    app.dependency_overrides[verify_api_key] = lambda: "bypass-key"
+
+    response = await client.get(f"/api/v1/analytics/{uuid.uuid4()}")
+
+    assert response.status_code == 200
+    mock_file_service.generate_presigned_url.assert_awaited_once_with(
+        f"analytics/{source_id}.json"
+    )
+
+    app.dependency_overrides = {}
+
+
+@pytest.mark.asyncio
+async def test_rethreshold_queues_task_from_origin_detections(
+    client, mock_file_service
+):
+    origin = Task(
+        id=uuid.uuid4(),
+        status=TaskStatus.COMPLETED,
+        input_filename="a.mp4",
+        content_hash="abc",
+        input_key="uploads/o.mp4",
+    )
+    duplicate = Task(
+        id=uuid.uuid4(),
+        status=TaskStatus.COMPLETED,
+        input_filename="a.mp4",
+        source_task_id=origin.id,
+    )
+    new_task = Task(id=uuid.uuid4(), status=TaskStatus.QUEUED, input_filename="a.mp4")
+    local_task_service = AsyncMock()
+    local_task_service.get_task.side_effect = lambda task_id: (
+        origin if task_id == origin.id else duplicate
+    )
+    local_task_service.create_task.return_value = new_task
+    mock_file_service.object_size = AsyncMock(return_value=1024)
+
+    async def override_task():
+        return local_task_service
+
+    from backend.app.main import app
+
+    app.dependency_overrides[get_task_service] = override_task
+    app.dependency_overrides[get_file_service] = lambda: mock_file_service
+    app.dependency_overrides[verify_api_key] = lambda: "bypass-key"
+
+    with (
+        patch.object(celery_rethreshold_video, "delay") as mock_delay,
+        patch(
+            "backend.app.api.v1.router.detections_key",
+            return_value="detections/abc/m.parquet",
+        ) as mock_key,
+    ):
+        response = await client.post(
+            f"/api/v1/rethreshold/{duplicate.id}",
+            json={"conf": 0.5, "render_video": True},
+        )
+
+    assert response.status_code == 202
+    assert response.json()["task_id"] == str(new_task.id)
+    mock_key.assert_called_once_with("abc")
+    local_task_service.create_task.assert_awaited_once_with(
+        "a.mp4", ProcessingMode.FULL, False
+    )
+    local_task_service.record_input.assert_awaited_once_with(
+        new_task, "uploads/o.mp4", "abc"
+    )
+    mock_delay.assert_called_once_with(
+        str(new_task.id),
+        "detections/abc/m.parquet",
+        0.5,
+        ProcessingMode.FULL,
+        False,
+        "uploads/o.mp4",
+    )
+
+    app.dependency_overrides = {}
+
+
+@pytest.mark.asyncio
+async def test_rethreshold_of_rethresholded_task(client, mock_file_service, session):
+    task_service = TaskService(session)
+    origin = await task_service.create_task("a.mp4")
+    await task_service.record_input(origin, "uploads/o.mp4", "abc")
+    await task_service.mark_completed(origin, "results/o.mp4")
+    mock_file_service.object_size = AsyncMock(return_value=1024)
+
+    from backend.app.main import app
+
+    app.dependency_overrides[get_task_service] = lambda: task_service
+    app.dependency_overrides[get_file_service] = lambda: mock_file_service
+    app.dependency_overrides[verify_api_key] = lambda: "bypass-key"
+
+    with patch.object(celery_rethreshold_video, "delay") as mock_delay:
+        first = await client.post(
+            f"/api/v1/rethreshold/{origin.id}", json={"conf": 0.5}
+        )
+        rethresholded = await task_service.get_task(uuid.UUID(first.json()["task_id"]))
+        assert rethresholded is not None
+        await task_service.mark_completed(rethresholded, "analytics/r.json")
+
+        second = await client.post(
+            f"/api/v1/rethreshold/{rethresholded.id}",
+            json={"conf": 0.6, "render_video": True},
+        )
+
+    assert first.status_code == 202
+    assert second.status_code == 202
+    assert mock_delay.call_args.args[1:] == (
+        detections_key("abc"),
+        0.6,
+        ProcessingMode.FULL,
+        False,
+        "uploads/o.mp4",
+    )
+
+    app.dependency_overrides = {}
+
+
+@pytest.mark.asyncio
+async def test_rethreshold_requires_kept_detections(client, mock_file_service):
+    task = Task(
+        id=uuid.uuid4(),
+        status=TaskStatus.COMPLETED,
+        input_filename="a.mp4",
+        content_hash="abc",
+    )
+    local_task_service = AsyncMock()
+    local_task_service.get_task.return_value = task
+    mock_file_service.object_size = AsyncMock(return_value=None)
+
+    async def override_task():
+        return local_task_service
+
+    from backend.app.main import app
+
+    app.dependency_overrides[get_task_service] = override_task
+    app.dependency_overrides[get_file_service] = lambda: mock_file_service
+    app.dependency_overrides[verify_api_key] = lambda: "bypass-key"
+
+    with patch.object(celery_rethreshold_video, "delay") as mock_delay:
+        url = f"/api/v1/rethreshold/{task.id}"
+        missing = await client.post(url, json={"conf": 0.5})
+        with patch("backend.app.api.v1.router.settings.DETECTION_CACHE_MIN_CONF", 0.1):
+            too_low = await client.post(url, json={"conf": 0.05})
+
+    assert missing.status_code == 404
+    assert too_low.status_code == 422
+    local_task_service.create_task.assert_not_awaited()
+    mock_delay.assert_not_called()
+
+    app.dependency_overrides = {}
+
+
+@pytest.mark.asyncio
+async def test_shutdown_waits_for_the_upload_collector():
+    from backend.app.main import app, lifespan
+
+    stopped = []
+
+    async def run_garbage_collector(interval_seconds):
+        try:
+            await asyncio.sleep(3600)
+        finally:
+            stopped.append(True)
+
+    uploads = MagicMock()
+    uploads.run_garbage_collector = run_garbage_collector
+    with (
+        patch("backend.app.main.init_db", new_callable=AsyncMock),
+        patch("backend.app.main.open_storage", new_callable=AsyncMock),
+        patch("backend.app.main.close_storage", new_callable=AsyncMock),
+        patch("backend.app.main.get_resumable_upload_service", return_value=uploads),
+    ):
+        async with lifespan(app):
+            await asyncio.sleep(0)
+
+    assert stopped == [True]
@@ -1,29 +1,12 @@
 import uuid
 
 import pytest
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
-from sqlmodel import SQLModel
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from backend.app.models.task import TaskStatus
 from backend.app.services.task import TaskService
 
 
-@pytest.fixture(name="session")
-async def session_fixture():
-    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
-
-    async with engine.begin() as conn:
-        await conn.run_sync(SQLModel.metadata.create_all)
-
-    async_session = async_sessionmaker(
-        engine, expire_on_commit=False, class_=AsyncSession
-    )
-
-    async with async_session() as session:
-        yield session
-
-
 @pytest.mark.asyncio
 async def test_task_service_crud_lifecycle(session: AsyncSession):
     service = TaskService(session)
@@ -59,3 +42,82 @@ async def test_task_service_get_non_existent(session: AsyncSession):
     task = await service.get_task(fake_id)
 
     assert task is None
+
+
+@pytest.mark.asyncio
+async def test_deduplicate_reuses_completed_result(session: AsyncSession):
+    service = TaskService(session)
+    original = await service.create_task("a.mp4")
+    assert await service.deduplicate(original, "hash", "key") is None
+    await service.mark_completed(original, "results/a.mp4")
+
+    duplicate = await service.create_task("b.mp4")
+    source = await service.deduplicate(duplicate, "hash", "key")
+
+    assert source is not None and source.id == original.id
+    await session.refresh(duplicate)
+    assert duplicate.status == TaskStatus.COMPLETED
+    assert duplicate.result_url == "results/a.mp4"
+    assert duplicate.source_task_id == original.id
+    assert duplicate.content_hash == "hash"
+
+
+@pytest.mark.asyncio
+async def test_deduplicate_skips_unsuitable_tasks(session: AsyncSession):
+    service = TaskService(session)
+    original = await service.create_task("a.mp4")
+    await service.deduplicate(original, "hash", "key")
+
+    # Not completed yet.
+    assert (
+        await service.deduplicate(await service.create_task("b.mp4"), "hash", "key")
+        is None
+    )
+
+    await service.mark_completed(original, "results/a.mp4")
+    # Other settings, or a time series the original did not keep.
+    assert (
+        await service.deduplicate(await service.create_task("c.mp4"), "hash", "other")
+        is None
+    )
+    with_series = await service.create_task("d.mp4", raw_time_series=True)
+    assert await service.deduplicate(with_series, "hash", "key") is None
+    # Lookup disabled: the content is recorded only.
+    recorded = await service.create_task("e.mp4")
+    assert await service.deduplicate(recorded, "hash", "key", reuse=False) is None
+    assert recorded.status == TaskStatus.QUEUED
+    assert recorded.content_hash == "hash"
+
+
+@pytest.mark.asyncio
+async def test_upload_task_is_created_once(session: AsyncSession):
+    service = TaskService(session)
+    upload_id = uuid.uuid4()
+
+    task, created = await service.create_upload_task(upload_id, "a.mp4")
+    again, created_again = await service.create_upload_task(upload_id, "a.mp4")
+
+    assert created and not created_again
+    assert again.id == task.id
+    assert (await service.get_task_by_upload(upload_id)) == task
+
+
+@pytest.mark.asyncio
+async def test_concurrent_upload_task_creation_returns_the_winner(
+    session: AsyncSession, monkeypatch
+):
+    service = TaskService(session)
+    upload_id = uuid.uuid4()
+    winner, _ = await service.create_upload_task(upload_id, "a.mp4")
+
+    # The other request looked before the winner committed.
+    lookups = iter([None, winner])
+
+    async def get_task_by_upload(_):
+        return next(lookups)
+
+    monkeypatch.setattr(service, "get_task_by_upload", get_task_by_upload)
+    task, created = await service.create_upload_task(upload_id, "a.mp4")
+
+    assert not created
+    assert task is winner
@@ -0,0 +1,79 @@
+"""Tests for reusing results of videos processed before."""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from backend.app.models.task import ProcessingMode, Task
+from backend.app.services.dedupe import (
+    DedupeStats,
+    dedupe_key,
+    dedupe_stats,
+    file_sha256,
+    reuse_completed_result,
+)
+
+
+def test_dedupe_key_covers_mode_and_settings():
+    key = dedupe_key("abc", ProcessingMode.FULL)
+
+    assert key == dedupe_key("abc", ProcessingMode.FULL)
+    assert key != dedupe_key("abd", ProcessingMode.FULL)
+    assert key != dedupe_key("abc", ProcessingMode.ANALYTICS_ONLY)
+    with patch("backend.app.services.dedupe.settings.DETECTION_CONF", 0.5):
+        assert key != dedupe_key("abc", ProcessingMode.FULL)
+    with patch("backend.app.services.dedupe.settings.MODEL_PATH", "yolov8s.pt"):
+        assert key != dedupe_key("abc", ProcessingMode.FULL)
+
+
+@pytest.mark.asyncio
+async def test_file_sha256(tmp_path):
+    path = tmp_path / "video.mp4"
+    path.write_bytes(b"abc")
+
+    assert await file_sha256(str(path)) == (
+        "ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad"
+    )
+
+
+def test_stats_hit_rate():
+    stats = DedupeStats()
+    assert stats.hit_rate == 0.0
+
+    stats.record(True)
+    stats.record(False)
+    stats.record(False)
+    stats.record(True)
+
+    assert (stats.lookups, stats.hits, stats.hit_rate) == (4, 2, 0.5)
+
+
+@pytest.mark.asyncio
+async def test_reuse_completed_result_counts_lookups():
+    task = Task(input_filename="a.mp4")
+    task_service = AsyncMock()
+    task_service.deduplicate.return_value = Task(input_filename="b.mp4")
+    lookups, hits = dedupe_stats.lookups, dedupe_stats.hits
+
+    assert await reuse_completed_result(task_service, task, "abc") is True
+
+    task_service.deduplicate.assert_awaited_once_with(
+        task, "abc", dedupe_key("abc", task.mode), reuse=True
+    )
+    assert (dedupe_stats.lookups, dedupe_stats.hits) == (lookups + 1, hits + 1)
+
+
+@pytest.mark.asyncio
+async def test_reuse_disabled_only_records_content():
+    task_service = AsyncMock()
+    task_service.deduplicate.return_value = None
+    lookups = dedupe_stats.lookups
+
+    with patch("backend.app.services.dedupe.settings.DEDUPE_ENABLED", False):
+        reused = await reuse_completed_result(
+            task_service, Task(input_filename="a.mp4"), "abc"
+        )
+
+    assert reused is False
+    assert task_service.deduplicate.await_args.kwargs == {"reuse": False}
+    assert dedupe_stats.lookups == lookups
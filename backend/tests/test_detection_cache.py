@@ -0,0 +1,108 @@
+"""Tests for the raw detection cache."""
+
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+import supervision as sv
+
+from backend.app.services.detection_cache import (
+    DetectionCache,
+    DetectionCacheWriter,
+    concat_detection_caches,
+    detection_cache_path,
+    detections_key,
+)
+
+INFO = sv.VideoInfo(width=64, height=48, fps=10, total_frames=5)
+
+
+def _detections(frame_id: int) -> sv.Detections:
+    """Frame ``i`` has ``i % 3`` boxes with rising confidence."""
+    count = frame_id % 3
+    if not count:
+        return sv.Detections.empty()
+    return sv.Detections(
+        xyxy=np.full((count, 4), frame_id, dtype=np.float32),
+        confidence=np.array([0.2, 0.8][:count], dtype=np.float32),
+        class_id=np.arange(count),
+    )
+
+
+def _write(path: str, frames: int = 5, chunk_rows: int = 2) -> None:
+    with DetectionCacheWriter(
+        path, {0: "car", 1: "bus"}, INFO, "in.mp4", 0.1, chunk_rows=chunk_rows
+    ) as writer:
+        for frame_id in range(frames):
+            writer.add(frame_id, _detections(frame_id))
+        writer.skipped_frames_ratio = 0.4
+
+
+def test_round_trip_keeps_every_frame(tmp_path):
+    path = str(tmp_path / "cache.parquet")
+    _write(path)
+
+    cache = DetectionCache(path)
+    frames = list(cache.iter_frames(0.1))
+
+    assert cache.frames == 5
+    assert cache.names == {0: "car", 1: "bus"}
+    assert cache.source_filename == "in.mp4"
+    assert cache.skipped_frames_ratio == 0.4
+    assert (cache.video_info.width, cache.video_info.fps) == (64, 10)
+    assert [len(d) for d in frames] == [0, 1, 2, 0, 1]
+    np.testing.assert_array_equal(frames[2].xyxy, np.full((2, 4), 2))
+    np.testing.assert_array_equal(frames[2].class_id, [0, 1])
+
+
+def test_threshold_filters_detections(tmp_path):
+    path = str(tmp_path / "cache.parquet")
+    _write(path)
+    cache = DetectionCache(path)
+
+    frames = list(cache.iter_frames(0.5))
+
+    assert [len(d) for d in frames] == [0, 0, 1, 0, 0]
+    assert frames[2].class_id.tolist() == [1]
+    with pytest.raises(ValueError):
+        list(cache.iter_frames(0.05))
+
+
+def test_trailing_frames_without_detections(tmp_path):
+    path = str(tmp_path / "cache.parquet")
+    with DetectionCacheWriter(path, {0: "car"}, INFO, "in.mp4", 0.1) as writer:
+        writer.add(0, _detections(1))
+        writer.add(1, sv.Detections.empty())
+        writer.add(2, sv.Detections.empty())
+
+    assert [len(d) for d in DetectionCache(path).iter_frames(0.1)] == [1, 0, 0]
+
+
+def test_concat_shifts_frames_of_later_segments(tmp_path):
+    paths = [str(tmp_path / f"{i}.parquet") for i in range(2)]
+    for path in paths:
+        _write(path)
+    target = str(tmp_path / "joined.parquet")
+
+    concat_detection_caches(paths, target)
+
+    joined = DetectionCache(target)
+    frames = list(joined.iter_frames(0.1))
+    assert joined.frames == 10
+    assert joined.video_info.total_frames == 10
+    assert joined.skipped_frames_ratio == pytest.approx(0.4)
+    assert [len(d) for d in frames] == [0, 1, 2, 0, 1] * 2
+    assert frames[7].xyxy[0, 0] == 2
+
+
+def test_key_and_path():
+    key = detections_key("abc")
+
+    assert key.startswith("detections/abc/")
+    with patch("backend.app.services.detection_cache.settings.MODEL_PATH", "x.pt"):
+        assert detections_key("abc") != key
+    with patch(
+        "backend.app.services.detection_cache.settings.DETECTION_CACHE_MIN_CONF", 0.2
+    ):
+        assert detections_key("abc") != key
+    assert detection_cache_path("/s/t.mp4") == "/s/t.detections.parquet"
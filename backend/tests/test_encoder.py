@@ -0,0 +1,149 @@
+"""Tests for the ffmpeg pipe encoder."""
+
+import shutil
+import subprocess
+import sys
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from backend.app.services.encoder import (
+    FfmpegPipeWriter,
+    VideoEncoderError,
+    has_audio_stream,
+)
+
+requires_ffmpeg = pytest.mark.skipif(
+    shutil.which("ffmpeg") is None, reason="ffmpeg is not installed"
+)
+
+
+@pytest.fixture
+def mock_popen():
+    with patch("backend.app.services.encoder.subprocess.Popen") as popen:
+        process = popen.return_value
+        process.communicate.return_value = (None, None)
+        process.returncode = 0
+        yield popen
+
+
+def test_pipe_writer_command_without_audio(mock_popen):
+    writer = FfmpegPipeWriter("out.mp4", 25.0, (64, 48))
+
+    command = mock_popen.call_args[0][0]
+    assert command[command.index("-f") + 1] == "rawvideo"
+    assert command[command.index("-s") + 1] == "64x48"
+    assert command[command.index("-i") + 1] == "-"
+    assert "-an" in command
+    assert "aac" not in command
+    assert command[-1] == "out.mp4"
+
+    writer.write(np.zeros((48, 64, 3), dtype=np.uint8))
+    writer.release()
+    writer.release()
+
+    stdin = mock_popen.return_value.stdin
+    assert len(bytes(stdin.write.call_args[0][0])) == 64 * 48 * 3
+    mock_popen.return_value.communicate.assert_called_once()
+
+
+def test_pipe_writer_command_with_audio(mock_popen):
+    FfmpegPipeWriter("out.mp4", 25.0, (64, 48), audio_source="in.mp4").release()
+
+    command = mock_popen.call_args[0][0]
+    assert "in.mp4" in command
+    assert command[command.index("-acodec") + 1] == "aac"
+    assert "-an" not in command
+
+
+def test_pipe_writer_rejects_wrong_frame_size(mock_popen):
+    writer = FfmpegPipeWriter("out.mp4", 25.0, (64, 48))
+
+    with pytest.raises(VideoEncoderError):
+        writer.write(np.zeros((10, 10, 3), dtype=np.uint8))
+    writer.release()
+
+
+def test_pipe_writer_reports_ffmpeg_failure(mock_popen):
+    def fail():
+        mock_popen.call_args.kwargs["stderr"].write(b"bad input")
+        mock_popen.return_value.returncode = 1
+
+    mock_popen.return_value.communicate.side_effect = fail
+
+    writer = FfmpegPipeWriter("out.mp4", 25.0, (64, 48))
+
+    with pytest.raises(VideoEncoderError, match="bad input"):
+        writer.release()
+
+
+def test_pipe_writer_keeps_consuming_frames_of_a_verbose_encoder():
+    """Log output beyond the pipe buffer does not block the encoder."""
+    # Logs 1 MiB before reading any frame, then fails.
+    script = (
+        "import sys; sys.stderr.write('x' * 2**20 + 'done'); "
+        "sys.stdin.buffer.read(); sys.exit(1)"
+    )
+    popen = subprocess.Popen
+
+    def verbose_encoder(command, **kwargs):
+        return popen([sys.executable, "-c", script], **kwargs)
+
+    with patch(
+        "backend.app.services.encoder.subprocess.Popen", side_effect=verbose_encoder
+    ):
+        writer = FfmpegPipeWriter("out.mp4", 25.0, (64, 48))
+        for _ in range(100):
+            writer.write(np.zeros((48, 64, 3), dtype=np.uint8))
+
+        with pytest.raises(VideoEncoderError) as exc_info:
+            writer.release()
+
+    message = str(exc_info.value)
+    assert message.endswith("done")
+    assert len(message) < 5000
+
+
+def test_has_audio_stream_handles_missing_ffprobe():
+    with patch(
+        "backend.app.services.encoder.subprocess.run",
+        side_effect=FileNotFoundError("ffprobe"),
+    ):
+        assert has_audio_stream("in.mp4") is False
+
+
+def test_has_audio_stream_detects_audio():
+    result = MagicMock(stdout="1\n")
+    with patch("backend.app.services.encoder.subprocess.run", return_value=result):
+        assert has_audio_stream("in.mp4") is True
+
+
+@requires_ffmpeg
+def test_pipe_writer_produces_h264(tmp_path):
+    output = tmp_path / "out.mp4"
+
+    writer = FfmpegPipeWriter(str(output), 10.0, (64, 48))
+    for value in range(10):
+        writer.write(np.full((48, 64, 3), value * 20, dtype=np.uint8))
+    writer.release()
+
+    probe = subprocess.run(
+        [
+            "ffprobe",
+            "-v",
+            "error",
+            "-select_streams",
+            "v:0",
+            "-show_entries",
+            "stream=codec_name",
+            "-of",
+            "csv=p=0",
+            str(output),
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    assert probe.stdout.strip() == "h264"
+    assert has_audio_stream(str(output)) is False
@@ -1,10 +1,29 @@
 """Tests for file service."""
 
-from unittest.mock import AsyncMock, MagicMock, patch
+import errno
+import hashlib
+import os
+import tempfile
+from contextlib import ExitStack
+from unittest.mock import AsyncMock, patch
 
+import boto3
+import httpx
 import pytest
+from botocore.exceptions import ClientError
+from fastapi import UploadFile
 
-from backend.app.services.file import FileService
+from backend.app.services.file import (
+    FileService,
+    FileTooLargeError,
+    MiB,
+    S3DownloadError,
+    S3UploadError,
+    _persist_upload,
+)
+from backend.app.services.url_cache import PresignedUrlCache
+
+FS = "backend.app.services.file"
 
 MOCK_CONFIG = {
     "s3_endpoint": "http://fake-s3",
@@ -29,53 +48,272 @@ def mock_s3_client():
         yield mock_client
 
 
+def _upload(data: bytes, max_size: int = MiB) -> UploadFile:
+    spool = tempfile.SpooledTemporaryFile(max_size=max_size)
+    spool.write(data)
+    spool.seek(0)
+    return UploadFile(spool, filename="video.mp4", size=len(data))
+
+
 @pytest.mark.asyncio
-async def test_save_upload_locally():
-    """Test saving uploaded file locally."""
-    mock_upload = MagicMock()
-    mock_upload.read = AsyncMock(side_effect=[b"chunk1", b"chunk2", b""])
+@pytest.mark.parametrize("size", [1000, 3 * MiB])
+async def test_save_upload_locally(tmp_path, size):
+    """Uploads spooled in memory and on disk are saved and hashed."""
+    data = os.urandom(size)
+    upload = _upload(data)
+    service = FileService(**{**MOCK_CONFIG, "upload_dir": str(tmp_path)})
 
-    mock_file_handle = AsyncMock()
-    mock_file_handle.write = AsyncMock()
+    saved = await service.save_upload_locally(upload, "video.mp4")
 
-    mock_context = AsyncMock()
-    mock_context.__aenter__.return_value = mock_file_handle
-    mock_context.__aexit__.return_value = None
+    assert saved.path == str(tmp_path / "video.mp4")
+    assert saved.size == size
+    assert saved.sha256 == hashlib.sha256(data).hexdigest()
+    assert (tmp_path / "video.mp4").read_bytes() == data
 
-    with patch("aiofiles.open", return_value=mock_context) as mock_open_func:
-        service = FileService(**MOCK_CONFIG)
-        path = await service.save_upload_locally(mock_upload, "video.mp4")
 
-        assert path == "/tmp/up/video.mp4"
-        mock_open_func.assert_called_once()
-        assert mock_file_handle.write.call_count == 2
+@pytest.mark.asyncio
+@pytest.mark.parametrize("size", [1000, 3 * MiB])
+async def test_save_upload_locally_can_skip_hashing(tmp_path, size):
+    data = os.urandom(size)
+    service = FileService(**{**MOCK_CONFIG, "upload_dir": str(tmp_path)})
+
+    saved = await service.save_upload_locally(
+        _upload(data), "video.mp4", hash_content=False
+    )
+
+    assert saved.sha256 is None
+    assert (tmp_path / "video.mp4").read_bytes() == data
 
 
 @pytest.mark.asyncio
-async def test_upload_file_to_s3(mock_s3_client):
-    """Test uploading file to S3."""
-    service = FileService(**MOCK_CONFIG)
+@pytest.mark.parametrize("size", [1000, 3 * MiB])
+async def test_save_upload_locally_enforces_size_limit(tmp_path, size):
+    service = FileService(**{**MOCK_CONFIG, "upload_dir": str(tmp_path)})
+
+    with pytest.raises(FileTooLargeError):
+        await service.save_upload_locally(
+            _upload(os.urandom(size)), "video.mp4", max_bytes=size - 1
+        )
+
+    assert list(tmp_path.iterdir()) == []
 
-    # Mock aiofiles.open for the async file read
-    mock_file_handle = AsyncMock()
-    mock_file_handle.read = AsyncMock(return_value=b"video_data")
 
-    mock_context = AsyncMock()
-    mock_context.__aenter__.return_value = mock_file_handle
-    mock_context.__aexit__.return_value = None
+@pytest.mark.parametrize(
+    ("unsupported", "method"),
+    [
+        ([], "copy_file_range"),
+        (["copy_file_range"], "sendfile"),
+        (["copy_file_range", "sendfile"], "copy"),
+    ],
+)
+def test_persist_falls_back_when_fast_copies_are_unsupported(
+    tmp_path, unsupported, method
+):
+    """Spooled uploads have no name to link; the fastest working copy wins."""
+    data = os.urandom(3 * MiB)
+    upload = _upload(data)
+    target = tmp_path / "video.mp4"
+    error = OSError(errno.EXDEV, "unsupported")
+
+    with ExitStack() as stack:
+        for name in unsupported:
+            stack.enter_context(patch(f"{FS}.os.{name}", side_effect=error))
+        mock_logger = stack.enter_context(patch(f"{FS}.logger"))
+        saved = _persist_upload(upload.file, str(target), None)
+
+    assert target.read_bytes() == data
+    assert saved.sha256 == hashlib.sha256(data).hexdigest()
+    assert mock_logger.debug.call_args.kwargs["method"] == method
+
+
+def test_persist_hard_links_named_files(tmp_path):
+    source = tmp_path / "spool"
+    source.write_bytes(b"video" * 1000)
+    target = tmp_path / "video.mp4"
+
+    with open(source, "rb") as f:
+        saved = _persist_upload(f, str(target), None)
+
+    assert os.path.samefile(source, target)
+    assert saved.size == 5000
+
+
+@pytest.mark.asyncio
+async def test_upload_file_to_s3(mock_s3_client, tmp_path):
+    """Test uploading file to S3."""
+    service = FileService(**MOCK_CONFIG)
+    local = tmp_path / "local.mp4"
+    local.write_bytes(b"video_data")
 
-    with patch("aiofiles.open", return_value=mock_context):
-        key = await service.upload_file_to_s3("/tmp/local.mp4", "results/video.mp4")
+    key = await service.upload_file_to_s3(str(local), "results/video.mp4")
 
     assert key == "results/video.mp4"
 
     mock_s3_client.put_object.assert_awaited_once()
+    mock_s3_client.create_multipart_upload.assert_not_called()
     args = mock_s3_client.put_object.call_args
     assert args.kwargs["Bucket"] == "test-bucket"
     assert args.kwargs["Key"] == "results/video.mp4"
     assert args.kwargs["Body"] == b"video_data"
 
 
+def _part_client(mock_s3_client, failures: dict[int, int]) -> dict[int, bytes]:
+    """Make ``upload_part`` fail ``failures[n]`` times for part ``n``."""
+    sent: dict[int, bytes] = {}
+    mock_s3_client.create_multipart_upload.return_value = {"UploadId": "up-1"}
+
+    async def upload_part(**kwargs):
+        number = kwargs["PartNumber"]
+        if failures.get(number):
+            failures[number] -= 1
+            raise ClientError({"Error": {"Code": "SlowDown"}}, "UploadPart")
+        sent[number] = kwargs["Body"]
+        return {"ETag": f'"etag-{number}"'}
+
+    mock_s3_client.upload_part.side_effect = upload_part
+    return sent
+
+
+@pytest.mark.asyncio
+async def test_multipart_upload_retries_failed_part_only(mock_s3_client, tmp_path):
+    local = tmp_path / "video.mp4"
+    local.write_bytes(b"a" * 10 + b"b" * 10 + b"c" * 5)
+    sent = _part_client(mock_s3_client, failures={2: 2})
+    service = FileService(**MOCK_CONFIG, multipart_threshold=20, part_size=10)
+
+    with patch("backend.app.services.file.asyncio.sleep", new_callable=AsyncMock):
+        await service.upload_file_to_s3(str(local), "results/video.mp4")
+
+    mock_s3_client.put_object.assert_not_called()
+    assert sent == {1: b"a" * 10, 2: b"b" * 10, 3: b"c" * 5}
+    attempts = [
+        c.kwargs["PartNumber"] for c in mock_s3_client.upload_part.call_args_list
+    ]
+    assert sorted(attempts) == [1, 2, 2, 2, 3]
+    mock_s3_client.complete_multipart_upload.assert_awaited_once_with(
+        Bucket="test-bucket",
+        Key="results/video.mp4",
+        UploadId="up-1",
+        MultipartUpload={
+            "Parts": [
+                {"PartNumber": 1, "ETag": '"etag-1"'},
+                {"PartNumber": 2, "ETag": '"etag-2"'},
+                {"PartNumber": 3, "ETag": '"etag-3"'},
+            ]
+        },
+    )
+    mock_s3_client.abort_multipart_upload.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_multipart_upload_aborts_after_retries(mock_s3_client, tmp_path):
+    local = tmp_path / "video.mp4"
+    local.write_bytes(b"x" * 30)
+    _part_client(mock_s3_client, failures={3: 5})
+    service = FileService(
+        **MOCK_CONFIG, multipart_threshold=10, part_size=10, part_retries=3
+    )
+
+    with (
+        patch("backend.app.services.file.asyncio.sleep", new_callable=AsyncMock),
+        pytest.raises(S3UploadError, match="SlowDown"),
+    ):
+        await service.upload_file_to_s3(str(local), "results/video.mp4")
+
+    mock_s3_client.complete_multipart_upload.assert_not_called()
+    mock_s3_client.abort_multipart_upload.assert_awaited_once_with(
+        Bucket="test-bucket", Key="results/video.mp4", UploadId="up-1"
+    )
+
+
+@pytest.fixture
+def moto_s3():
+    """Run an in-process S3 stand-in and yield its endpoint URL."""
+    server_module = pytest.importorskip("moto.server")
+    server = server_module.ThreadedMotoServer(port=0, verbose=False)
+    server.start()
+    host, port = server.get_host_and_port()
+    endpoint = f"http://{host}:{port}"
+    boto3.client(
+        "s3",
+        endpoint_url=endpoint,
+        aws_access_key_id="fake",
+        aws_secret_access_key="fake",
+        region_name="us-east-1",
+    ).create_bucket(Bucket="test-bucket")
+    yield endpoint
+    server.stop()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("size_mib", [3, 11])
+async def test_upload_round_trips_through_s3_stand_in(moto_s3, tmp_path, size_mib):
+    """Small files go up in one PUT, large ones in 5 MiB parts."""
+    local = tmp_path / "video.mp4"
+    data = os.urandom(size_mib * MiB)
+    local.write_bytes(data)
+    config = {**MOCK_CONFIG, "s3_endpoint": moto_s3}
+    service = FileService(**config, multipart_threshold=5 * MiB, part_size=5 * MiB)
+
+    await service.upload_file_to_s3(str(local), "results/video.mp4")
+
+    s3 = boto3.client(
+        "s3",
+        endpoint_url=moto_s3,
+        aws_access_key_id="fake",
+        aws_secret_access_key="fake",
+        region_name="us-east-1",
+    )
+    stored = s3.get_object(Bucket="test-bucket", Key="results/video.mp4")
+    assert stored["Body"].read() == data
+    # Multipart ETags end in the number of parts.
+    parts = stored["ETag"].strip('"').partition("-")[2]
+    assert parts == ("3" if size_mib == 11 else "")
+
+
+@pytest.mark.asyncio
+async def test_presigned_post_upload_is_downloadable(moto_s3, tmp_path):
+    """A file posted with the presigned form can be sized and downloaded."""
+    service = FileService(**{**MOCK_CONFIG, "s3_endpoint": moto_s3})
+    data = os.urandom(2 * MiB + 17)
+
+    post = await service.generate_presigned_post("uploads/a.mp4", max_bytes=4 * MiB)
+    assert post is not None
+    response = httpx.post(
+        post["url"], data=post["fields"], files={"file": ("a.mp4", data)}
+    )
+    assert response.is_success
+
+    assert await service.object_size("uploads/a.mp4") == len(data)
+    local = tmp_path / "a.mp4"
+    await service.download_file_from_s3("uploads/a.mp4", str(local))
+    assert local.read_bytes() == data
+
+
+@pytest.mark.asyncio
+async def test_missing_object_has_no_size_and_fails_download(moto_s3, tmp_path):
+    service = FileService(**{**MOCK_CONFIG, "s3_endpoint": moto_s3})
+
+    assert await service.object_size("uploads/missing.mp4") is None
+    with pytest.raises(S3DownloadError):
+        await service.download_file_from_s3(
+            "uploads/missing.mp4", str(tmp_path / "missing.mp4")
+        )
+
+
+@pytest.mark.asyncio
+async def test_deleted_object_is_gone_and_missing_ones_are_ignored(moto_s3, tmp_path):
+    service = FileService(**{**MOCK_CONFIG, "s3_endpoint": moto_s3})
+    local = tmp_path / "report.json"
+    local.write_bytes(b"{}")
+    await service.upload_file_to_s3(str(local), "analytics/a.json")
+
+    await service.delete_file_from_s3("analytics/a.json")
+    await service.delete_file_from_s3("analytics/missing.json")
+
+    assert await service.object_size("analytics/a.json") is None
+
+
 @pytest.mark.asyncio
 async def test_generate_presigned_url(mock_s3_client):
     """Test generating presigned URL for S3 object."""
@@ -88,3 +326,63 @@ async def test_generate_presigned_url(mock_s3_client):
 
     assert url == "https://cdn.fake/video.mp4?token=123"
     mock_s3_client.generate_presigned_url.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_injected_client_is_used_without_opening_a_session():
+    """A shared client is reused instead of opening one per call."""
+    client = AsyncMock()
+    client.generate_presigned_url.return_value = "https://cdn.fake/video.mp4"
+
+    with patch("backend.app.services.file.aioboto3.Session") as mock_session_cls:
+        service = FileService(**MOCK_CONFIG, client=client)
+        url = await service.generate_presigned_url("results/video.mp4")
+
+    assert url == "https://cdn.fake/video.mp4"
+    mock_session_cls.return_value.client.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_open_storage_shares_one_client_until_closed():
+    """The dependency returns the shared service between open and close."""
+    from backend.app.api import deps
+
+    await deps.open_storage()
+    try:
+        first = deps.get_file_service()
+        await deps.open_storage()
+        assert deps.get_file_service() is first
+        assert first.client is not None
+    finally:
+        await deps.close_storage()
+
+    assert deps.get_file_service() is not first
+    assert deps.get_file_service().client is None
+
+
+@pytest.mark.asyncio
+async def test_presigned_url_is_served_from_cache(mock_s3_client):
+    """Repeated requests for the same object are signed once."""
+    mock_s3_client.generate_presigned_url.return_value = "https://cdn.fake/a"
+    service = FileService(**MOCK_CONFIG, url_cache=PresignedUrlCache())
+
+    first = await service.generate_presigned_url("results/video.mp4")
+    second = await service.generate_presigned_url("results/video.mp4")
+
+    assert first == second == "https://cdn.fake/a"
+    mock_s3_client.generate_presigned_url.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_failed_presigned_url_is_not_cached(mock_s3_client):
+    mock_s3_client.generate_presigned_url.side_effect = [
+        ClientError({"Error": {"Code": "500"}}, "GeneratePresignedUrl"),
+        "https://cdn.fake/a",
+    ]
+    service = FileService(**MOCK_CONFIG, url_cache=PresignedUrlCache())
+
+    assert await service.generate_presigned_url("results/video.mp4") == ""
+    assert (
+        await service.generate_presigned_url("results/video.mp4")
+        == "https://cdn.fake/a"
+    )
@@ -0,0 +1,149 @@
+"""Tests for exported inference backends and the export cache."""
+
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from backend.app.core.config import settings
+from backend.app.services.inference_backend import (
+    cached_export_path,
+    resolve_model_path,
+)
+
+IB = "backend.app.services.inference_backend"
+
+
+@pytest.fixture
+def weights(tmp_path: Path) -> Path:
+    path = tmp_path / "model.pt"
+    path.write_bytes(b"weights-v1")
+    return path
+
+
+def _fake_export(staged_path: str, **kwargs) -> str:
+    exported = Path(staged_path).with_suffix(".onnx")
+    exported.write_bytes(b"onnx")
+    return str(exported)
+
+
+def test_torch_backend_uses_weights_directly(weights):
+    with patch(f"{IB}.YOLO") as mock_yolo:
+        assert resolve_model_path(str(weights), "torch", 640, "unused") == str(weights)
+        mock_yolo.assert_not_called()
+
+
+def test_onnx_export_is_cached(weights, tmp_path):
+    cache_dir = tmp_path / "cache"
+
+    with patch(f"{IB}.YOLO") as mock_yolo:
+        mock_yolo.side_effect = lambda path: type(
+            "FakeModel",
+            (),
+            {"export": lambda self, **kw: _fake_export(path, **kw)},
+        )()
+
+        first = resolve_model_path(str(weights), "onnx", 640, str(cache_dir))
+        second = resolve_model_path(str(weights), "onnx", 640, str(cache_dir))
+
+    assert first == second
+    assert Path(first).read_bytes() == b"onnx"
+    assert Path(first).parent == cache_dir
+    assert mock_yolo.call_count == 1
+    # Only the cached artifact is left behind.
+    assert list(cache_dir.iterdir()) == [Path(first)]
+
+
+def test_cache_key_depends_on_weights_and_imgsz(weights, tmp_path):
+    key_640 = cached_export_path(weights, "onnx", 640, tmp_path)
+    key_480 = cached_export_path(weights, "onnx", 480, tmp_path)
+
+    weights.write_bytes(b"weights-v2")
+    key_changed = cached_export_path(weights, "onnx", 640, tmp_path)
+
+    assert len({key_640, key_480, key_changed}) == 3
+    assert cached_export_path(weights, "openvino", 640, tmp_path).name.endswith(
+        "_openvino_model"
+    )
+
+
+def test_unknown_backend_is_rejected(weights):
+    with pytest.raises(ValueError):
+        resolve_model_path(str(weights), "tensorrt", 640, "unused")  # type: ignore[arg-type]
+
+
+def test_onnx_detections_match_torch(tmp_path):
+    """Parity check on the sample images bundled with ultralytics."""
+    pytest.importorskip("onnxruntime")
+    if not Path(settings.MODEL_PATH).is_file():
+        pytest.skip(f"model weights not available: {settings.MODEL_PATH}")
+
+    from ultralytics import YOLO
+    from ultralytics.utils import ASSETS
+
+    frames = [str(ASSETS / "bus.jpg"), str(ASSETS / "zidane.jpg")]
+
+    torch_model = YOLO(settings.MODEL_PATH)
+    onnx_path = resolve_model_path(settings.MODEL_PATH, "onnx", 640, str(tmp_path))
+    onnx_model = YOLO(onnx_path, task="detect")
+
+    for frame in frames:
+        expected = torch_model(frame, conf=0.25, imgsz=640, verbose=False)[0].boxes
+        actual = onnx_model(frame, conf=0.25, imgsz=640, verbose=False)[0].boxes
+
+        assert sorted(actual.cls.tolist()) == sorted(expected.cls.tolist())
+        order_expected = np.lexsort(expected.xyxy.numpy().T)
+        order_actual = np.lexsort(actual.xyxy.numpy().T)
+        np.testing.assert_allclose(
+            actual.xyxy.numpy()[order_actual],
+            expected.xyxy.numpy()[order_expected],
+            atol=2.0,
+        )
+        np.testing.assert_allclose(
+            actual.conf.numpy()[order_actual],
+            expected.conf.numpy()[order_expected],
+            atol=0.02,
+        )
+
+
+def test_onnx_int8_requires_calibration_source(weights, tmp_path):
+    with pytest.raises(ValueError):
+        resolve_model_path(str(weights), "onnx_int8", 640, str(tmp_path))
+
+
+def test_onnx_int8_quantizes_cached_onnx_export(weights, tmp_path):
+    cache_dir = tmp_path / "cache"
+    calibration = tmp_path / "calibration"
+    calibration.mkdir()
+    (calibration / "frame.jpg").write_bytes(b"jpg")
+
+    def fake_quantize(model_path, target, frames, imgsz):
+        assert Path(model_path).read_bytes() == b"onnx"
+        target.write_bytes(b"int8")
+
+    with (
+        patch(f"{IB}.YOLO") as mock_yolo,
+        patch(f"{IB}.load_calibration_frames", return_value=[]) as mock_frames,
+        patch(f"{IB}.quantize_onnx_int8", side_effect=fake_quantize) as mock_quant,
+    ):
+        mock_yolo.side_effect = lambda path: type(
+            "FakeModel",
+            (),
+            {"export": lambda self, **kw: _fake_export(path, **kw)},
+        )()
+
+        first = resolve_model_path(
+            str(weights), "onnx_int8", 640, str(cache_dir), str(calibration), 16
+        )
+        second = resolve_model_path(
+            str(weights), "onnx_int8", 640, str(cache_dir), str(calibration), 16
+        )
+
+    assert first == second
+    assert first.endswith("-int8.onnx")
+    assert Path(first).read_bytes() == b"int8"
+    mock_frames.assert_called_once_with(str(calibration), 16)
+    mock_quant.assert_called_once()
+    # The float export is kept so other backends can reuse it.
+    assert sorted(p.suffix for p in cache_dir.iterdir()) == [".onnx", ".onnx"]
@@ -0,0 +1,41 @@
+"""Tests for the frame-differencing motion gate."""
+
+import numpy as np
+
+from backend.app.services.motion import MotionGate
+
+
+def _frame(square_x: int | None = None) -> np.ndarray:
+    frame = np.full((240, 320, 3), 80, dtype=np.uint8)
+    if square_x is not None:
+        frame[100:140, square_x : square_x + 40] = 250
+    return frame
+
+
+def test_first_frame_is_never_static():
+    assert MotionGate(threshold=0.01).is_static(_frame()) is False
+
+
+def test_identical_frames_are_static():
+    gate = MotionGate(threshold=0.01)
+    gate.is_static(_frame())
+
+    assert gate.is_static(_frame()) is True
+
+
+def test_moving_object_is_not_static():
+    gate = MotionGate(threshold=0.01)
+    gate.is_static(_frame())
+
+    assert gate.is_static(_frame(square_x=100)) is False
+
+
+def test_slow_motion_accumulates_against_reference():
+    gate = MotionGate(threshold=0.01)
+    gate.is_static(_frame(square_x=100))
+
+    # Each 1px step is below the threshold, but the reference stays put.
+    results = [gate.is_static(_frame(square_x=100 + step)) for step in range(1, 30)]
+
+    assert results[0] is True
+    assert False in results
@@ -0,0 +1,64 @@
+"""Tests for the staged frame pipeline."""
+
+import threading
+import time
+from contextlib import closing
+
+import pytest
+
+from backend.app.services.pipeline import run_pipelined, run_stages
+
+
+def _double(items):
+    for item in items:
+        yield item * 2
+
+
+def _slow_increment(items):
+    for item in items:
+        time.sleep(0.001)
+        yield item + 1
+
+
+def test_run_stages_chains_in_order():
+    assert list(run_stages(range(5), [_double, _slow_increment])) == [1, 3, 5, 7, 9]
+
+
+def test_run_pipelined_preserves_order():
+    output = list(run_pipelined(range(200), [_double, _slow_increment], 4))
+
+    assert output == [i * 2 + 1 for i in range(200)]
+
+
+def test_run_pipelined_propagates_stage_error():
+    def failing(items):
+        for item in items:
+            if item == 10:
+                raise RuntimeError("boom")
+            yield item
+
+    with pytest.raises(RuntimeError, match="boom"):
+        list(run_pipelined(range(100), [_double, failing], 2))
+
+
+def test_run_pipelined_propagates_source_error():
+    def source():
+        yield 1
+        raise OSError("decode failed")
+
+    with pytest.raises(OSError, match="decode failed"):
+        list(run_pipelined(source(), [_double], 2))
+
+
+def test_run_pipelined_close_stops_threads():
+    before = threading.active_count()
+
+    with closing(run_pipelined(iter(range(10_000)), [_double], 2)) as results:
+        assert next(results) == 0
+
+    assert threading.active_count() == before
+
+
+def test_run_pipelined_rejects_invalid_queue_depth():
+    with pytest.raises(ValueError):
+        list(run_pipelined(range(3), [_double], 0))
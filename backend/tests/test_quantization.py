@@ -0,0 +1,108 @@
+"""Tests for INT8 calibration and quantization helpers."""
+
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+from backend.app.services.quantization import (
+    FrameCalibrationReader,
+    calibration_fingerprint,
+    load_calibration_frames,
+    preprocess,
+    quantize_onnx_int8,
+)
+
+
+def _write_video(path: Path, frames: int) -> None:
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), 10, (64, 48))
+    for i in range(frames):
+        writer.write(np.full((48, 64, 3), i, dtype=np.uint8))
+    writer.release()
+
+
+def test_load_calibration_frames_from_images_and_video(tmp_path):
+    cv2.imwrite(str(tmp_path / "a.png"), np.zeros((32, 32, 3), dtype=np.uint8))
+    _write_video(tmp_path / "b.mp4", 40)
+    (tmp_path / "notes.txt").write_text("ignored")
+
+    frames = load_calibration_frames(str(tmp_path), limit=9)
+
+    assert len(frames) == 9
+    assert frames[0].shape == (32, 32, 3)
+    # Video frames are sampled across the clip, not taken from its start.
+    assert frames[-1].mean() > 20
+
+
+def test_load_calibration_frames_rejects_empty_source(tmp_path):
+    with pytest.raises(ValueError):
+        load_calibration_frames(str(tmp_path), limit=8)
+
+
+def test_calibration_fingerprint_tracks_files(tmp_path):
+    cv2.imwrite(str(tmp_path / "a.png"), np.zeros((32, 32, 3), dtype=np.uint8))
+    before = calibration_fingerprint(str(tmp_path))
+
+    cv2.imwrite(str(tmp_path / "b.png"), np.zeros((32, 32, 3), dtype=np.uint8))
+
+    assert calibration_fingerprint(str(tmp_path)) != before
+
+
+def test_preprocess_letterboxes_to_square_input():
+    frame = np.zeros((100, 200, 3), dtype=np.uint8)
+    frame[..., 2] = 255  # red in BGR
+
+    tensor = preprocess(frame, 64)
+
+    assert tensor.shape == (1, 3, 64, 64)
+    assert tensor.dtype == np.float32
+    # Image occupies the middle rows, padding above and below.
+    assert tensor[0, 0, 32, 32] == pytest.approx(1.0)
+    assert tensor[0, 0, 0, 32] == pytest.approx(114 / 255)
+
+
+def test_calibration_reader_is_exhausted_after_all_frames():
+    frames = [np.zeros((16, 16, 3), dtype=np.uint8)] * 2
+    reader = FrameCalibrationReader("images", frames, 32)
+
+    assert reader.get_next()["images"].shape == (1, 3, 32, 32)
+    assert reader.get_next() is not None
+    assert reader.get_next() is None
+
+
+def test_quantize_onnx_int8_produces_runnable_model(tmp_path):
+    onnx = pytest.importorskip("onnx")
+    ort = pytest.importorskip("onnxruntime")
+    from onnx import TensorProto, helper, numpy_helper
+
+    rng = np.random.default_rng(0)
+    weight = numpy_helper.from_array(
+        rng.normal(size=(4, 3, 3, 3)).astype(np.float32), "weight"
+    )
+    graph = helper.make_graph(
+        [helper.make_node("Conv", ["images", "weight"], ["output"], pads=[1] * 4)],
+        "tiny",
+        [helper.make_tensor_value_info("images", TensorProto.FLOAT, [None, 3, 32, 32])],
+        [helper.make_tensor_value_info("output", TensorProto.FLOAT, None)],
+        [weight],
+    )
+    model = helper.make_model(
+        graph, opset_imports=[helper.make_opsetid("", 17)], ir_version=8
+    )
+    fp32_path, int8_path = tmp_path / "model.onnx", tmp_path / "model-int8.onnx"
+    onnx.save(model, str(fp32_path))
+
+    frames = [rng.integers(0, 255, (32, 32, 3), dtype=np.uint8) for _ in range(4)]
+    quantize_onnx_int8(fp32_path, int8_path, frames, 32)
+
+    quantized = onnx.load(str(int8_path))
+    assert any(node.op_type == "QuantizeLinear" for node in quantized.graph.node)
+
+    session = ort.InferenceSession(str(int8_path), providers=["CPUExecutionProvider"])
+    sample = preprocess(frames[0], 32)
+    expected = ort.InferenceSession(
+        str(fp32_path), providers=["CPUExecutionProvider"]
+    ).run(None, {"images": sample})[0]
+    actual = session.run(None, {"images": sample})[0]
+    np.testing.assert_allclose(actual, expected, atol=0.1 * np.abs(expected).max())
@@ -0,0 +1,94 @@
+"""Tests for the JSON summary and Parquet time series report files."""
+
+from pathlib import Path
+
+import numpy as np
+import pyarrow.parquet as pq
+
+from backend.app.schemas.analytics import (
+    AnalysisSummary,
+    AnalyticsReport,
+    FrameDetection,
+    VideoMeta,
+)
+from backend.app.services.report_files import (
+    TimeSeriesWriter,
+    concat_time_series,
+    time_series_path,
+    write_summary,
+)
+
+
+def _report() -> AnalyticsReport:
+    return AnalyticsReport(
+        meta=VideoMeta(
+            source_filename="video.mp4",
+            fps=10.0,
+            total_frames=50,
+            resolution=(64, 48),
+            duration_seconds=5.0,
+        ),
+        summary=AnalysisSummary(
+            total_detections=6,
+            unique_classes=["car", "bus"],
+            dominant_class="car",
+            class_distribution={"car": 5, "bus": 1},
+        ),
+        time_series=[
+            FrameDetection(frame_id=2, timestamp=0.2, objects={"car": 2}),
+            FrameDetection(frame_id=7, timestamp=0.7, objects={"car": 3, "bus": 1}),
+        ],
+    )
+
+
+def test_time_series_path_sits_next_to_summary(tmp_path):
+    json_path = str(tmp_path / "report.json")
+
+    assert time_series_path(json_path) == str(tmp_path / "report.parquet")
+
+
+def test_write_summary_drops_time_series(tmp_path):
+    json_path = str(tmp_path / "report.json")
+
+    write_summary(_report(), json_path)
+
+    summary = AnalyticsReport.model_validate_json(Path(json_path).read_text())
+    assert summary.time_series == []
+    assert summary.summary == _report().summary
+    assert summary.meta == _report().meta
+
+
+def test_time_series_writer_flushes_fixed_size_row_groups(tmp_path):
+    path = str(tmp_path / "series.parquet")
+
+    with TimeSeriesWriter(path, {0: "car", 1: "bus"}, fps=10.0, chunk_frames=2) as w:
+        w.add(0, np.array([2, 0]))
+        w.add(2, np.array([0, 1]))
+        w.add(4, np.array([1, 2]))
+
+    assert pq.ParquetFile(path).num_row_groups == 2
+    assert pq.ParquetFile(path).metadata.row_group(0).column(2).compression == "ZSTD"
+    assert pq.read_table(path).to_pydict() == {
+        "frame_id": [0, 2, 4],
+        "timestamp": [0.0, 0.2, 0.4],
+        "car": [2, 0, 1],
+        "bus": [0, 1, 2],
+    }
+
+
+def test_concat_time_series_offsets_frames_and_unions_classes(tmp_path):
+    first, second = str(tmp_path / "a.parquet"), str(tmp_path / "b.parquet")
+    with TimeSeriesWriter(first, {0: "car"}, fps=10.0) as w:
+        w.add(0, np.array([1]))
+    with TimeSeriesWriter(second, {0: "car", 1: "bus"}, fps=10.0) as w:
+        w.add(1, np.array([0, 1]))
+    target = str(tmp_path / "joined.parquet")
+
+    concat_time_series([first, second], [0, 30], 10.0, target)
+
+    assert pq.read_table(target).to_pydict() == {
+        "frame_id": [0, 31],
+        "timestamp": [0.0, 3.1],
+        "car": [1, 0],
+        "bus": [0, 1],
+    }
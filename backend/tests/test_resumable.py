@@ -0,0 +1,181 @@
+"""Tests for resumable chunked uploads."""
+
+import hashlib
+import os
+import time
+from collections.abc import AsyncIterator
+
+import pytest
+
+from backend.app.services.resumable import (
+    ChecksumMismatchError,
+    ChunkTooLargeError,
+    OffsetMismatchError,
+    ResumableUpload,
+    ResumableUploadService,
+    UploadBusyError,
+    UploadIncompleteError,
+    UploadNotFoundError,
+)
+
+CONTENT = bytes(range(256)) * 40
+
+
+async def _stream(data: bytes, piece: int = 100) -> AsyncIterator[bytes]:
+    for start in range(0, len(data), piece):
+        yield data[start : start + piece]
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+@pytest.fixture
+def service(tmp_path) -> ResumableUploadService:
+    return ResumableUploadService(
+        upload_dir=str(tmp_path), chunk_max_bytes=4096, ttl_seconds=60
+    )
+
+
+async def _create(service: ResumableUploadService) -> ResumableUpload:
+    return await service.create(ResumableUpload(filename="a.mp4", size=len(CONTENT)))
+
+
+async def _append(service: ResumableUploadService, upload_id, offset, chunk) -> int:
+    return await service.append(upload_id, offset, _stream(chunk), _digest(chunk))
+
+
+@pytest.mark.asyncio
+async def test_upload_resumes_from_offset_and_completes(service, tmp_path):
+    upload = await _create(service)
+
+    assert await _append(service, upload.upload_id, 0, CONTENT[:4096]) == 4096
+    # A client that lost track of its progress asks for the offset.
+    _, offset = await service.get(upload.upload_id)
+    assert offset == 4096
+    await _append(service, upload.upload_id, offset, CONTENT[4096:8192])
+    await _append(service, upload.upload_id, 8192, CONTENT[8192:])
+
+    target = tmp_path / "done.mp4"
+    completed = await service.complete(upload.upload_id, str(target))
+
+    assert completed.filename == "a.mp4"
+    assert completed.sha256 == _digest(CONTENT)
+    assert target.read_bytes() == CONTENT
+    with pytest.raises(UploadNotFoundError):
+        await service.get(upload.upload_id)
+
+
+@pytest.mark.asyncio
+async def test_digest_is_stored_without_rereading_the_file(service, monkeypatch):
+    upload = await _create(service)
+    await _append(service, upload.upload_id, 0, CONTENT[:4096])
+    await _append(service, upload.upload_id, 4096, CONTENT[4096:8192])
+
+    def reread(*_):
+        raise AssertionError("partial file read again")
+
+    monkeypatch.setattr("backend.app.services.resumable._digest_prefix", reread)
+    await _append(service, upload.upload_id, 8192, CONTENT[8192:])
+
+    stored, _ = await service.get(upload.upload_id)
+    assert stored.sha256 == _digest(CONTENT)
+
+
+@pytest.mark.asyncio
+async def test_digest_covers_chunks_appended_by_another_replica(service, tmp_path):
+    """A replica that missed earlier chunks hashes them from the shared file."""
+    other = ResumableUploadService(
+        upload_dir=str(tmp_path), chunk_max_bytes=4096, ttl_seconds=60
+    )
+    upload = await _create(service)
+    await _append(service, upload.upload_id, 0, CONTENT[:4096])
+    await _append(other, upload.upload_id, 4096, CONTENT[4096:8192])
+    await _append(service, upload.upload_id, 8192, CONTENT[8192:])
+
+    completed = await other.complete(upload.upload_id, str(tmp_path / "done.mp4"))
+
+    assert completed.sha256 == _digest(CONTENT)
+
+
+@pytest.mark.asyncio
+async def test_append_rejects_wrong_offset(service):
+    upload = await _create(service)
+    await _append(service, upload.upload_id, 0, CONTENT[:100])
+
+    with pytest.raises(OffsetMismatchError) as excinfo:
+        await _append(service, upload.upload_id, 0, CONTENT[:100])
+
+    assert excinfo.value.offset == 100
+
+
+@pytest.mark.asyncio
+async def test_append_rejects_corrupt_chunk_without_writing(service):
+    upload = await _create(service)
+
+    with pytest.raises(ChecksumMismatchError):
+        await service.append(
+            upload.upload_id, 0, _stream(CONTENT[:100]), _digest(b"other")
+        )
+
+    assert (await service.get(upload.upload_id))[1] == 0
+
+
+@pytest.mark.asyncio
+async def test_append_rejects_oversized_chunks(service):
+    upload = await _create(service)
+
+    with pytest.raises(ChunkTooLargeError):
+        await _append(service, upload.upload_id, 0, CONTENT[:4097])
+
+    # Chunks may not run past the declared size either.
+    await _append(service, upload.upload_id, 0, CONTENT[:4096])
+    await _append(service, upload.upload_id, 4096, CONTENT[4096:8192])
+    with pytest.raises(ChunkTooLargeError):
+        await _append(service, upload.upload_id, 8192, CONTENT[8192:] + b"x")
+
+
+@pytest.mark.asyncio
+async def test_append_rejects_concurrent_writer(service):
+    upload = await _create(service)
+
+    with service._locked(upload.upload_id):
+        with pytest.raises(UploadBusyError):
+            await _append(service, upload.upload_id, 0, CONTENT[:100])
+
+
+@pytest.mark.asyncio
+async def test_complete_requires_all_bytes(service, tmp_path):
+    upload = await _create(service)
+    await _append(service, upload.upload_id, 0, CONTENT[:100])
+
+    with pytest.raises(UploadIncompleteError):
+        await service.complete(upload.upload_id, str(tmp_path / "done.mp4"))
+
+    assert not (tmp_path / "done.mp4").exists()
+
+
+@pytest.mark.asyncio
+async def test_abort_deletes_upload(service):
+    upload = await _create(service)
+
+    await service.abort(upload.upload_id)
+
+    assert list(service.root.iterdir()) == []
+    with pytest.raises(UploadNotFoundError):
+        await service.abort(upload.upload_id)
+
+
+@pytest.mark.asyncio
+async def test_garbage_collection_removes_only_stale_uploads(service):
+    stale = await _create(service)
+    fresh = await _create(service)
+    old = time.time() - 120
+    for path in service.root.glob(f"{stale.upload_id}.*"):
+        os.utime(path, (old, old))
+
+    assert service.collect_garbage() == 1
+
+    with pytest.raises(UploadNotFoundError):
+        await service.get(stale.upload_id)
+    assert (await service.get(fresh.upload_id))[1] == 0
@@ -0,0 +1,387 @@
+"""Tests for segment-parallel video processing."""
+
+import shutil
+import subprocess
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import cv2
+import numpy as np
+import pyarrow.parquet as pq
+import pytest
+
+from backend.app.models.task import ProcessingMode
+from backend.app.schemas.analytics import (
+    AnalysisSummary,
+    AnalyticsReport,
+    FrameDetection,
+    VideoMeta,
+)
+from backend.app.services.report_files import (
+    TimeSeriesWriter,
+    time_series_path,
+    write_summary,
+)
+from backend.app.services.segments import (
+    close_segment_pool,
+    concat_videos,
+    get_segment_pool,
+    merge_reports,
+    process_video_segmented,
+    split_video,
+)
+from backend.app.services.yolo import ProcessingResult, VideoProcessingError
+
+SEG = "backend.app.services.segments"
+
+requires_ffmpeg = pytest.mark.skipif(
+    shutil.which("ffmpeg") is None, reason="ffmpeg is not installed"
+)
+
+
+def _report(total_frames: int, series: list[FrameDetection]) -> AnalyticsReport:
+    counts: dict[str, int] = {}
+    for frame in series:
+        for name, count in frame.objects.items():
+            counts[name] = counts.get(name, 0) + count
+    return AnalyticsReport(
+        meta=VideoMeta(
+            source_filename="segment.mp4",
+            fps=10.0,
+            total_frames=total_frames,
+            resolution=(64, 48),
+            duration_seconds=total_frames / 10,
+        ),
+        summary=AnalysisSummary(
+            total_detections=sum(counts.values()),
+            unique_classes=list(counts),
+            dominant_class=max(counts, key=counts.__getitem__) if counts else None,
+            class_distribution=counts,
+            skipped_frames_ratio=0.5,
+        ),
+        time_series=[],
+    )
+
+
+def _segment_result(
+    output_path: str,
+    total_frames: int,
+    series: list[FrameDetection],
+    processed_frames: int | None = None,
+) -> ProcessingResult:
+    """Write a segment's files the way ``YoloService.process_video`` does."""
+    report = _report(total_frames, series)
+    json_path = str(Path(output_path).with_suffix(".json"))
+    names = {0: "car", 1: "bus"}
+    with TimeSeriesWriter(time_series_path(json_path), names, report.meta.fps) as w:
+        for frame in series:
+            if any(frame.objects.values()):
+                counts = [frame.objects.get(name, 0) for name in names.values()]
+                w.add(frame.frame_id, np.array(counts))
+    write_summary(report, json_path)
+    return ProcessingResult(
+        report=report,
+        json_path=json_path,
+        video_path=output_path,
+        time_series_path=time_series_path(json_path),
+        processed_frames=total_frames if processed_frames is None else processed_frames,
+    )
+
+
+def test_merge_reports_sums_counts_and_frames(tmp_path):
+    first = _segment_result(
+        str(tmp_path / "a.mp4"),
+        20,
+        [FrameDetection(frame_id=3, timestamp=0.3, objects={"car": 2})],
+    )
+    second = _segment_result(
+        str(tmp_path / "b.mp4"),
+        30,
+        [
+            FrameDetection(frame_id=0, timestamp=0.0, objects={"car": 1}),
+            FrameDetection(frame_id=5, timestamp=0.5, objects={"bus": 4}),
+        ],
+    )
+
+    merged = merge_reports([first, second], "video.mp4")
+
+    assert merged.time_series == []
+    assert merged.meta.source_filename == "video.mp4"
+    assert merged.meta.total_frames == 50
+    assert merged.meta.duration_seconds == 5.0
+    assert merged.summary.class_distribution == {"car": 3, "bus": 4}
+    assert merged.summary.total_detections == 7
+    assert merged.summary.dominant_class == "bus"
+    assert merged.summary.skipped_frames_ratio == 0.5
+
+
+def test_merge_reports_counts_decoded_frames(tmp_path):
+    """Container frame counts can be off; the decoded frames are summed."""
+    results = [
+        _segment_result(str(tmp_path / f"{i}.mp4"), 20, [], processed_frames=18)
+        for i in range(2)
+    ]
+
+    merged = merge_reports(results, "video.mp4")
+
+    assert merged.meta.total_frames == 36
+    assert merged.meta.duration_seconds == 3.6
+
+
+def test_split_video_uses_stream_copy_segment_muxer(tmp_path):
+    with patch(f"{SEG}.subprocess.run") as mock_run:
+        (tmp_path / "segment_0001.mkv").touch()
+        (tmp_path / "segment_0000.mkv").touch()
+
+        segments = split_video("in.webm", str(tmp_path), [60.0, 120.5])
+
+    command = mock_run.call_args[0][0]
+    assert command[command.index("-c") + 1] == "copy"
+    assert command[command.index("-f") + 1] == "segment"
+    assert command[command.index("-segment_times") + 1] == "60.000,120.500"
+    # Matroska takes any input codec as it is, VP9 and MJPEG included.
+    assert command[-1].endswith(".mkv")
+    assert [Path(s).name for s in segments] == [
+        "segment_0000.mkv",
+        "segment_0001.mkv",
+    ]
+
+
+def test_concat_videos_copies_streams_and_source_audio(tmp_path):
+    output = tmp_path / "out.mp4"
+    with (
+        patch(f"{SEG}.subprocess.run") as mock_run,
+        patch(f"{SEG}.has_audio_stream", return_value=True),
+    ):
+        concat_videos(["a.mp4", "b.mp4"], str(output), "source.mp4")
+
+    command = mock_run.call_args[0][0]
+    assert command[command.index("-f") + 1] == "concat"
+    assert command[command.index("-c:v") + 1] == "copy"
+    # The source audio may be in a codec MP4 cannot hold, such as Vorbis.
+    assert command[command.index("-c:a") + 1] == "aac"
+    assert "source.mp4" in command
+    assert command[-1] == str(output)
+    # The concat list is removed afterwards.
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_ffmpeg_failure_raises_processing_error(tmp_path):
+    error = subprocess.CalledProcessError(1, "ffmpeg", stderr=b"bad input")
+    with (
+        patch(f"{SEG}.subprocess.run", side_effect=error),
+        pytest.raises(VideoProcessingError, match="bad input"),
+    ):
+        split_video("in.mp4", str(tmp_path), [10.0])
+
+
+def _video_info(seconds: float) -> MagicMock:
+    info = MagicMock()
+    info.fps = 10.0
+    info.total_frames = int(seconds * 10)
+    return info
+
+
+def test_short_video_is_processed_in_process(tmp_path):
+    source = tmp_path / "in.mp4"
+    source.touch()
+    service = MagicMock()
+
+    with (
+        patch(f"{SEG}.sv.VideoInfo.from_video_path", return_value=_video_info(90)),
+        patch(f"{SEG}.get_yolo_service", return_value=service),
+        patch(f"{SEG}._run_segments") as mock_run_segments,
+        patch(f"{SEG}.settings.SEGMENT_MIN_SECONDS", 60.0),
+    ):
+        result = process_video_segmented(str(source), str(tmp_path / "out.mp4"), 4)
+
+    assert result is service.process_video.return_value
+    mock_run_segments.assert_not_called()
+
+
+def test_long_video_is_split_merged_and_joined(tmp_path):
+    source = tmp_path / "in.mp4"
+    source.touch()
+    output = tmp_path / "out.mp4"
+
+    def fake_split(input_path, workdir, cut_times):
+        assert cut_times == [100.0, 200.0]
+        return [str(Path(workdir) / f"segment_{i:04d}.mkv") for i in range(3)]
+
+    def fake_run(segments, outputs, workers, conf, mode, caches=None):
+        assert workers == 3
+        return [
+            _segment_result(
+                out,
+                1000,
+                [FrameDetection(frame_id=1, timestamp=0.1, objects={"car": i})],
+            )
+            for i, out in enumerate(outputs)
+        ]
+
+    # The report is handed out before the segments are concatenated.
+    events: list[object] = []
+    with (
+        patch(f"{SEG}.sv.VideoInfo.from_video_path", return_value=_video_info(300)),
+        patch(f"{SEG}.split_video", side_effect=fake_split),
+        patch(f"{SEG}._run_segments", side_effect=fake_run),
+        patch(
+            f"{SEG}.concat_videos", side_effect=lambda *_: events.append("concat")
+        ) as mock_concat,
+        patch(f"{SEG}.settings.SEGMENT_MIN_SECONDS", 60.0),
+        patch(f"{SEG}.settings.TIME_BUCKET_SECONDS", 1.0),
+    ):
+        result = process_video_segmented(
+            str(source), str(output), 3, on_report=events.append
+        )
+
+    assert events == [result, "concat"]
+    report = result.report
+    assert result.json_path == str(tmp_path / "out.json")
+    assert result.video_path == str(output)
+    assert result.time_series_path is None
+    assert set(result.timings) == {"split", "segments", "merge", "concat"}
+    assert report.time_series == []
+    assert report.meta.total_frames == 3000
+    assert [(b.start, b.sum) for b in report.time_buckets] == [
+        (100.0, {"car": 1}),
+        (200.0, {"car": 2}),
+    ]
+    mock_concat.assert_called_once()
+    assert [Path(p).name for p in mock_concat.call_args[0][0]] == [
+        "out_segment_0000.mp4",
+        "out_segment_0001.mp4",
+        "out_segment_0002.mp4",
+    ]
+    # The scratch directory with the segments and their series is gone.
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["in.mp4", "out.json"]
+
+
+def test_segment_pool_is_started_once_per_process():
+    """The pool and its loaded models are reused by later tasks."""
+    with patch(f"{SEG}.billiard.get_context") as mock_get_context:
+        pools = [MagicMock(name="pool_4"), MagicMock(name="pool_2")]
+        mock_get_context.return_value.Pool.side_effect = pools
+        try:
+            assert get_segment_pool(4) is pools[0]
+            assert get_segment_pool(4) is pools[0]
+            mock_get_context.assert_called_once_with("spawn")
+
+            # Another size replaces the pool.
+            assert get_segment_pool(2) is pools[1]
+            pools[0].close.assert_called_once()
+            pools[0].join.assert_called_once()
+        finally:
+            close_segment_pool()
+
+    pools[1].close.assert_called_once()
+    pools[1].join.assert_called_once()
+    # Closing twice is harmless.
+    close_segment_pool()
+
+
+def test_video_that_cannot_be_split_is_processed_in_process(tmp_path):
+    source = tmp_path / "in.avi"
+    source.touch()
+    service = MagicMock()
+    on_report = MagicMock()
+
+    with (
+        patch(f"{SEG}.sv.VideoInfo.from_video_path", return_value=_video_info(300)),
+        patch(
+            f"{SEG}.split_video",
+            side_effect=VideoProcessingError("ffmpeg failed: codec not supported"),
+        ),
+        patch(f"{SEG}.get_yolo_service", return_value=service),
+        patch(f"{SEG}._run_segments") as mock_run_segments,
+        patch(f"{SEG}.settings.SEGMENT_MIN_SECONDS", 60.0),
+    ):
+        result = process_video_segmented(
+            str(source), str(tmp_path / "out.mp4"), 4, on_report=on_report
+        )
+
+    assert result is service.process_video.return_value
+    assert service.process_video.call_args.args == (
+        str(source),
+        str(tmp_path / "out.mp4"),
+    )
+    assert service.process_video.call_args.kwargs["on_report"] is on_report
+    mock_run_segments.assert_not_called()
+
+
+def test_analytics_only_skips_concat_and_keeps_requested_series(tmp_path):
+    source = tmp_path / "in.mp4"
+    source.touch()
+
+    def fake_run(segments, outputs, workers, conf, mode, caches=None):
+        assert mode == ProcessingMode.ANALYTICS_ONLY
+        series = [FrameDetection(frame_id=2, timestamp=0.2, objects={"bus": 1})]
+        # The first container claims 10 frames but only 8 were decoded.
+        return [_segment_result(out, 10, series, processed_frames=8) for out in outputs]
+
+    with (
+        patch(f"{SEG}.sv.VideoInfo.from_video_path", return_value=_video_info(300)),
+        patch(
+            f"{SEG}.split_video",
+            side_effect=lambda _, workdir, __: [f"{workdir}/a.mp4", f"{workdir}/b.mp4"],
+        ),
+        patch(f"{SEG}._run_segments", side_effect=fake_run),
+        patch(f"{SEG}.concat_videos") as mock_concat,
+        patch(f"{SEG}.settings.SEGMENT_MIN_SECONDS", 60.0),
+    ):
+        result = process_video_segmented(
+            str(source),
+            str(tmp_path / "out.mp4"),
+            2,
+            mode=ProcessingMode.ANALYTICS_ONLY,
+            raw_time_series=True,
+        )
+
+    mock_concat.assert_not_called()
+    assert result.video_path is None
+    assert result.time_series_path == str(tmp_path / "out.parquet")
+    series = pq.read_table(result.time_series_path).to_pydict()
+    assert series["frame_id"] == [2, 10]
+    assert result.report.meta.total_frames == 16
+
+
+@requires_ffmpeg
+def test_split_and_concat_round_trip(tmp_path):
+    source = tmp_path / "in.mp4"
+    writer = cv2.VideoWriter(str(source), cv2.VideoWriter_fourcc(*"mp4v"), 10, (64, 48))
+    for i in range(100):
+        writer.write(np.full((48, 64, 3), i, dtype=np.uint8))
+    writer.release()
+
+    workdir = tmp_path / "segments"
+    workdir.mkdir()
+    segments = split_video(str(source), str(workdir), [3.0, 6.0])
+    assert len(segments) >= 2
+
+    joined = tmp_path / "joined.mp4"
+    concat_videos(segments, str(joined), str(source))
+
+    capture = cv2.VideoCapture(str(joined))
+    frames = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+    capture.release()
+    assert frames == 100
+
+
+@requires_ffmpeg
+def test_split_keeps_codecs_mp4_cannot_hold(tmp_path):
+    source = tmp_path / "in.avi"
+    writer = cv2.VideoWriter(str(source), cv2.VideoWriter_fourcc(*"MJPG"), 10, (64, 48))
+    for i in range(100):
+        writer.write(np.full((48, 64, 3), i, dtype=np.uint8))
+    writer.release()
+
+    segments = split_video(str(source), str(tmp_path), [3.0, 6.0])
+
+    assert len(segments) >= 2
+    frames = 0
+    for segment in segments:
+        capture = cv2.VideoCapture(segment)
+        while capture.read()[0]:
+            frames += 1
+        capture.release()
+    assert frames == 100
@@ -0,0 +1,143 @@
+"""Tests for staging task inputs through object storage."""
+
+import asyncio
+import os
+import time
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from backend.app.services.file import FileService, S3DownloadError
+from backend.app.services.staging import (
+    InputPrefetcher,
+    input_key,
+    scratch_paths,
+    stage_input,
+)
+
+
+def _file_service(content: bytes = b"video") -> MagicMock:
+    service = MagicMock(spec=FileService)
+
+    async def download(key: str, path: str) -> str:
+        Path(path).write_bytes(content)
+        return path
+
+    service.download_file_from_s3 = AsyncMock(side_effect=download)
+    return service
+
+
+def test_paths_keep_input_and_output_apart():
+    key = input_key("abc", ".mp4")
+
+    assert key == "uploads/abc.mp4"
+    assert scratch_paths("/scratch", "abc", key) == (
+        "/scratch/abc.input.mp4",
+        "/scratch/abc.mp4",
+    )
+
+
+@pytest.mark.asyncio
+async def test_stage_input_downloads_missing_input(tmp_path):
+    service = _file_service()
+    path = tmp_path / "scratch" / "a.input.mp4"
+
+    await stage_input(service, "uploads/a.mp4", str(path), timeout=1)
+
+    assert path.read_bytes() == b"video"
+    assert sorted(p.name for p in path.parent.iterdir()) == ["a.input.mp4"]
+
+
+@pytest.mark.asyncio
+async def test_stage_input_uses_prefetched_input(tmp_path):
+    service = _file_service()
+    path = tmp_path / "a.input.mp4"
+    path.write_bytes(b"prefetched")
+
+    await stage_input(service, "uploads/a.mp4", str(path), timeout=1)
+
+    service.download_file_from_s3.assert_not_awaited()
+    assert path.read_bytes() == b"prefetched"
+
+
+@pytest.mark.asyncio
+async def test_stage_input_waits_for_prefetch_in_progress(tmp_path):
+    service = _file_service()
+    path = tmp_path / "a.input.mp4"
+    part = tmp_path / "a.input.mp4.part"
+    part.touch()
+
+    async def finish_prefetch() -> None:
+        await asyncio.sleep(0.3)
+        part.write_bytes(b"prefetched")
+        part.rename(path)
+
+    await asyncio.gather(
+        stage_input(service, "uploads/a.mp4", str(path), timeout=5),
+        finish_prefetch(),
+    )
+
+    service.download_file_from_s3.assert_not_awaited()
+    assert path.read_bytes() == b"prefetched"
+
+
+@pytest.mark.asyncio
+async def test_stage_input_gives_up_on_stalled_prefetch(tmp_path):
+    path = tmp_path / "a.input.mp4"
+    (tmp_path / "a.input.mp4.part").touch()
+
+    with pytest.raises(TimeoutError):
+        await stage_input(_file_service(), "uploads/a.mp4", str(path), timeout=0)
+
+
+@pytest.mark.asyncio
+async def test_stage_input_takes_over_abandoned_prefetch(tmp_path):
+    """A claim left by a killed process does not hold the task up."""
+    service = _file_service()
+    path = tmp_path / "a.input.mp4"
+    part = tmp_path / "a.input.mp4.part"
+    part.write_bytes(b"half")
+    old = time.time() - 60
+    os.utime(part, (old, old))
+
+    with patch("backend.app.services.staging.PREFETCH_STALE_SECONDS", 30.0):
+        await stage_input(service, "uploads/a.mp4", str(path), timeout=600)
+
+    service.download_file_from_s3.assert_awaited_once()
+    assert path.read_bytes() == b"video"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.input.mp4"]
+
+
+def test_prefetcher_downloads_pending_task_input(tmp_path):
+    service = _file_service()
+    path = tmp_path / "a.input.mp4"
+    prefetcher = InputPrefetcher(lambda: service)
+
+    prefetcher.submit("uploads/a.mp4", str(path), lambda: True)
+    prefetcher.shutdown()
+
+    assert path.read_bytes() == b"video"
+    assert not (tmp_path / "a.input.mp4.part").exists()
+
+
+def test_prefetcher_skips_started_task(tmp_path):
+    service = _file_service()
+    prefetcher = InputPrefetcher(lambda: service)
+
+    prefetcher.submit("uploads/a.mp4", str(tmp_path / "a.mp4"), lambda: False)
+    prefetcher.shutdown()
+
+    service.download_file_from_s3.assert_not_awaited()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_failed_prefetch_leaves_download_to_the_task(tmp_path):
+    service = MagicMock(spec=FileService)
+    service.download_file_from_s3 = AsyncMock(side_effect=S3DownloadError("down"))
+    prefetcher = InputPrefetcher(lambda: service)
+
+    prefetcher.submit("uploads/a.mp4", str(tmp_path / "a.mp4"), lambda: True)
+    prefetcher.shutdown()
+
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,59 @@
+"""Tests for time-bucket aggregation of per-frame counts."""
+
+import numpy as np
+
+from backend.app.services.report_files import TimeSeriesWriter
+from backend.app.services.time_buckets import (
+    TimeBucketAggregator,
+    aggregate_time_series,
+)
+
+
+def _stream() -> list[np.ndarray | None]:
+    # 10 fps, 1 s buckets: frames 0-9, 10-19 and the partial 20-24.
+    frames: list[np.ndarray | None] = [None] * 25
+    frames[1] = np.array([0, 0])
+    frames[4] = np.array([0, 1, 1, 1])
+    frames[22] = np.array([1])
+    return frames
+
+
+def test_aggregator_emits_max_mean_and_sum_per_bucket():
+    counter = TimeBucketAggregator(["car", "bus"], fps=10.0, bucket_seconds=1.0)
+    for class_ids in _stream():
+        counter.add(class_ids)
+
+    buckets = counter.finish()
+
+    assert [b.model_dump() for b in buckets] == [
+        {
+            "start": 0.0,
+            "frames": 10,
+            "max": {"car": 2, "bus": 3},
+            "mean": {"car": 0.3, "bus": 0.3},
+            "sum": {"car": 3, "bus": 3},
+        },
+        # The empty second bucket is omitted; the last one is 5 frames long.
+        {
+            "start": 2.0,
+            "frames": 5,
+            "max": {"bus": 1},
+            "mean": {"bus": 0.2},
+            "sum": {"bus": 1},
+        },
+    ]
+    assert counter.frames == 25
+    assert counter.totals.tolist() == [3, 4]
+    assert counter.first_seen.tolist() == [1, 4]
+
+
+def test_aggregate_time_series_matches_streaming_aggregation(tmp_path):
+    path = str(tmp_path / "series.parquet")
+    counter = TimeBucketAggregator(["car", "bus"], fps=10.0, bucket_seconds=1.0)
+    with TimeSeriesWriter(path, {0: "car", 1: "bus"}, 10.0, chunk_frames=1) as w:
+        for frame_id, class_ids in enumerate(_stream()):
+            counts = counter.add(class_ids)
+            if counts is not None:
+                w.add(frame_id, counts)
+
+    assert aggregate_time_series(path, 10.0, 1.0, 25) == counter.finish()
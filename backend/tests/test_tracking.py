@@ -0,0 +1,37 @@
+"""Tests for optical-flow box propagation."""
+
+import numpy as np
+import supervision as sv
+
+from backend.app.services.tracking import BoxPropagator
+
+
+def _textured_frame(offset_x: int, offset_y: int) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    patch = rng.integers(0, 255, size=(60, 60, 3), dtype=np.uint8)
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+    frame[80 + offset_y : 140 + offset_y, 100 + offset_x : 160 + offset_x] = patch
+    return frame
+
+
+def test_propagate_follows_moving_object():
+    detections = sv.Detections(
+        xyxy=np.array([[100.0, 80.0, 160.0, 140.0]]),
+        confidence=np.array([0.9]),
+        class_id=np.array([2]),
+    )
+    propagator = BoxPropagator()
+    propagator.reset(_textured_frame(0, 0), detections)
+
+    moved = propagator.propagate(_textured_frame(6, 4))
+
+    np.testing.assert_allclose(moved.xyxy[0], [106.0, 84.0, 166.0, 144.0], atol=1.5)
+    assert moved.class_id.tolist() == [2]
+    assert moved.confidence.tolist() == [0.9]
+
+
+def test_propagate_without_detections_returns_empty():
+    propagator = BoxPropagator()
+    propagator.reset(_textured_frame(0, 0), sv.Detections.empty())
+
+    assert len(propagator.propagate(_textured_frame(5, 0))) == 0
@@ -0,0 +1,85 @@
+"""Tests for the presigned URL cache."""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from backend.app.services.url_cache import REDIS_KEY_PREFIX, PresignedUrlCache
+
+CLOCK = "backend.app.services.url_cache.time.monotonic"
+
+
+@pytest.mark.asyncio
+async def test_url_is_reused_only_within_its_reuse_window():
+    cache = PresignedUrlCache(reuse_fraction=0.5)
+
+    with patch(CLOCK, return_value=100.0):
+        await cache.set("k", "https://signed/1", expires_in=3600)
+    with patch(CLOCK, return_value=100.0 + 1799):
+        assert await cache.get("k") == "https://signed/1"
+    with patch(CLOCK, return_value=100.0 + 1800):
+        assert await cache.get("k") is None
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_url_is_evicted():
+    cache = PresignedUrlCache(max_entries=2)
+    await cache.set("a", "https://a", 60)
+    await cache.set("b", "https://b", 60)
+    assert await cache.get("a") == "https://a"
+
+    await cache.set("c", "https://c", 60)
+
+    assert await cache.get("a") == "https://a"
+    assert await cache.get("b") is None
+    assert await cache.get("c") == "https://c"
+
+
+def test_reuse_fraction_must_leave_urls_valid():
+    with pytest.raises(ValueError):
+        PresignedUrlCache(reuse_fraction=1.0)
+
+
+@pytest.mark.asyncio
+async def test_redis_shares_urls_with_their_remaining_lifetime():
+    redis = AsyncMock()
+    redis.get.return_value = b"https://signed/elsewhere"
+    redis.pttl.return_value = 10_000
+    cache = PresignedUrlCache(redis=redis)
+
+    with patch(CLOCK, return_value=0.0):
+        assert await cache.get("k") == "https://signed/elsewhere"
+    redis.get.assert_awaited_once_with(REDIS_KEY_PREFIX + "k")
+
+    # Later lookups are served in process until the Redis expiry.
+    with patch(CLOCK, return_value=9.0):
+        assert await cache.get("k") == "https://signed/elsewhere"
+    assert redis.get.await_count == 1
+    redis.get.return_value = None
+    with patch(CLOCK, return_value=10.0):
+        assert await cache.get("k") is None
+
+
+@pytest.mark.asyncio
+async def test_redis_expiry_matches_reuse_window():
+    redis = AsyncMock()
+    cache = PresignedUrlCache(reuse_fraction=0.5, redis=redis)
+
+    await cache.set("k", "https://signed", expires_in=3600)
+
+    redis.set.assert_awaited_once_with(
+        REDIS_KEY_PREFIX + "k", "https://signed", ex=1800
+    )
+
+
+@pytest.mark.asyncio
+async def test_redis_errors_are_misses():
+    redis = AsyncMock()
+    redis.get.side_effect = RedisConnectionError("down")
+    redis.set.side_effect = RedisConnectionError("down")
+    cache = PresignedUrlCache(redis=redis)
+
+    assert await cache.get("k") is None
+    await cache.set("k", "https://signed", 3600)
+    assert await cache.get("k") == "https://signed"
@@ -1,19 +1,29 @@
+import asyncio
 import uuid
-from unittest.mock import patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
-from backend.app.worker import celery_process_video
+from backend.app.worker import (
+    celery_process_video,
+    init_worker_process,
+    prefetch_task_input,
+    shutdown_worker_process,
+)
 
 
 def test_celery_worker_bridge():
     task_id_str = str(uuid.uuid4())
-    input_path = "/in.mp4"
-    output_path = "/out.mp4"
+    input_key = f"uploads/{task_id_str}.mp4"
 
     with (
-        patch("backend.app.worker.asyncio.run") as mock_run,
+        # Close the workflow coroutine instead of running it, so it is not
+        # left unawaited.
+        patch(
+            "backend.app.worker.asyncio.run", side_effect=lambda coro: coro.close()
+        ) as mock_run,
         patch("backend.app.worker.process_video_workflow") as mock_workflow,
+        patch("backend.app.worker.settings.WORKER_SCRATCH_DIR", "/scratch"),
     ):
-        result = celery_process_video(task_id_str, input_path, output_path)
+        result = celery_process_video(task_id_str, input_key)
 
         assert result == "OK"
 
@@ -24,3 +34,100 @@ def test_celery_worker_bridge():
         args = mock_workflow.call_args
         assert isinstance(args[0][0], uuid.UUID)
         assert str(args[0][0]) == task_id_str
+        # Inputs and outputs live in the worker's own scratch directory.
+        assert args[0][1:3] == (
+            f"/scratch/{task_id_str}.input.mp4",
+            f"/scratch/{task_id_str}.mp4",
+        )
+        assert args[0][5] == input_key
+
+
+def test_worker_process_init_warms_up_model():
+    with (
+        patch("backend.app.worker.get_yolo_service") as mock_get_service,
+        patch("backend.app.worker.open_storage", new_callable=AsyncMock) as mock_open,
+        patch("backend.app.worker.close_storage", new_callable=AsyncMock) as mock_close,
+    ):
+        init_worker_process()
+
+        mock_get_service.assert_called_once()
+        mock_open.assert_awaited_once()
+
+        shutdown_worker_process()
+
+        mock_close.assert_awaited_once()
+
+
+def test_worker_process_init_starts_segment_pool():
+    """With SEGMENT_WORKERS > 1 the segment pool lives as long as the process."""
+    with (
+        patch("backend.app.worker.get_yolo_service"),
+        patch("backend.app.worker.open_storage", new_callable=AsyncMock),
+        patch("backend.app.worker.close_storage", new_callable=AsyncMock),
+        patch("backend.app.worker.settings.SEGMENT_WORKERS", 4),
+        patch("backend.app.worker.get_segment_pool") as mock_get_pool,
+        patch("backend.app.worker.close_segment_pool") as mock_close_pool,
+    ):
+        init_worker_process()
+
+        mock_get_pool.assert_called_once_with(4)
+
+        shutdown_worker_process()
+
+        mock_close_pool.assert_called_once()
+
+
+def test_worker_tasks_share_the_process_event_loop():
+    """Tasks run on the loop that owns the process's pooled S3 client."""
+    loops = []
+
+    async def fake_workflow(*_):
+        loops.append(asyncio.get_running_loop())
+
+    with (
+        patch("backend.app.worker.get_yolo_service"),
+        patch("backend.app.worker.open_storage", new_callable=AsyncMock),
+        patch("backend.app.worker.close_storage", new_callable=AsyncMock),
+        patch("backend.app.worker.process_video_workflow", side_effect=fake_workflow),
+    ):
+        init_worker_process()
+        try:
+            for _ in range(2):
+                celery_process_video(str(uuid.uuid4()), "uploads/a.mp4")
+        finally:
+            shutdown_worker_process()
+
+    assert len(loops) == 2
+    assert loops[0] is loops[1]
+
+
+def test_received_task_input_is_prefetched_until_it_starts():
+    request = MagicMock()
+    request.name = "process_video_task"
+    request.id = str(uuid.uuid4())
+    request.args = [request.id, "uploads/a.mp4", "full", False]
+    request.time_start = None
+    prefetcher = MagicMock()
+
+    with (
+        patch("backend.app.worker._prefetcher", prefetcher),
+        patch("backend.app.worker.settings.WORKER_SCRATCH_DIR", "/scratch"),
+    ):
+        prefetch_task_input(request)
+
+    key, path, is_pending = prefetcher.submit.call_args.args
+    assert (key, path) == ("uploads/a.mp4", f"/scratch/{request.id}.input.mp4")
+    assert is_pending()
+    request.time_start = 1.0
+    assert not is_pending()
+
+
+def test_other_tasks_are_not_prefetched():
+    request = MagicMock()
+    request.name = "another_task"
+    prefetcher = MagicMock()
+
+    with patch("backend.app.worker._prefetcher", prefetcher):
+        prefetch_task_input(request)
+
+    prefetcher.submit.assert_not_called()
@@ -1,17 +1,52 @@
 """Tests for the video processing workflow."""
 
-import json
+import threading
 import uuid
-from unittest.mock import AsyncMock, MagicMock, mock_open, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from backend.app.models.task import Task
+from backend.app.models.task import ProcessingMode, Task
+from backend.app.schemas.analytics import AnalysisSummary, AnalyticsReport, VideoMeta
 from backend.app.services.bigquery import BigQueryService
 from backend.app.services.file import FileService
+from backend.app.services.segments import process_video_segmented
 from backend.app.services.task import TaskService
-from backend.app.services.workflow import process_video_workflow
-from backend.app.services.yolo import YoloService
+from backend.app.services.workflow import process_video_workflow, rethreshold_workflow
+from backend.app.services.yolo import (
+    ProcessingResult,
+    VideoProcessingError,
+    YoloService,
+)
+
+
+def _result(
+    video_path: str | None = "/tmp/out.mp4",
+    time_series_path: str | None = "/tmp/out.parquet",
+) -> ProcessingResult:
+    report = AnalyticsReport(
+        meta=VideoMeta(
+            source_filename="test.mp4",
+            fps=30,
+            total_frames=100,
+            resolution=(1920, 1080),
+            duration_seconds=3.3,
+        ),
+        summary=AnalysisSummary(
+            total_detections=10,
+            unique_classes=["car"],
+            dominant_class="car",
+            class_distribution={"car": 10},
+        ),
+        time_series=[],
+    )
+    return ProcessingResult(
+        report=report,
+        json_path="/tmp/out.json",
+        video_path=video_path,
+        time_series_path=time_series_path,
+        timings={"frames": 1.0, "report": 0.1},
+    )
 
 
 @pytest.mark.asyncio
@@ -26,8 +61,6 @@ async def test_workflow_success_analytics_and_bq(mock_db_session_factory):
     mock_task_service.get_task.return_value = Task(input_filename="test.mp4")
 
     mock_yolo_service = MagicMock(spec=YoloService)
-    # YOLO returns path to JSON file
-    mock_yolo_service.process_video.return_value = "/tmp/analytics.json"
 
     mock_file_service = MagicMock(spec=FileService)
     mock_file_service.upload_file_to_s3 = AsyncMock()
@@ -36,51 +69,25 @@ async def test_workflow_success_analytics_and_bq(mock_db_session_factory):
     # Mock for BigQuery
     mock_bq_service = MagicMock(spec=BigQueryService)
 
-    # Simulated JSON file data (for BigQuery)
-    fake_analytics_data = json.dumps(
-        {
-            "meta": {
-                "source_filename": "test.mp4",
-                "fps": 30,
-                "total_frames": 100,
-                "resolution": [1920, 1080],
-                "duration_seconds": 3.3,
-            },
-            "summary": {
-                "total_detections": 10,
-                "unique_classes": ["car"],
-                "dominant_class": "car",
-                "class_distribution": {"car": 10},
-            },
-            "time_series": [],
-        }
-    )
-
-    # Create a mock Path object that returns True for exists()
-    mock_path = MagicMock()
-    mock_path.exists.return_value = True
-    mock_path.name = "out.mp4"
-
     wf = "backend.app.services.workflow"
 
     # --- PATCHING ---
     with (
         patch(f"{wf}.async_session_factory", mock_factory),
         patch(f"{wf}.TaskService", return_value=mock_task_service),
-        patch(f"{wf}.YoloService", return_value=mock_yolo_service),
-        patch(f"{wf}.FileService", return_value=mock_file_service),
+        patch(f"{wf}.get_yolo_service", return_value=mock_yolo_service),
+        patch(f"{wf}.get_file_service", return_value=mock_file_service),
         patch(f"{wf}.get_bigquery_service", return_value=mock_bq_service),
         patch(f"{wf}.run_in_threadpool", new_callable=AsyncMock) as mock_thread,
-        patch(f"{wf}.Path") as mock_path_cls,
-        patch("builtins.open", mock_open(read_data=fake_analytics_data)),
+        patch(f"{wf}.settings.DETECTION_CACHE_ENABLED", False),
+        patch("builtins.open") as mock_file_open,
     ):
-        # Configure Path mock
-        mock_path_cls.return_value = mock_path
+        result = _result()
 
         # Configure side_effect for threadpool
-        # 1. Call: YOLO (returns path)
+        # 1. Call: YOLO (returns the processing result)
         # 2. Call: BigQuery Insert (returns None)
-        mock_thread.side_effect = ["/tmp/analytics.json", None]
+        mock_thread.side_effect = [result, None]
 
         # ACTION
         await process_video_workflow(task_id, "/tmp/in.mp4", "/tmp/out.mp4")
@@ -96,9 +103,406 @@ async def test_workflow_success_analytics_and_bq(mock_db_session_factory):
         assert bq_call[0][0] == mock_bq_service.insert_report
         assert bq_call[0][1] == str(task_id)
 
-        # Verify report object
-        report_arg = bq_call[0][2]
-        assert report_arg.summary.total_detections == 10
+        # The in-memory report is passed on; nothing is read back from disk.
+        assert bq_call[0][2] is result.report
+        mock_file_open.assert_not_called()
+
+        # 2. Check S3 uploads (Video + JSON summary + Parquet time series)
+        uploads = [c.args for c in mock_file_service.upload_file_to_s3.await_args_list]
+        assert uploads == [
+            ("/tmp/out.mp4", "results/out.mp4"),
+            ("/tmp/out.json", f"analytics/{task_id}.json"),
+            ("/tmp/out.parquet", f"analytics/{task_id}.parquet"),
+        ]
+        mock_task_service.mark_completed.assert_awaited_once_with(
+            mock_task_service.get_task.return_value, "results/out.mp4"
+        )
+
+
+@pytest.mark.asyncio
+async def test_workflow_uploads_report_while_video_is_finished(
+    mock_db_session_factory,
+):
+    """The report is uploaded and inserted before processing returns."""
+    mock_factory, _ = mock_db_session_factory
+    task_id = uuid.uuid4()
+
+    mock_task_service = AsyncMock(spec=TaskService)
+    mock_task_service.get_task.return_value = Task(input_filename="test.mp4")
+
+    uploaded = threading.Event()
+    inserted = threading.Event()
+    mock_bq_service = MagicMock(spec=BigQueryService)
+    mock_bq_service.insert_report.side_effect = lambda *_: inserted.set()
+    result = _result()
+
+    def process_video(input_path, output_path, *, on_report, **kwargs):
+        on_report(result)
+        # Stands in for the H.264 conversion, which outlasts the uploads.
+        assert uploaded.wait(5)
+        assert inserted.wait(5)
+        return result
+
+    async def upload(local_path, key):
+        if key == f"analytics/{task_id}.json":
+            uploaded.set()
+
+    mock_yolo_service = MagicMock(spec=YoloService)
+    mock_yolo_service.process_video.side_effect = process_video
+    mock_file_service = MagicMock(spec=FileService)
+    mock_file_service.upload_file_to_s3 = AsyncMock(side_effect=upload)
+    mock_file_service.cleanup_local_file = AsyncMock()
+
+    wf = "backend.app.services.workflow"
+
+    with (
+        patch(f"{wf}.async_session_factory", mock_factory),
+        patch(f"{wf}.TaskService", return_value=mock_task_service),
+        patch(f"{wf}.get_yolo_service", return_value=mock_yolo_service),
+        patch(f"{wf}.get_file_service", return_value=mock_file_service),
+        patch(f"{wf}.get_bigquery_service", return_value=mock_bq_service),
+        patch(f"{wf}.settings.DETECTION_CACHE_ENABLED", False),
+    ):
+        await process_video_workflow(task_id, "/tmp/in.mp4", "/tmp/out.mp4")
+
+    keys = [c.args[1] for c in mock_file_service.upload_file_to_s3.await_args_list]
+    assert sorted(keys) == [
+        f"analytics/{task_id}.json",
+        f"analytics/{task_id}.parquet",
+        "results/out.mp4",
+    ]
+    mock_bq_service.insert_report.assert_called_once_with(str(task_id), result.report)
+    mock_task_service.mark_completed.assert_awaited_once_with(
+        mock_task_service.get_task.return_value, "results/out.mp4"
+    )
+
+
+@pytest.mark.asyncio
+async def test_workflow_discards_report_when_video_fails(mock_db_session_factory):
+    """A task failing after its report was uploaded leaves no report behind."""
+    mock_factory, _ = mock_db_session_factory
+    task_id = uuid.uuid4()
+
+    mock_task_service = AsyncMock(spec=TaskService)
+    mock_task_service.get_task.return_value = Task(input_filename="test.mp4")
+
+    mock_bq_service = MagicMock(spec=BigQueryService)
+
+    def process_video(input_path, output_path, *, on_report, **kwargs):
+        on_report(_result())
+        raise VideoProcessingError("ffmpeg failed")
 
-        # 2. Check S3 uploads (Video + JSON)
-        assert mock_file_service.upload_file_to_s3.await_count == 2
+    mock_yolo_service = MagicMock(spec=YoloService)
+    mock_yolo_service.process_video.side_effect = process_video
+    mock_file_service = MagicMock(spec=FileService)
+    mock_file_service.upload_file_to_s3 = AsyncMock()
+    mock_file_service.delete_file_from_s3 = AsyncMock()
+    mock_file_service.cleanup_local_file = AsyncMock()
+
+    wf = "backend.app.services.workflow"
+
+    with (
+        patch(f"{wf}.async_session_factory", mock_factory),
+        patch(f"{wf}.TaskService", return_value=mock_task_service),
+        patch(f"{wf}.get_yolo_service", return_value=mock_yolo_service),
+        patch(f"{wf}.get_file_service", return_value=mock_file_service),
+        patch(f"{wf}.get_bigquery_service", return_value=mock_bq_service),
+        patch(f"{wf}.settings.DETECTION_CACHE_ENABLED", True),
+        patch(f"{wf}.file_sha256", new_callable=AsyncMock, return_value="abc"),
+        patch(f"{wf}.stage_input", new_callable=AsyncMock),
+    ):
+        await process_video_workflow(
+            task_id, "/tmp/in.mp4", "/tmp/out.mp4", input_key="uploads/abc.mp4"
+        )
+
+    # The report was inserted while the video was finished; rows stay.
+    mock_bq_service.insert_report.assert_called_once()
+    deleted = [c.args[0] for c in mock_file_service.delete_file_from_s3.await_args_list]
+    # A failed task cannot be re-thresholded, so its input goes too.
+    assert sorted(deleted) == [
+        f"analytics/{task_id}.json",
+        f"analytics/{task_id}.parquet",
+        "uploads/abc.mp4",
+    ]
+    mock_task_service.mark_completed.assert_not_awaited()
+    mock_task_service.mark_failed.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_workflow_inserts_nothing_when_processing_fails(
+    mock_db_session_factory,
+):
+    """A task failing before its report exists sends nothing to BigQuery."""
+    mock_factory, _ = mock_db_session_factory
+    task_id = uuid.uuid4()
+
+    mock_task_service = AsyncMock(spec=TaskService)
+    mock_task_service.get_task.return_value = Task(input_filename="test.mp4")
+
+    mock_bq_service = MagicMock(spec=BigQueryService)
+    mock_yolo_service = MagicMock(spec=YoloService)
+    mock_yolo_service.process_video.side_effect = VideoProcessingError("bad video")
+    mock_file_service = MagicMock(spec=FileService)
+    mock_file_service.upload_file_to_s3 = AsyncMock()
+    mock_file_service.cleanup_local_file = AsyncMock()
+
+    wf = "backend.app.services.workflow"
+
+    with (
+        patch(f"{wf}.async_session_factory", mock_factory),
+        patch(f"{wf}.TaskService", return_value=mock_task_service),
+        patch(f"{wf}.get_yolo_service", return_value=mock_yolo_service),
+        patch(f"{wf}.get_file_service", return_value=mock_file_service),
+        patch(f"{wf}.get_bigquery_service", return_value=mock_bq_service),
+        patch(f"{wf}.settings.DETECTION_CACHE_ENABLED", False),
+    ):
+        await process_video_workflow(task_id, "/tmp/in.mp4", "/tmp/out.mp4")
+
+    mock_bq_service.insert_report.assert_not_called()
+    mock_file_service.upload_file_to_s3.assert_not_awaited()
+    mock_task_service.mark_failed.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_workflow_analytics_only_skips_video_upload(mock_db_session_factory):
+    """Analytics-only tasks upload just the JSON report and point at it."""
+    mock_factory, _ = mock_db_session_factory
+    task_id = uuid.uuid4()
+    task = Task(input_filename="test.mp4", mode=ProcessingMode.ANALYTICS_ONLY)
+
+    mock_task_service = AsyncMock(spec=TaskService)
+    mock_task_service.get_task.return_value = task
+
+    mock_file_service = MagicMock(spec=FileService)
+    mock_file_service.upload_file_to_s3 = AsyncMock()
+    mock_file_service.cleanup_local_file = AsyncMock()
+
+    wf = "backend.app.services.workflow"
+
+    with (
+        patch(f"{wf}.async_session_factory", mock_factory),
+        patch(f"{wf}.TaskService", return_value=mock_task_service),
+        patch(f"{wf}.get_yolo_service"),
+        patch(f"{wf}.get_file_service", return_value=mock_file_service),
+        patch(f"{wf}.get_bigquery_service"),
+        patch(f"{wf}.run_in_threadpool", new_callable=AsyncMock) as mock_thread,
+        patch(f"{wf}.settings.DETECTION_CACHE_ENABLED", False),
+    ):
+        mock_thread.side_effect = [
+            _result(video_path=None, time_series_path=None),
+            None,
+        ]
+
+        await process_video_workflow(
+            task_id, "/tmp/in.mp4", "/tmp/out.mp4", ProcessingMode.ANALYTICS_ONLY
+        )
+
+        assert mock_thread.call_args_list[0].kwargs["mode"] == (
+            ProcessingMode.ANALYTICS_ONLY
+        )
+        assert mock_thread.call_args_list[0].kwargs["raw_time_series"] is False
+        uploaded_keys = [
+            c.args[1] for c in mock_file_service.upload_file_to_s3.await_args_list
+        ]
+        assert uploaded_keys == [f"analytics/{task_id}.json"]
+        mock_task_service.mark_completed.assert_awaited_once_with(
+            task, f"analytics/{task_id}.json"
+        )
+
+
+@pytest.mark.asyncio
+async def test_workflow_uses_segmented_processing(mock_db_session_factory):
+    """With SEGMENT_WORKERS > 1 the video is processed in parallel segments."""
+    mock_factory, _ = mock_db_session_factory
+    task_id = uuid.uuid4()
+
+    mock_task_service = AsyncMock(spec=TaskService)
+    mock_task_service.get_task.return_value = Task(input_filename="test.mp4")
+
+    mock_file_service = MagicMock(spec=FileService)
+    mock_file_service.upload_file_to_s3 = AsyncMock()
+    mock_file_service.cleanup_local_file = AsyncMock()
+
+    wf = "backend.app.services.workflow"
+
+    with (
+        patch(f"{wf}.async_session_factory", mock_factory),
+        patch(f"{wf}.TaskService", return_value=mock_task_service),
+        patch(f"{wf}.get_yolo_service"),
+        patch(f"{wf}.get_file_service", return_value=mock_file_service),
+        patch(f"{wf}.get_bigquery_service"),
+        patch(f"{wf}.run_in_threadpool", new_callable=AsyncMock) as mock_thread,
+        patch(f"{wf}.settings.SEGMENT_WORKERS", 4),
+        patch(f"{wf}.file_sha256", new_callable=AsyncMock, return_value="abc"),
+    ):
+        mock_thread.side_effect = [_result(), None]
+
+        await process_video_workflow(task_id, "/tmp/in.mp4", "/tmp/out.mp4")
+
+        process_call = mock_thread.call_args_list[0]
+        assert process_call.args == (
+            process_video_segmented,
+            "/tmp/in.mp4",
+            "/tmp/out.mp4",
+            4,
+        )
+
+
+@pytest.mark.asyncio
+async def test_workflow_stages_input_before_processing(mock_db_session_factory):
+    """The input is staged from storage before processing."""
+    mock_factory, _ = mock_db_session_factory
+    task_id = uuid.uuid4()
+
+    mock_task_service = AsyncMock(spec=TaskService)
+    mock_task_service.get_task.return_value = Task(input_filename="test.mp4")
+
+    events: list[str] = []
+    mock_file_service = MagicMock(spec=FileService)
+    mock_file_service.upload_file_to_s3 = AsyncMock()
+    mock_file_service.cleanup_local_file = AsyncMock()
+
+    async def fake_thread(func, *args, **kwargs):
+        events.append("process" if not events[1:] else "bq")
+        return _result() if len(events) == 2 else None
+
+    wf = "backend.app.services.workflow"
+
+    with (
+        patch(f"{wf}.async_session_factory", mock_factory),
+        patch(f"{wf}.TaskService", return_value=mock_task_service),
+        patch(f"{wf}.get_yolo_service"),
+        patch(f"{wf}.get_file_service", return_value=mock_file_service),
+        patch(f"{wf}.get_bigquery_service"),
+        patch(f"{wf}.run_in_threadpool", side_effect=fake_thread),
+        patch(
+            f"{wf}.stage_input", side_effect=lambda *_: events.append("stage")
+        ) as mock_stage,
+        patch(f"{wf}.settings.INPUT_PREFETCH_WAIT_SECONDS", 5.0),
+        patch(f"{wf}.file_sha256", new_callable=AsyncMock, return_value="abc"),
+    ):
+        await process_video_workflow(
+            task_id,
+            "/tmp/in.mp4",
+            "/tmp/out.mp4",
+            input_key="uploads/abc.mp4",
+        )
+
+    assert events[:2] == ["stage", "process"]
+    mock_stage.assert_awaited_once_with(
+        mock_file_service, "uploads/abc.mp4", "/tmp/in.mp4", 5.0
+    )
+    mock_task_service.mark_completed.assert_awaited_once()
+    # Without a detection cache the input is of no further use.
+    mock_task_service.record_input.assert_awaited_once_with(
+        mock_task_service.get_task.return_value, None, None
+    )
+    mock_file_service.delete_file_from_s3.assert_awaited_once_with("uploads/abc.mp4")
+
+
+@pytest.mark.asyncio
+async def test_workflow_keeps_detection_cache(mock_db_session_factory):
+    """Raw detections are written while processing and stored by video hash."""
+    mock_factory, _ = mock_db_session_factory
+    task_id = uuid.uuid4()
+    task = Task(input_filename="test.mp4", content_hash="abc")
+
+    mock_task_service = AsyncMock(spec=TaskService)
+    mock_task_service.get_task.return_value = task
+
+    mock_file_service = MagicMock(spec=FileService)
+    mock_file_service.upload_file_to_s3 = AsyncMock()
+    mock_file_service.cleanup_local_file = AsyncMock()
+
+    wf = "backend.app.services.workflow"
+
+    with (
+        patch(f"{wf}.async_session_factory", mock_factory),
+        patch(f"{wf}.TaskService", return_value=mock_task_service),
+        patch(f"{wf}.get_yolo_service"),
+        patch(f"{wf}.get_file_service", return_value=mock_file_service),
+        patch(f"{wf}.get_bigquery_service"),
+        patch(f"{wf}.run_in_threadpool", new_callable=AsyncMock) as mock_thread,
+        patch(f"{wf}.settings.DETECTION_CACHE_ENABLED", True),
+        patch(f"{wf}.file_sha256", new_callable=AsyncMock) as mock_hash,
+        patch(f"{wf}.detections_key", return_value="detections/abc/model.parquet"),
+        patch(f"{wf}.stage_input", new_callable=AsyncMock),
+    ):
+        mock_thread.side_effect = [_result(), None]
+
+        await process_video_workflow(
+            task_id, "/tmp/in.mp4", "/tmp/out.mp4", input_key="uploads/abc.mp4"
+        )
+
+    # The hash recorded at upload is reused instead of hashing again.
+    mock_hash.assert_not_awaited()
+    mock_task_service.record_input.assert_awaited_once_with(
+        task, "uploads/abc.mp4", "abc"
+    )
+    cache_path = "/tmp/out.detections.parquet"
+    assert mock_thread.call_args_list[0].kwargs["detection_cache"] == cache_path
+    mock_file_service.upload_file_to_s3.assert_any_await(
+        cache_path, "detections/abc/model.parquet"
+    )
+    mock_file_service.cleanup_local_file.assert_any_await(cache_path)
+    mock_task_service.mark_completed.assert_awaited_once()
+    # The input is kept for re-rendering at another threshold.
+    mock_file_service.delete_file_from_s3.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_rethreshold_workflow_renders_from_cache(mock_db_session_factory):
+    """Re-thresholding reads the cache and renders without BigQuery."""
+    mock_factory, _ = mock_db_session_factory
+    task_id = uuid.uuid4()
+    task = Task(input_filename="test.mp4")
+
+    mock_task_service = AsyncMock(spec=TaskService)
+    mock_task_service.get_task.return_value = task
+
+    mock_yolo_service = MagicMock(spec=YoloService)
+    mock_file_service = MagicMock(spec=FileService)
+    mock_file_service.download_file_from_s3 = AsyncMock()
+    mock_file_service.upload_file_to_s3 = AsyncMock()
+    mock_file_service.cleanup_local_file = AsyncMock()
+
+    wf = "backend.app.services.workflow"
+
+    with (
+        patch(f"{wf}.async_session_factory", mock_factory),
+        patch(f"{wf}.TaskService", return_value=mock_task_service),
+        patch(f"{wf}.get_yolo_service", return_value=mock_yolo_service),
+        patch(f"{wf}.get_file_service", return_value=mock_file_service),
+        patch(f"{wf}.run_in_threadpool", new_callable=AsyncMock) as mock_thread,
+        patch(f"{wf}.stage_input", new_callable=AsyncMock) as mock_stage,
+    ):
+        mock_thread.return_value = _result(time_series_path=None)
+
+        await rethreshold_workflow(
+            task_id,
+            "detections/abc/model.parquet",
+            0.6,
+            "/tmp/in.mp4",
+            "/tmp/out.mp4",
+            ProcessingMode.FULL,
+            input_key="uploads/abc.mp4",
+        )
+
+    mock_file_service.download_file_from_s3.assert_awaited_once_with(
+        "detections/abc/model.parquet", "/tmp/out.detections.parquet"
+    )
+    mock_stage.assert_awaited_once()
+    mock_thread.assert_awaited_once()
+    assert mock_thread.call_args.args == (
+        mock_yolo_service.render_cached_detections,
+        "/tmp/in.mp4",
+        "/tmp/out.mp4",
+        "/tmp/out.detections.parquet",
+        0.6,
+    )
+    uploads = [c.args for c in mock_file_service.upload_file_to_s3.await_args_list]
+    assert uploads == [
+        ("/tmp/out.mp4", "results/out.mp4"),
+        ("/tmp/out.json", f"analytics/{task_id}.json"),
+    ]
+    mock_task_service.mark_completed.assert_awaited_once_with(task, "results/out.mp4")
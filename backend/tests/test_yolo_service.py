@@ -1,8 +1,15 @@
-from unittest.mock import MagicMock, mock_open, patch
+from unittest.mock import MagicMock, patch
 
+import numpy as np
+import pyarrow.parquet as pq
 import pytest
+import supervision as sv
 
-from backend.app.services.yolo import YoloService
+from backend.app.models.task import ProcessingMode
+from backend.app.schemas.analytics import AnalyticsReport
+from backend.app.services import yolo as yolo_module
+from backend.app.services.time_buckets import TimeBucketAggregator
+from backend.app.services.yolo import InferenceStats, YoloService, get_yolo_service
 
 
 @pytest.fixture
@@ -47,7 +54,10 @@ def test_process_video_flow_with_analytics(mock_dependencies):
     with (
         patch("backend.app.services.yolo.Path") as mock_path_cls,
         patch("backend.app.core.config.settings.MODEL_PATH", "dummy.pt"),
-        patch("builtins.open", mock_open()) as mock_file,
+        patch("backend.app.core.config.settings.VIDEO_ENCODER", "opencv"),
+        patch("backend.app.services.yolo.TimeSeriesWriter") as mock_series_cls,
+        patch("backend.app.core.config.settings.TIME_BUCKET_SECONDS", 1.0),
+        patch("backend.app.services.yolo.write_summary") as mock_write_summary,
     ):
         # Configure Path to return appropriate mocks
         def path_side_effect(p):
@@ -73,20 +83,321 @@ def test_process_video_flow_with_analytics(mock_dependencies):
         mock_detections.class_id = [0, 2]
         mock_sv.Detections.from_ultralytics.return_value = mock_detections
 
-        mock_model_instance.model.names = {0: "car", 1: "truck", 2: "person"}
+        mock_model_instance.names = {0: "car", 1: "truck", 2: "person"}
+        service = YoloService()
+        reported = []
+        result = service.process_video(
+            "input.mp4",
+            "output.mp4",
+            on_report=lambda r: reported.append((r, mock_subprocess.called)),
+        )
+
+        # The report is handed out before the H.264 conversion.
+        assert reported == [(result, False)]
+        assert result.json_path == "output.json"
+        assert result.time_series_path is None
+        # The container claims 10 frames; only the decoded one is counted.
+        assert result.processed_frames == 1
+        assert set(result.timings) == {"frames", "report", "h264_conversion"}
+
+        # The per-frame series is only kept on request.
+        mock_series_cls.assert_not_called()
+        report, written_path = mock_write_summary.call_args[0]
+        assert written_path == "output.json"
+        assert report is result.report
+        assert report.summary.total_detections == 2
+        assert report.summary.class_distribution == {"car": 1, "person": 1}
+        assert report.bucket_seconds == 1.0
+        assert [b.sum for b in report.time_buckets] == [{"car": 1, "person": 1}]
+
+        mock_subprocess.assert_called_once()
+
+
+def test_detect_frames_batches_model_calls(mock_dependencies):
+    _, mock_sv, mock_yolo_class, _ = mock_dependencies
+
+    mock_model_instance = mock_yolo_class.return_value
+    mock_model_instance.side_effect = lambda batch, **_: [
+        f"result-{frame}" for frame in batch
+    ]
+    mock_sv.Detections.from_ultralytics.side_effect = lambda r: f"det-{r}"
+
+    service = YoloService()
+    frames = list(range(10))
+    output = list(service.detect_frames(frames, conf=0.5, batch_size=4))
+
+    batch_lengths = [len(c.args[0]) for c in mock_model_instance.call_args_list]
+    assert batch_lengths == [4, 4, 2]
+    assert [frame for frame, _ in output] == frames
+    assert output[3] == (3, "det-result-3")
+
+
+def test_get_yolo_service_loads_once(mock_dependencies, monkeypatch):
+    _, _, mock_yolo_class, _ = mock_dependencies
+    monkeypatch.setattr(yolo_module, "_service", None)
+
+    first = get_yolo_service()
+    second = get_yolo_service()
+
+    assert first is second
+    mock_yolo_class.assert_called_once()
+    # Warmup inference on a blank frame
+    mock_yolo_class.return_value.assert_called_once()
+
 
+def test_process_video_pipes_frames_to_ffmpeg(mock_dependencies, tmp_path):
+    mock_cv2, mock_sv, mock_yolo_class, mock_subprocess = mock_dependencies
+
+    input_path = tmp_path / "input.mp4"
+    input_path.write_bytes(b"fake")
+    output_path = tmp_path / "output.mp4"
+
+    mock_info = mock_sv.VideoInfo.from_video_path.return_value
+    mock_info.fps = 25.0
+    mock_info.resolution_wh = (64, 48)
+    mock_info.total_frames = 2
+
+    frames = [MagicMock(), MagicMock()]
+    mock_sv.get_video_frames_generator.return_value = frames
+    mock_yolo_class.return_value.side_effect = lambda batch, **_: [
+        MagicMock() for _ in batch
+    ]
+    mock_sv.Detections.from_ultralytics.return_value.class_id = None
+
+    with (
+        patch("backend.app.core.config.settings.VIDEO_ENCODER", "ffmpeg_pipe"),
+        patch("backend.app.services.yolo.has_audio_stream", return_value=False),
+        patch("backend.app.services.yolo.FfmpegPipeWriter") as mock_writer_cls,
+    ):
         service = YoloService()
-        json_path = service.process_video("input.mp4", "output.mp4")
+        result = service.process_video(str(input_path), str(output_path))
+
+    mock_writer_cls.assert_called_once_with(
+        str(output_path), 25.0, (64, 48), audio_source=None
+    )
+    writer = mock_writer_cls.return_value
+    assert writer.write.call_count == 2
+    writer.release.assert_called()
+    mock_cv2.VideoWriter.assert_not_called()
+    mock_subprocess.assert_not_called()
+    assert result.json_path == str(tmp_path / "output.json")
+    assert result.video_path == str(output_path)
 
-        assert json_path == "output.json"
 
-        handle = mock_file()
-        handle.write.assert_called_once()
+def test_process_video_analytics_only_skips_rendering(mock_dependencies, tmp_path):
+    mock_cv2, mock_sv, mock_yolo_class, mock_subprocess = mock_dependencies
 
-        written_content = handle.write.call_args[0][0]
+    input_path = tmp_path / "input.mp4"
+    input_path.write_bytes(b"fake")
+    output_path = tmp_path / "output.mp4"
 
-        assert '"total_detections": 2' in written_content
-        assert '"car": 1' in written_content
-        assert '"person": 1' in written_content
+    mock_info = mock_sv.VideoInfo.from_video_path.return_value
+    mock_info.fps = 25.0
+    mock_info.resolution_wh = (64, 48)
+    mock_info.total_frames = 1
 
-        mock_subprocess.assert_called_once()
+    mock_sv.get_video_frames_generator.return_value = [MagicMock()]
+    mock_yolo_class.return_value.side_effect = lambda batch, **_: [
+        MagicMock() for _ in batch
+    ]
+    mock_sv.Detections.from_ultralytics.return_value.class_id = [0]
+    mock_yolo_class.return_value.names = {0: "car"}
+
+    with patch("backend.app.services.yolo.FfmpegPipeWriter") as mock_writer_cls:
+        service = YoloService()
+        result = service.process_video(
+            str(input_path), str(output_path), mode=ProcessingMode.ANALYTICS_ONLY
+        )
+
+    mock_writer_cls.assert_not_called()
+    mock_cv2.VideoWriter.assert_not_called()
+    mock_sv.BoxAnnotator.assert_not_called()
+    mock_subprocess.assert_not_called()
+    assert not output_path.exists()
+    assert '"car": 1' in (tmp_path / "output.json").read_text()
+    assert result.json_path == str(tmp_path / "output.json")
+    assert result.video_path is None
+    assert result.report.summary.class_distribution == {"car": 1}
+
+
+def test_detect_frames_with_stride_runs_model_on_keyframes(mock_dependencies):
+    _, mock_sv, mock_yolo_class, _ = mock_dependencies
+
+    mock_model_instance = mock_yolo_class.return_value
+    mock_model_instance.side_effect = lambda batch, **_: [
+        f"result-{frame}" for frame in batch
+    ]
+    mock_sv.Detections.from_ultralytics.side_effect = lambda r: f"det-{r}"
+
+    with patch("backend.app.services.yolo.BoxPropagator") as mock_propagator_cls:
+        propagator = mock_propagator_cls.return_value
+        propagator.propagate.side_effect = lambda frame: f"propagated-{frame}"
+
+        service = YoloService()
+        output = list(service.detect_frames(range(7), conf=0.5, batch_size=2, stride=3))
+
+    keyframe_batches = [c.args[0] for c in mock_model_instance.call_args_list]
+    assert keyframe_batches == [[0, 3], [6]]
+    assert [det for _, det in output] == [
+        "det-result-0",
+        "propagated-1",
+        "propagated-2",
+        "det-result-3",
+        "propagated-4",
+        "propagated-5",
+        "det-result-6",
+    ]
+    assert propagator.reset.call_count == 3
+
+
+def test_detect_frames_reuses_detections_for_static_frames(mock_dependencies):
+    _, mock_sv, mock_yolo_class, _ = mock_dependencies
+
+    mock_model_instance = mock_yolo_class.return_value
+    mock_model_instance.side_effect = lambda batch, **_: [
+        f"result-{frame}" for frame in batch
+    ]
+    mock_sv.Detections.from_ultralytics.side_effect = lambda r: f"det-{r}"
+
+    gate = MagicMock()
+    gate.is_static.side_effect = lambda frame: frame in {1, 2, 4}
+    stats = InferenceStats()
+
+    service = YoloService()
+    output = list(
+        service.detect_frames(
+            range(6), conf=0.5, batch_size=4, motion_gate=gate, stats=stats
+        )
+    )
+
+    inferred = [f for c in mock_model_instance.call_args_list for f in c.args[0]]
+    assert inferred == [0, 3, 5]
+    assert [det for _, det in output] == [
+        "det-result-0",
+        "det-result-0",
+        "det-result-0",
+        "det-result-3",
+        "det-result-3",
+        "det-result-5",
+    ]
+    assert stats.frames == 6
+    assert stats.static_frames == 3
+    assert stats.static_ratio == 0.5
+
+
+def test_build_report_resolves_names_and_buckets_counts(mock_dependencies):
+    info = MagicMock(fps=10.0, total_frames=4, resolution_wh=(64, 48))
+    counter = TimeBucketAggregator(["car", "truck", "person"], 10.0, 0.2)
+    for class_ids in (None, [2, 2], [0, 2, 2, 2], None):
+        counter.add(class_ids)
+
+    service = YoloService()
+    report = service._build_report(info, "input.mp4", counter)
+
+    assert report.summary.class_distribution == {"person": 5, "car": 1}
+    assert report.summary.unique_classes == ["person", "car"]
+    assert report.summary.dominant_class == "person"
+    assert report.summary.total_detections == 6
+    assert report.time_series == []
+    assert report.bucket_seconds == 0.2
+    assert [(b.start, b.max, b.sum) for b in report.time_buckets] == [
+        (0.0, {"person": 2}, {"person": 2}),
+        (0.2, {"car": 1, "person": 3}, {"car": 1, "person": 3}),
+    ]
+
+
+def test_process_video_counts_beyond_reported_frame_count(mock_dependencies, tmp_path):
+    _, mock_sv, mock_yolo_class, _ = mock_dependencies
+
+    input_path = tmp_path / "input.mp4"
+    input_path.write_bytes(b"fake")
+
+    mock_info = mock_sv.VideoInfo.from_video_path.return_value
+    mock_info.fps = 10.0
+    mock_info.resolution_wh = (64, 48)
+    # Container metadata undercounts the frames actually decoded.
+    mock_info.total_frames = 1
+
+    mock_sv.get_video_frames_generator.return_value = [MagicMock()] * 5
+    mock_yolo_class.return_value.side_effect = lambda batch, **_: [
+        MagicMock() for _ in batch
+    ]
+    mock_sv.Detections.from_ultralytics.return_value.class_id = np.array([1, 1])
+    mock_yolo_class.return_value.names = {0: "car", 1: "bus"}
+
+    service = YoloService()
+    service.process_video(
+        str(input_path),
+        str(tmp_path / "output.mp4"),
+        mode=ProcessingMode.ANALYTICS_ONLY,
+        raw_time_series=True,
+    )
+
+    report = AnalyticsReport.model_validate_json((tmp_path / "output.json").read_text())
+    assert report.summary.class_distribution == {"bus": 10}
+    series = pq.read_table(tmp_path / "output.parquet").to_pydict()
+    assert series["frame_id"] == [0, 1, 2, 3, 4]
+
+
+def test_process_video_caches_raw_detections_for_rethresholding(
+    mock_dependencies, tmp_path
+):
+    _, mock_sv, mock_yolo_class, _ = mock_dependencies
+
+    input_path = tmp_path / "input.mp4"
+    input_path.write_bytes(b"fake")
+    cache_path = str(tmp_path / "output.detections.parquet")
+
+    mock_info = mock_sv.VideoInfo.from_video_path.return_value
+    mock_info.fps = 10.0
+    mock_info.width, mock_info.height = 64, 48
+    mock_info.resolution_wh = (64, 48)
+    mock_info.total_frames = 3
+
+    mock_sv.get_video_frames_generator.return_value = [MagicMock()] * 3
+    model = mock_yolo_class.return_value
+    model.side_effect = lambda batch, **_: [MagicMock() for _ in batch]
+    model.names = {0: "car", 1: "bus"}
+    mock_sv.Detections.from_ultralytics.return_value = sv.Detections(
+        xyxy=np.array([[0, 0, 10, 10], [5, 5, 20, 20]], dtype=np.float32),
+        confidence=np.array([0.1, 0.5], dtype=np.float32),
+        class_id=np.array([0, 1]),
+    )
+
+    service = YoloService()
+    with patch("backend.app.core.config.settings.DETECTION_CACHE_MIN_CONF", 0.05):
+        result = service.process_video(
+            str(input_path),
+            str(tmp_path / "output.mp4"),
+            conf=0.3,
+            mode=ProcessingMode.ANALYTICS_ONLY,
+            detection_cache=cache_path,
+        )
+
+    # The model runs at the cache's threshold, the results use the task's.
+    assert model.call_args.kwargs["conf"] == 0.05
+    assert result.report.summary.class_distribution == {"bus": 3}
+
+    rebuilt = service.render_cached_detections(
+        None, str(tmp_path / "again.mp4"), cache_path, conf=0.05
+    )
+    assert rebuilt.report.summary.class_distribution == {"car": 3, "bus": 3}
+    assert rebuilt.report.meta.source_filename == "input.mp4"
+    assert rebuilt.video_path is None
+    same = service.render_cached_detections(
+        None, str(tmp_path / "same.mp4"), cache_path, conf=0.3
+    )
+    assert same.report.summary == result.report.summary
+    assert same.report.time_buckets == result.report.time_buckets
+
+
+@pytest.mark.parametrize("option", ["batch_size", "stride"])
+def test_process_video_rejects_explicit_zero(mock_dependencies, tmp_path, option):
+    input_path = tmp_path / "input.mp4"
+    input_path.write_bytes(b"fake")
+
+    service = YoloService()
+    with pytest.raises(ValueError, match=f"{option} must be positive"):
+        service.process_video(
+            str(input_path), str(tmp_path / "output.mp4"), **{option: 0}
+        )
@@ -0,0 +1,33 @@
+-- Bring a tasks table created by an earlier version up to date.
+--
+-- init_db only creates missing tables (SQLModel create_all), so columns
+-- added to Task later have to be added to existing databases by hand.
+-- Every statement is idempotent; run the whole file before deploying:
+--
+--     psql "$DATABASE_URL" -f scripts/upgrade_tasks.sql
+
+-- Processing mode (analytics-only tasks). Enum labels are the member names.
+DO $$
+BEGIN
+    CREATE TYPE processingmode AS ENUM ('FULL', 'ANALYTICS_ONLY');
+EXCEPTION
+    WHEN duplicate_object THEN NULL;
+END
+$$;
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS mode processingmode NOT NULL DEFAULT 'FULL';
+
+-- Whether the per-frame time series is kept next to the report.
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS raw_time_series BOOLEAN NOT NULL DEFAULT FALSE;
+
+-- Content hash, dedupe key and reused task of deduplicated uploads.
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS content_hash VARCHAR;
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS dedupe_key VARCHAR;
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS source_task_id UUID;
+CREATE INDEX IF NOT EXISTS ix_tasks_content_hash ON tasks (content_hash);
+
+-- Object storage key of the input video, for re-rendering at a new threshold.
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS input_key VARCHAR;
+
+-- Direct upload a task was confirmed from; confirming again reuses the task.
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS upload_id UUID;
+CREATE UNIQUE INDEX IF NOT EXISTS ix_tasks_upload_id ON tasks (upload_id);